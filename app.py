@@ -5,6 +5,7 @@ import webbrowser
 from stuco_portal import create_app
 from stuco_portal.extensions import db
 from stuco_portal.services.ai.providers import get_provider
+from stuco_portal.services.ai.summaries import backfill_summary_payloads
 from stuco_portal.services.db_utils import ensure_schema_updates
 from stuco_portal.services.seed import seed_data
 from stuco_portal.services.worker import start_worker_thread, stop_worker_thread
@@ -33,6 +34,7 @@ def main():
         db.create_all()
         ensure_schema_updates()
         seed_data()
+        backfill_summary_payloads()
 
     if app.config.get("ENABLE_WORKER"):
         print("MAIN: Starting background worker thread...")
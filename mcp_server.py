@@ -1,5 +1,6 @@
 from stuco_portal.mcp import create_mcp_app
 from stuco_portal.extensions import db
+from stuco_portal.services.ai.summaries import backfill_summary_payloads
 from stuco_portal.services.db_utils import ensure_schema_updates
 from stuco_portal.services.seed import seed_data
 
@@ -10,6 +11,7 @@ def main():
         db.create_all()
         ensure_schema_updates()
         seed_data()
+        backfill_summary_payloads()
 
     print("\n--- MCP SERVER READY ---")
     print(f"MCP: http://{app.config['MCP_HOST']}:{app.config['MCP_PORT']}/mcp/health")
@@ -2,6 +2,7 @@ from typing import Optional
 
 from flask import Flask
 
+from .cli import register_commands
 from .config import AppConfig
 from .extensions import init_extensions
 from .routes import register_blueprints
@@ -25,4 +26,5 @@ def create_base_app(config: Optional[AppConfig] = None) -> Flask:
 def create_app(config: Optional[AppConfig] = None) -> Flask:
     app = create_base_app(config)
     register_blueprints(app)
+    register_commands(app)
     return app
@@ -0,0 +1,85 @@
+import json
+
+import click
+from flask import current_app
+
+from .services.ai.benchmark import benchmark_summary_engines
+from .services.analytics import ensure_feedback_stats, rebuild_feedback_stats
+from .services.digests import backfill_monthly_digests, parse_month_key, plan_digest_backfill
+from .services.search import ensure_feedback_search, rebuild_feedback_search
+from .services.summary_rebuild import (
+    MOCK_REBUILD_ERROR,
+    estimate_summary_rebuild,
+    execute_summary_rebuild,
+    get_latest_rebuild_run,
+    is_rebuild_claimed,
+    start_summary_rebuild,
+)
+
+
+def register_commands(app):
+    @app.cli.command("rebuild-summaries")
+    @click.option("--dry-run", is_flag=True, help="Only print targets and a cost estimate.")
+    @click.option("--workers", type=int, default=None, help="Targets rebuilt in parallel.")
+    @click.option("--restart", is_flag=True, help="Abandon an unfinished run and start over.")
+    def rebuild_summaries(dry_run, workers, restart):
+        """Rebuild every teacher and category summary that has approved feedback."""
+        estimate = estimate_summary_rebuild()
+        print(json.dumps(estimate, indent=2))
+        if dry_run:
+            return
+        if estimate["engine"] == "mock":
+            raise click.ClickException(MOCK_REBUILD_ERROR)
+        if is_rebuild_claimed(get_latest_rebuild_run()):
+            raise click.ClickException("A summary rebuild is already running.")
+        run = start_summary_rebuild(restart=restart)
+        execute_summary_rebuild(current_app._get_current_object(), run.id, workers=workers)
+
+    @app.cli.command("benchmark-summaries")
+    @click.option("--targets", type=int, default=10, help="Synthetic teachers to summarize.")
+    @click.option("--entries", type=int, default=40, help="Feedback entries per target.")
+    @click.option("--seed", type=int, default=7, help="Seed for the synthetic corpus.")
+    def benchmark_summaries(targets, entries, seed):
+        """Compare the local summary engine with the LLM path on a synthetic corpus."""
+        results = benchmark_summary_engines(
+            targets=targets,
+            entries_per_target=entries,
+            seed=seed,
+            max_bullets=current_app.config.get("SUMMARY_LOCAL_MAX_BULLETS", 5),
+        )
+        print(json.dumps(results, indent=2))
+        if results["llm"] is None:
+            print("No AI provider is configured; only the local engine was benchmarked.")
+
+    @app.cli.command("backfill-digests")
+    @click.argument("start_month")
+    @click.argument("end_month")
+    @click.option("--workers", type=int, default=None, help="Months generated in parallel.")
+    @click.option("--dry-run", is_flag=True, help="Only list missing and present months.")
+    def backfill_digests(start_month, end_month, workers, dry_run):
+        """Generate missing monthly digests from START_MONTH to END_MONTH (YYYY-MM)."""
+        try:
+            plan = plan_digest_backfill(parse_month_key(start_month), parse_month_key(end_month))
+        except ValueError:
+            raise click.BadParameter("Months must look like YYYY-MM.")
+        print(json.dumps(plan, indent=2))
+        if dry_run or not plan["missing"]:
+            return
+        result = backfill_monthly_digests(
+            current_app._get_current_object(), plan["missing"], workers=workers
+        )
+        print(json.dumps(result, indent=2))
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index():
+        """Create the feedback full-text index if needed and rebuild it from the feedback table."""
+        if not ensure_feedback_search():
+            raise click.ClickException("Full-text search requires SQLite with FTS5.")
+        print(f"Indexed {rebuild_feedback_search()} feedback entries.")
+
+    @app.cli.command("rebuild-analytics")
+    def rebuild_analytics():
+        """Recount the admin analytics rollup from the feedback table."""
+        if not ensure_feedback_stats():
+            raise click.ClickException("The analytics rollup requires SQLite.")
+        print(f"Counted {rebuild_feedback_stats()} feedback entries.")
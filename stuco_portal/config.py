@@ -33,9 +33,30 @@ class AppConfig:
     gemini_api_url: str
     ai_provider: str
     ai_timeout: int
+    moderation_timeout: float
     ai_max_tokens: int
     deepthink_or_not: bool
+    summary_full_rebuild_hours: int
+    summary_chunk_size: int
+    summary_map_workers: int
+    summary_chunk_cache_days: int
+    summary_cluster_threshold: float
+    summary_engine: str
+    summary_local_max_bullets: int
+    digest_backfill_workers: int
+    digest_segment_min_feedback: int
+    digest_segment_sample_size: int
+    summary_batch_max_targets: int
+    summary_batch_max_entries: int
+    summary_rebuild_workers: int
+    summary_rebuild_calls_per_minute: int
+    ai_cost_per_1k_tokens: float
     worker_sleep_interval: int
+    duplicate_window_hours: int
+    duplicate_max_distance: int
+    rescreen_batch_size: int
+    rescreen_batches_per_minute: int
+    rescreen_max_attempts: int
     browser_host: str
     host: str
     port: int
@@ -77,9 +98,32 @@ class AppConfig:
             ),
             ai_provider=(os.getenv("AI_PROVIDER", "deepseek") or "deepseek").lower(),
             ai_timeout=int(os.getenv("AI_TIMEOUT", "60")),
+            moderation_timeout=float(os.getenv("MODERATION_TIMEOUT", "3")),
             ai_max_tokens=int(os.getenv("AI_MAX_TOKENS", "800")),
             deepthink_or_not=_env_bool("DEEPTHINK_OR_NOT", False),
+            summary_full_rebuild_hours=int(os.getenv("SUMMARY_FULL_REBUILD_HOURS", "168")),
+            summary_chunk_size=int(os.getenv("SUMMARY_CHUNK_SIZE", "40")),
+            summary_map_workers=int(os.getenv("SUMMARY_MAP_WORKERS", "4")),
+            summary_chunk_cache_days=int(os.getenv("SUMMARY_CHUNK_CACHE_DAYS", "30")),
+            summary_cluster_threshold=float(os.getenv("SUMMARY_CLUSTER_THRESHOLD", "0.7")),
+            summary_engine=os.getenv("SUMMARY_ENGINE", "llm").strip().lower(),
+            summary_local_max_bullets=int(os.getenv("SUMMARY_LOCAL_MAX_BULLETS", "5")),
+            digest_backfill_workers=int(os.getenv("DIGEST_BACKFILL_WORKERS", "2")),
+            digest_segment_min_feedback=int(os.getenv("DIGEST_SEGMENT_MIN_FEEDBACK", "10")),
+            digest_segment_sample_size=int(os.getenv("DIGEST_SEGMENT_SAMPLE_SIZE", "40")),
+            summary_batch_max_targets=int(os.getenv("SUMMARY_BATCH_MAX_TARGETS", "6")),
+            summary_batch_max_entries=int(os.getenv("SUMMARY_BATCH_MAX_ENTRIES", "5")),
+            summary_rebuild_workers=int(os.getenv("SUMMARY_REBUILD_WORKERS", "2")),
+            summary_rebuild_calls_per_minute=int(
+                os.getenv("SUMMARY_REBUILD_CALLS_PER_MINUTE", "30")
+            ),
+            ai_cost_per_1k_tokens=float(os.getenv("AI_COST_PER_1K_TOKENS", "0")),
             worker_sleep_interval=int(os.getenv("WORKER_SLEEP_INTERVAL", "10")),
+            duplicate_window_hours=int(os.getenv("DUPLICATE_WINDOW_HOURS", "72")),
+            duplicate_max_distance=int(os.getenv("DUPLICATE_MAX_DISTANCE", "3")),
+            rescreen_batch_size=int(os.getenv("RESCREEN_BATCH_SIZE", "20")),
+            rescreen_batches_per_minute=int(os.getenv("RESCREEN_BATCHES_PER_MINUTE", "6")),
+            rescreen_max_attempts=int(os.getenv("RESCREEN_MAX_ATTEMPTS", "3")),
             browser_host=os.getenv("BROWSER_HOST", "127.0.0.1"),
             host=os.getenv("HOST", "0.0.0.0"),
             port=int(os.getenv("PORT", "5001")),
@@ -116,9 +160,30 @@ class AppConfig:
             "GEMINI_API_URL": self.gemini_api_url,
             "AI_PROVIDER": self.ai_provider,
             "AI_TIMEOUT": self.ai_timeout,
+            "MODERATION_TIMEOUT": self.moderation_timeout,
             "AI_MAX_TOKENS": self.ai_max_tokens,
             "DEEPTHINK_OR_NOT": self.deepthink_or_not,
+            "SUMMARY_FULL_REBUILD_HOURS": self.summary_full_rebuild_hours,
+            "SUMMARY_CHUNK_SIZE": self.summary_chunk_size,
+            "SUMMARY_MAP_WORKERS": self.summary_map_workers,
+            "SUMMARY_CHUNK_CACHE_DAYS": self.summary_chunk_cache_days,
+            "SUMMARY_CLUSTER_THRESHOLD": self.summary_cluster_threshold,
+            "SUMMARY_ENGINE": self.summary_engine,
+            "SUMMARY_LOCAL_MAX_BULLETS": self.summary_local_max_bullets,
+            "DIGEST_BACKFILL_WORKERS": self.digest_backfill_workers,
+            "DIGEST_SEGMENT_MIN_FEEDBACK": self.digest_segment_min_feedback,
+            "DIGEST_SEGMENT_SAMPLE_SIZE": self.digest_segment_sample_size,
+            "SUMMARY_BATCH_MAX_TARGETS": self.summary_batch_max_targets,
+            "SUMMARY_BATCH_MAX_ENTRIES": self.summary_batch_max_entries,
+            "SUMMARY_REBUILD_WORKERS": self.summary_rebuild_workers,
+            "SUMMARY_REBUILD_CALLS_PER_MINUTE": self.summary_rebuild_calls_per_minute,
+            "AI_COST_PER_1K_TOKENS": self.ai_cost_per_1k_tokens,
             "WORKER_SLEEP_INTERVAL": self.worker_sleep_interval,
+            "DUPLICATE_WINDOW_HOURS": self.duplicate_window_hours,
+            "DUPLICATE_MAX_DISTANCE": self.duplicate_max_distance,
+            "RESCREEN_BATCH_SIZE": self.rescreen_batch_size,
+            "RESCREEN_BATCHES_PER_MINUTE": self.rescreen_batches_per_minute,
+            "RESCREEN_MAX_ATTEMPTS": self.rescreen_max_attempts,
             "BROWSER_HOST": self.browser_host,
             "HOST": self.host,
             "PORT": self.port,
@@ -0,0 +1,47 @@
+import hashlib
+from datetime import timezone
+
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+def _http_datetime(value):
+    # Stored timestamps are naive UTC; HTTP dates have one-second resolution.
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def apply_cache_headers(response, etag, last_modified=None, max_age=0):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _http_datetime(last_modified)
+    # Responses are per user, so only the browser may keep them; max_age=0 means
+    # "always revalidate", which is a cheap 304 when nothing changed.
+    response.headers["Cache-Control"] = (
+        f"private, max-age={max_age}" if max_age else "private, no-cache"
+    )
+    response.vary.add("Cookie")
+    return response
+
+
+def not_modified_response(etag, last_modified=None, max_age=0):
+    # Returns a 304 when the client's validators still match, else None. If-None-Match
+    # wins over If-Modified-Since, as in RFC 9110.
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = _http_datetime(last_modified) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    response = current_app.response_class(status=304)
+    return apply_cache_headers(response, etag, last_modified, max_age)
@@ -15,9 +15,18 @@ from ..models import (
     Teacher,
     TeacherSummary,
 )
-from ..services.ai.summaries import get_summary_bullets
-from ..services.audit import log_audit, record_feedback_status
+from ..services.ai.summaries import get_summary_payload
+from ..services.audit import (
+    audit_log_filters,
+    audit_log_query,
+    log_audit,
+    record_feedback_status,
+    serialize_audit_log,
+)
+from ..services.bulk_moderation import bulk_moderate_feedback, parse_bulk_ids
 from ..services.db_utils import ensure_schema_updates
+from ..services.dedup import forget_feedback, reroot_duplicates, reset_duplicate_index
+from ..services.feedback_queries import count_feedback, keyset_page, parse_page_args
 from ..services.seed import seed_data
 
 mcp_bp = Blueprint("mcp", __name__)
@@ -68,8 +77,11 @@ def mcp_manifest():
                 },
                 {
                     "name": "feedback",
-                    "description": "Feedback entries filtered by status/category/teacher.",
-                    "params": ["status", "category", "teacher_id", "limit"],
+                    "description": (
+                        "Feedback entries filtered by status/category/teacher, newest first. "
+                        "Paginated: pass next_cursor back as cursor."
+                    ),
+                    "params": ["status", "category", "teacher_id", "limit", "cursor"],
                 },
                 {
                     "name": "categories",
@@ -103,8 +115,19 @@ def mcp_manifest():
                 },
                 {
                     "name": "audit_logs",
-                    "description": "Audit log entries.",
-                    "params": ["limit"],
+                    "description": (
+                        "Audit log entries, newest first. Paginated: pass next_cursor back as cursor."
+                    ),
+                    "params": [
+                        "action",
+                        "target_type",
+                        "target_id",
+                        "actor_user_id",
+                        "from",
+                        "to",
+                        "limit",
+                        "cursor",
+                    ],
                 },
             ],
             "tools": [
@@ -123,6 +146,18 @@ def mcp_manifest():
                     "description": "Delete a feedback item and enqueue a summary job.",
                     "input_schema": {"feedback_id": "int"},
                 },
+                {
+                    "name": "bulk_moderate_feedback",
+                    "description": (
+                        "Approve, retract or delete many feedback items in one transaction "
+                        "and enqueue one summary job per affected teacher/category."
+                    ),
+                    "input_schema": {
+                        "action": "approve|retract|delete",
+                        "feedback_ids": "list[int]",
+                        "note": "str(optional)",
+                    },
+                },
                 {
                     "name": "enqueue_summary",
                     "description": "Insert a summary job for a teacher/category.",
@@ -152,6 +187,16 @@ def mcp_manifest():
     )
 
 
+def _serialize_summary(summary, key_name, key_value):
+    payload = get_summary_payload(summary)
+    return {
+        key_name: key_value,
+        "positive_bullets": payload["positive_bullets"],
+        "actionable_bullets": payload["actionable_bullets"],
+        "last_updated": summary.last_updated.isoformat() if summary.last_updated else None,
+    }
+
+
 @mcp_bp.route("/mcp/resources/<resource_name>", methods=["GET"])
 @require_mcp_auth
 def mcp_resource(resource_name):
@@ -187,42 +232,47 @@ def mcp_resource(resource_name):
         status = request.args.get("status")
         category = request.args.get("category")
         teacher_id = request.args.get("teacher_id")
-        limit = request.args.get("limit")
-        query = Feedback.query
+        try:
+            cursor, limit = parse_page_args(request.args)
+        except ValueError:
+            return jsonify({"error": "cursor and limit must be integers."}), 400
+        criteria = []
         if status:
-            query = query.filter(Feedback.status == status)
+            criteria.append(Feedback.status == status)
         if category:
-            query = query.filter(Feedback.category == category)
+            criteria.append(Feedback.category == category)
         if teacher_id:
             try:
-                query = query.filter(Feedback.teacher_id == int(teacher_id))
+                criteria.append(Feedback.teacher_id == int(teacher_id))
             except ValueError:
                 return jsonify({"error": "teacher_id must be an integer."}), 400
-        if limit:
-            try:
-                limit_val = max(1, min(int(limit), 200))
-                query = query.limit(limit_val)
-            except ValueError:
-                return jsonify({"error": "limit must be an integer."}), 400
+        rows, next_cursor = keyset_page(Feedback.query.filter(*criteria), cursor, limit)
         return jsonify(
-            [
-                {
-                    "id": f.id,
-                    "teacher_id": f.teacher_id,
-                    "category": f.category,
-                    "feedback_text": f.feedback_text,
-                    "context_detail": f.context_detail,
-                    "year_level_submitted": f.year_level_submitted,
-                    "willing_to_share_name": f.willing_to_share_name,
-                    "submitted_by_user_id": f.submitted_by_user_id,
-                    "created_at": f.created_at.isoformat() if f.created_at else None,
-                    "toxicity_score": f.toxicity_score,
-                    "is_inappropriate": f.is_inappropriate,
-                    "status": f.status,
-                    "is_summary_approved": f.is_summary_approved,
-                }
-                for f in query.order_by(Feedback.id.desc()).all()
-            ]
+            {
+                "items": [
+                    {
+                        "id": f.id,
+                        "teacher_id": f.teacher_id,
+                        "category": f.category,
+                        "feedback_text": f.feedback_text,
+                        "context_detail": f.context_detail,
+                        "year_level_submitted": f.year_level_submitted,
+                        "willing_to_share_name": f.willing_to_share_name,
+                        "submitted_by_user_id": f.submitted_by_user_id,
+                        "created_at": f.created_at.isoformat() if f.created_at else None,
+                        "toxicity_score": f.toxicity_score,
+                        "is_inappropriate": f.is_inappropriate,
+                        "status": f.status,
+                        "is_summary_approved": f.is_summary_approved,
+                        "duplicate_of_id": f.duplicate_of_id,
+                        "screened_by": f.screened_by,
+                    }
+                    for f in rows
+                ],
+                "next_cursor": next_cursor,
+                "limit": limit,
+                "total": count_feedback(criteria),
+            }
         )
 
     if resource_name == "categories":
@@ -257,15 +307,7 @@ def mcp_resource(resource_name):
         if teacher_id:
             query = query.filter(TeacherSummary.teacher_id == int(teacher_id))
         return jsonify(
-            [
-                {
-                    "teacher_id": s.teacher_id,
-                    "positive_bullets": get_summary_bullets(s, True),
-                    "actionable_bullets": get_summary_bullets(s, False),
-                    "last_updated": s.last_updated.isoformat() if s.last_updated else None,
-                }
-                for s in query.all()
-            ]
+            [_serialize_summary(s, "teacher_id", s.teacher_id) for s in query.all()]
         )
 
     if resource_name == "category_summaries":
@@ -274,15 +316,7 @@ def mcp_resource(resource_name):
         if category:
             query = query.filter(CategorySummary.category_name == category)
         return jsonify(
-            [
-                {
-                    "category_name": s.category_name,
-                    "positive_bullets": get_summary_bullets(s, True),
-                    "actionable_bullets": get_summary_bullets(s, False),
-                    "last_updated": s.last_updated.isoformat() if s.last_updated else None,
-                }
-                for s in query.all()
-            ]
+            [_serialize_summary(s, "category_name", s.category_name) for s in query.all()]
         )
 
     if resource_name == "clarifications":
@@ -353,25 +387,24 @@ def mcp_resource(resource_name):
         )
 
     if resource_name == "audit_logs":
-        limit = request.args.get("limit", "50")
         try:
-            limit_val = max(1, min(int(limit), 200))
+            cursor, limit = parse_page_args(request.args)
+            criteria = audit_log_filters(request.args)
         except ValueError:
-            limit_val = 50
-        logs = AuditLog.query.order_by(AuditLog.created_at.desc()).limit(limit_val).all()
+            return jsonify({"error": "Invalid cursor, limit, actor_user_id or date."}), 400
+        rows, next_cursor = keyset_page(
+            audit_log_query(criteria),
+            cursor,
+            limit,
+            id_of=lambda row: row[0].id,
+            id_column=AuditLog.id,
+        )
         return jsonify(
-            [
-                {
-                    "id": log.id,
-                    "actor_user_id": log.actor_user_id,
-                    "action": log.action,
-                    "target_type": log.target_type,
-                    "target_id": log.target_id,
-                    "details": log.details,
-                    "created_at": log.created_at.isoformat() if log.created_at else None,
-                }
-                for log in logs
-            ]
+            {
+                "items": [serialize_audit_log(log, actor_name) for log, actor_name in rows],
+                "next_cursor": next_cursor,
+                "limit": limit,
+            }
         )
 
     return jsonify({"error": "Unknown resource."}), 404
@@ -413,6 +446,7 @@ def mcp_tool(tool_name):
         old_status = feedback_item.status
         feedback_item.is_summary_approved = False
         feedback_item.status = "Retracted by Admin"
+        reroot_duplicates([feedback_item.id])
         job_type = "teacher" if feedback_item.category == "teacher" else "category"
         target_id = str(feedback_item.teacher_id) if job_type == "teacher" else feedback_item.category
         db.session.add(
@@ -439,12 +473,27 @@ def mcp_tool(tool_name):
         SummaryJobQueue.query.filter_by(feedback_id=feedback_id).delete()
         record_feedback_status(feedback_item.id, old_status, "Deleted", note="MCP deleted")
         log_audit("feedback_deleted", "feedback", feedback_item.id, details={"previous_status": old_status})
+        forget_feedback(feedback_item.id)
         db.session.delete(feedback_item)
         db.session.commit()
         db.session.add(SummaryJobQueue(job_type=job_type, target_id=target_id, feedback_id=None))
         db.session.commit()
         return jsonify({"ok": True, "message": "Feedback deleted."})
 
+    if tool_name == "bulk_moderate_feedback":
+        try:
+            feedback_ids = parse_bulk_ids(payload.get("feedback_ids"))
+            result = bulk_moderate_feedback(
+                payload.get("action"),
+                feedback_ids,
+                note=payload.get("note") or f"MCP bulk {payload.get('action')}",
+            )
+            db.session.commit()
+        except ValueError as exc:
+            db.session.rollback()
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"ok": True, **result})
+
     if tool_name == "enqueue_summary":
         job_type = payload.get("job_type")
         target_id = payload.get("target_id")
@@ -501,6 +550,7 @@ def mcp_tool(tool_name):
         db.drop_all()
         db.create_all()
         ensure_schema_updates()
+        reset_duplicate_index()
         seed_data()
         db.session.commit()
         return jsonify({"ok": True, "message": "Database reset."})
@@ -45,15 +45,23 @@ class Feedback(BaseModel):
     year_level_submitted = db.Column(db.String(10), nullable=True)
     willing_to_share_name = db.Column(db.Boolean, default=False)
     submitted_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=db.func.now())
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
     toxicity_score = db.Column(db.Float, default=0.0)
     is_inappropriate = db.Column(db.Boolean, default=False)
+    screened_by = db.Column(db.String(30), nullable=True)
     status = db.Column(db.String(50), default="New")
     is_summary_approved = db.Column(db.Boolean, default=False)
     rating_clarity = db.Column(db.Integer, nullable=True)
     rating_pacing = db.Column(db.Integer, nullable=True)
     rating_resources = db.Column(db.Integer, nullable=True)
     rating_support = db.Column(db.Integer, nullable=True)
+    text_fingerprint = db.Column(db.BigInteger, nullable=True)
+    duplicate_of_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_feedback_status_category", "status", "category"),
+        db.Index("ix_feedback_submitter_status", "submitted_by_user_id", "status"),
+    )
 
 
 class TeacherSummary(BaseModel):
@@ -64,6 +72,10 @@ class TeacherSummary(BaseModel):
     last_updated = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
     raw_positive_bullets = db.Column(db.JSON, nullable=True)
     raw_actionable_bullets = db.Column(db.JSON, nullable=True)
+    summarized_feedback_ids = db.Column(db.JSON, nullable=True)
+    last_full_rebuild_at = db.Column(db.DateTime, nullable=True)
+    input_fingerprint = db.Column(db.String(64), nullable=True)
+    response_payload = db.Column(db.JSON, nullable=True)
 
 
 class ClarificationRequest(BaseModel):
@@ -83,6 +95,8 @@ class SummaryJobQueue(BaseModel):
     target_id = db.Column(db.String(50), nullable=False)
     feedback_id = db.Column(db.Integer, db.ForeignKey("feedback.id"), nullable=True)
     status = db.Column(db.String(50), default="pending")
+    # Deferred retries (e.g. re-screens after a provider outage) wait until this time.
+    run_after = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
 
@@ -95,6 +109,10 @@ class CategorySummary(BaseModel):
     last_updated = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
     raw_positive_bullets = db.Column(db.JSON, nullable=True)
     raw_actionable_bullets = db.Column(db.JSON, nullable=True)
+    summarized_feedback_ids = db.Column(db.JSON, nullable=True)
+    last_full_rebuild_at = db.Column(db.DateTime, nullable=True)
+    input_fingerprint = db.Column(db.String(64), nullable=True)
+    response_payload = db.Column(db.JSON, nullable=True)
 
 
 class MonthlyDigest(BaseModel):
@@ -106,6 +124,45 @@ class MonthlyDigest(BaseModel):
     positive_bullets = db.Column(db.JSON, nullable=True)
     actionable_bullets = db.Column(db.JSON, nullable=True)
     feedback_count = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(20), default="complete")
+    segments = db.Column(db.JSON, nullable=True)
+
+
+class DailyDigestRollup(BaseModel):
+    __tablename__ = "daily_digest_rollups"
+    day = db.Column(db.Date, primary_key=True)
+    positive_bullets = db.Column(db.JSON, nullable=True)
+    actionable_bullets = db.Column(db.JSON, nullable=True)
+    feedback_count = db.Column(db.Integer, default=0)
+    input_signature = db.Column(db.String(64), nullable=True)
+    generated_at = db.Column(db.DateTime, default=db.func.now())
+
+
+class FeedbackStat(BaseModel):
+    # Running totals per (dimension, bucket, status), kept current by SQLite triggers on feedback.
+    __tablename__ = "feedback_stats"
+    dimension = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    feedback_count = db.Column(db.Integer, default=0)
+    flagged_count = db.Column(db.Integer, default=0)
+    rating_clarity_sum = db.Column(db.Integer, default=0)
+    rating_clarity_count = db.Column(db.Integer, default=0)
+    rating_pacing_sum = db.Column(db.Integer, default=0)
+    rating_pacing_count = db.Column(db.Integer, default=0)
+    rating_resources_sum = db.Column(db.Integer, default=0)
+    rating_resources_count = db.Column(db.Integer, default=0)
+    rating_support_sum = db.Column(db.Integer, default=0)
+    rating_support_count = db.Column(db.Integer, default=0)
+
+
+class SummaryChunkCache(BaseModel):
+    __tablename__ = "summary_chunk_cache"
+    cache_key = db.Column(db.String(64), primary_key=True)
+    positive_bullets = db.Column(db.JSON, nullable=True)
+    actionable_bullets = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    last_used_at = db.Column(db.DateTime, default=db.func.now(), index=True)
 
 
 class Category(BaseModel):
@@ -150,9 +207,29 @@ class FeedbackStatusHistory(BaseModel):
 class AuditLog(BaseModel):
     __tablename__ = "audit_logs"
     id = db.Column(db.Integer, primary_key=True)
-    actor_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
-    action = db.Column(db.String(80), nullable=False)
+    actor_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
+    action = db.Column(db.String(80), nullable=False, index=True)
     target_type = db.Column(db.String(80), nullable=True)
     target_id = db.Column(db.String(80), nullable=True)
     details = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
+
+    __table_args__ = (db.Index("ix_audit_logs_target", "target_type", "target_id"),)
+
+
+class MaintenanceRun(BaseModel):
+    __tablename__ = "maintenance_runs"
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(30), default="running")
+    cursor = db.Column(db.String(120), nullable=True)
+    processed = db.Column(db.Integer, default=0)
+    changed = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, default=0)
+    details = db.Column(db.JSON, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    owner = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+    last_batch_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
@@ -1,7 +1,11 @@
-from flask import Blueprint, current_app, jsonify, request, g
+from datetime import datetime
+from itertools import chain
+
+from flask import Blueprint, Response, current_app, jsonify, request, g, stream_with_context
 
 from ..auth import auth_required, is_valid_email, normalize_email
 from ..extensions import db
+from ..http_cache import apply_cache_headers, make_etag, not_modified_response
 from ..models import (
     Announcement,
     AuditLog,
@@ -14,11 +18,47 @@ from ..models import (
     TeacherSummary,
     User,
 )
-from ..services.ai.summaries import get_summary_bullets, render_bullets_html
-from ..services.audit import log_audit, record_feedback_status
+from ..services.ai.providers import get_provider
+from ..services.ai.summaries import get_summary_payload
+from ..services.ai.summary_output import summary_output_stats
+from ..services.analytics import (
+    DEFAULT_ANALYTICS_WEEKS,
+    MAX_ANALYTICS_WEEKS,
+    analytics_available,
+    feedback_analytics,
+)
+from ..services.audit import (
+    audit_log_filters,
+    audit_log_query,
+    log_audit,
+    record_feedback_status,
+    serialize_audit_log,
+)
+from ..services.bulk_moderation import bulk_moderate_feedback, parse_bulk_ids
 from ..services.db_utils import ensure_schema_updates, normalize_slug
+from ..services.dedup import forget_feedback, reroot_duplicates, reset_duplicate_index
+from ..services.export import EXPORT_FORMATS, parse_export_args, stream_feedback_export
+from ..services.feedback_queries import count_feedback, keyset_page, parse_page_args
+from ..services.metrics import metrics_snapshot
+from ..services.rescreen import (
+    get_latest_rescreen_run,
+    pause_rescreen_run,
+    serialize_run,
+    start_rescreen_run,
+)
+from ..services.search import build_match_query, render_snippet, search_available, search_feedback
 from ..services.seed import seed_data
-from ..services.worker import start_worker_thread, stop_worker_thread
+from ..services.summary_rebuild import (
+    MOCK_REBUILD_ERROR,
+    estimate_summary_rebuild,
+    get_latest_rebuild_run,
+    is_rebuild_claimed,
+    is_rebuild_running,
+    pause_summary_rebuild,
+    start_rebuild_thread,
+    start_summary_rebuild,
+)
+from ..services.worker import is_worker_running, start_worker_thread, stop_worker_thread
 
 bp = Blueprint("admin_api", __name__)
 
@@ -31,83 +71,227 @@ def get_admin_feedback_queue():
     print(
         f"--- ADMIN API HIT: Fetching status='{status_filter}' and category='{category_filter}' ---"
     )
-    query = Feedback.query.filter(Feedback.status == status_filter)
+    try:
+        cursor, limit = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "cursor and limit must be integers."}), 400
+    criteria = [Feedback.status == status_filter]
     if category_filter and category_filter != "all":
-        query = query.filter(Feedback.category == category_filter)
+        criteria.append(Feedback.category == category_filter)
+    query = (
+        db.session.query(Feedback, Teacher.name)
+        .outerjoin(Teacher, Teacher.id == Feedback.teacher_id)
+        .filter(*criteria)
+    )
+    rows, next_cursor = keyset_page(query, cursor, limit, id_of=lambda row: row[0].id)
     category_lookup = {c.slug: c.title for c in Category.query.all()}
-    queue_items = []
-    for feedback in query.order_by(Feedback.id.desc()).all():
-        teacher = db.session.get(Teacher, feedback.teacher_id)
-        teacher_name = teacher.name if teacher else "N/A"
-        summary_positive_bullets = []
-        summary_actionable_bullets = []
-        summary_note = None
-
-        if feedback.category == "teacher" and feedback.teacher_id:
-            teacher_summary = db.session.get(TeacherSummary, feedback.teacher_id)
-            if teacher_summary:
-                summary_positive_bullets = get_summary_bullets(teacher_summary, True)
-                summary_actionable_bullets = get_summary_bullets(teacher_summary, False)
-            else:
-                summary_note = "Summary not yet generated."
-
-        elif feedback.category != "teacher":
-            category_summary = db.session.get(CategorySummary, feedback.category)
-            if category_summary:
-                summary_positive_bullets = get_summary_bullets(category_summary, True)
-                summary_actionable_bullets = get_summary_bullets(category_summary, False)
-            else:
-                summary_note = "Summary not yet generated."
+    summaries = _queue_summaries(feedback for feedback, _ in rows)
 
+    queue_items = []
+    for feedback, teacher_name in rows:
         queue_items.append(
             {
                 "id": feedback.id,
-                "teacher_name": teacher_name,
+                "teacher_name": teacher_name or "N/A",
                 "category": feedback.category,
                 "category_title": category_lookup.get(feedback.category, feedback.category),
                 "feedback_text": feedback.feedback_text,
                 "context_detail": feedback.context_detail,
                 "toxicity_score": feedback.toxicity_score,
                 "status": feedback.status,
-                "summary_positive_bullets": summary_positive_bullets,
-                "summary_actionable_bullets": summary_actionable_bullets,
-                "summary_note": summary_note,
+                "summary_key": _queue_summary_key(feedback),
                 "is_inappropriate": feedback.is_inappropriate,
                 "is_summary_approved": feedback.is_summary_approved,
+                "duplicate_of_id": feedback.duplicate_of_id,
+                "screened_by": feedback.screened_by,
             }
         )
-    return jsonify(queue_items)
+    return jsonify(
+        {
+            "items": queue_items,
+            "summaries": summaries,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "total": count_feedback(criteria),
+        }
+    )
+
+
+def _queue_summary_key(feedback):
+    if feedback.category == "teacher":
+        return f"teacher:{feedback.teacher_id}" if feedback.teacher_id else None
+    return f"category:{feedback.category}"
+
+
+def _queue_summaries(feedback_rows):
+    # One query per summary table for the whole page; items reference entries by key.
+    teacher_ids = set()
+    category_names = set()
+    for feedback in feedback_rows:
+        if feedback.category == "teacher":
+            if feedback.teacher_id:
+                teacher_ids.add(feedback.teacher_id)
+        else:
+            category_names.add(feedback.category)
+
+    found = {}
+    if teacher_ids:
+        for summary in TeacherSummary.query.filter(TeacherSummary.teacher_id.in_(teacher_ids)):
+            found[f"teacher:{summary.teacher_id}"] = summary
+    if category_names:
+        for summary in CategorySummary.query.filter(
+            CategorySummary.category_name.in_(category_names)
+        ):
+            found[f"category:{summary.category_name}"] = summary
+
+    summaries = {}
+    keys = [f"teacher:{teacher_id}" for teacher_id in teacher_ids]
+    keys += [f"category:{category}" for category in category_names]
+    for key in keys:
+        summary = found.get(key)
+        if summary:
+            payload = get_summary_payload(summary)
+            summaries[key] = {
+                "positive_bullets": payload["positive_bullets"],
+                "actionable_bullets": payload["actionable_bullets"],
+                "note": None,
+            }
+        else:
+            summaries[key] = {
+                "positive_bullets": [],
+                "actionable_bullets": [],
+                "note": "Summary not yet generated.",
+            }
+    return summaries
+
+
+@bp.route("/api/admin/moderation/rescreen", methods=["GET", "POST"])
+@auth_required(role="stuco_admin")
+def admin_bulk_rescreen():
+    if request.method == "GET":
+        return jsonify({"run": serialize_run(get_latest_rescreen_run())})
+
+    if not get_provider().is_configured():
+        return jsonify({"error": "AI provider key missing. Configure a provider first."}), 400
+    run = start_rescreen_run()
+    log_audit("bulk_rescreen_started", "maintenance_run", run.id, details={"total": run.total})
+    db.session.commit()
+    return jsonify({"message": "Bulk re-screen running in background.", "run": serialize_run(run)}), 202
+
+
+@bp.route("/api/admin/moderation/rescreen/pause", methods=["POST"])
+@auth_required(role="stuco_admin")
+def admin_pause_bulk_rescreen():
+    run = pause_rescreen_run()
+    if not run:
+        return jsonify({"error": "No re-screen run found."}), 404
+    log_audit("bulk_rescreen_paused", "maintenance_run", run.id, details={"cursor": run.cursor})
+    db.session.commit()
+    return jsonify({"message": f"Re-screen run is {run.status}.", "run": serialize_run(run)})
+
+
+@bp.route("/api/admin/summaries/rebuild", methods=["GET", "POST"])
+@auth_required(role="stuco_admin")
+def admin_rebuild_summaries():
+    if request.method == "GET":
+        return jsonify(
+            {"run": serialize_run(get_latest_rebuild_run()), "active": is_rebuild_running()}
+        )
+
+    data = request.get_json(silent=True) or {}
+    estimate = estimate_summary_rebuild()
+    if data.get("dry_run"):
+        return jsonify({"dry_run": True, "estimate": estimate})
+    if estimate["engine"] == "mock":
+        return jsonify({"error": MOCK_REBUILD_ERROR, "estimate": estimate}), 400
+    if is_rebuild_running() or is_rebuild_claimed(get_latest_rebuild_run()):
+        return jsonify({"error": "A summary rebuild is already running."}), 409
+
+    run = start_summary_rebuild(restart=bool(data.get("restart")))
+    log_audit(
+        "summary_rebuild_started",
+        "maintenance_run",
+        run.id,
+        details={"total": run.total, "estimated_calls": estimate["estimated_calls"]},
+    )
+    db.session.commit()
+    start_rebuild_thread(current_app._get_current_object(), run.id)
+    return (
+        jsonify(
+            {
+                "message": "Summary rebuild running in background.",
+                "estimate": estimate,
+                "run": serialize_run(run),
+            }
+        ),
+        202,
+    )
+
+
+@bp.route("/api/admin/summaries/rebuild/pause", methods=["POST"])
+@auth_required(role="stuco_admin")
+def admin_pause_summary_rebuild():
+    run = pause_summary_rebuild()
+    if not run:
+        return jsonify({"error": "No summary rebuild run found."}), 404
+    log_audit("summary_rebuild_paused", "maintenance_run", run.id, details={"cursor": run.cursor})
+    db.session.commit()
+    return jsonify({"message": f"Summary rebuild is {run.status}.", "run": serialize_run(run)})
 
 
 @bp.route("/api/admin/category_summaries", methods=["GET"])
 @auth_required(role="stuco_admin")
 def get_category_summaries():
     try:
-        summaries = CategorySummary.query.all()
+        # Validate against a column-only read first so a 304 never loads the payloads.
+        versions = (
+            db.session.query(
+                CategorySummary.category_name,
+                CategorySummary.last_updated,
+                CategorySummary.input_fingerprint,
+            )
+            .order_by(CategorySummary.category_name)
+            .all()
+        )
         category_lookup = {c.slug: c.title for c in Category.query.all()}
+        etag = make_etag("category_summaries", versions, sorted(category_lookup.items()))
+        last_modified = max((row.last_updated for row in versions if row.last_updated), default=None)
+        cached = not_modified_response(etag, last_modified)
+        if cached:
+            return cached
+
+        summaries = CategorySummary.query.all()
         summary_data = []
         for summary in summaries:
-            positive_bullets = get_summary_bullets(summary, True)
-            actionable_bullets = get_summary_bullets(summary, False)
             summary_data.append(
                 {
                     "category_name": summary.category_name,
                     "category_title": category_lookup.get(
                         summary.category_name, summary.category_name
                     ),
-                    "positive_bullets": positive_bullets,
-                    "actionable_bullets": actionable_bullets,
-                    "positive_summary": render_bullets_html(positive_bullets),
-                    "actionable_summary": render_bullets_html(actionable_bullets),
+                    **get_summary_payload(summary),
                     "last_updated": summary.last_updated.isoformat(),
                 }
             )
-        return jsonify(summary_data)
+        return apply_cache_headers(jsonify(summary_data), etag, last_modified)
     except Exception as exc:
         print(f"ERROR fetching category summaries: {exc}")
         return jsonify({"error": "Could not fetch category summaries."}), 500
 
 
+@bp.route("/api/admin/analytics", methods=["GET"])
+@auth_required(role="stuco_admin")
+def get_admin_analytics():
+    if not analytics_available():
+        return jsonify({"error": "Analytics require the SQLite database."}), 501
+    try:
+        weeks = int(request.args.get("weeks", DEFAULT_ANALYTICS_WEEKS))
+    except ValueError:
+        return jsonify({"error": "weeks must be an integer."}), 400
+    weeks = max(1, min(weeks, MAX_ANALYTICS_WEEKS))
+    return jsonify(feedback_analytics(weeks))
+
+
 @bp.route("/api/admin/categories", methods=["GET", "POST"])
 @auth_required(role="stuco_admin")
 def admin_categories():
@@ -395,30 +579,128 @@ def admin_announcement_detail(announcement_id):
 @bp.route("/api/admin/audit_logs", methods=["GET"])
 @auth_required(role="stuco_admin")
 def admin_audit_logs():
-    limit = request.args.get("limit", "50")
     try:
-        limit_val = max(1, min(int(limit), 200))
+        cursor, limit = parse_page_args(request.args)
+        criteria = audit_log_filters(request.args)
     except ValueError:
-        limit_val = 50
-    logs = AuditLog.query.order_by(AuditLog.created_at.desc()).limit(limit_val).all()
+        return jsonify(
+            {"error": "cursor, limit and actor_user_id must be integers; from/to must be ISO dates."}
+        ), 400
+    rows, next_cursor = keyset_page(
+        audit_log_query(criteria), cursor, limit, id_of=lambda row: row[0].id, id_column=AuditLog.id
+    )
     return jsonify(
-        [
+        {
+            "items": [serialize_audit_log(log, actor_name) for log, actor_name in rows],
+            "next_cursor": next_cursor,
+            "limit": limit,
+        }
+    )
+
+
+@bp.route("/api/admin/feedback/search", methods=["GET"])
+@auth_required(role="stuco_admin")
+def search_admin_feedback():
+    if not search_available():
+        return jsonify({"error": "Full-text search requires the SQLite database."}), 501
+    match_query = build_match_query(request.args.get("q"))
+    if not match_query:
+        return jsonify({"error": "Search query 'q' is required."}), 400
+    try:
+        page = max(1, int(request.args.get("page", "1")))
+        per_page = max(1, min(int(request.args.get("per_page", "20")), 100))
+        teacher_id = request.args.get("teacher_id")
+        teacher_id = int(teacher_id) if teacher_id else None
+    except ValueError:
+        return jsonify({"error": "page, per_page and teacher_id must be integers."}), 400
+    category = request.args.get("category")
+
+    rows, total = search_feedback(
+        match_query,
+        status=request.args.get("status") or None,
+        category=category if category and category != "all" else None,
+        teacher_id=teacher_id,
+        limit=per_page,
+        offset=(page - 1) * per_page,
+    )
+    ids = [row[0] for row in rows]
+    feedback_by_id = {}
+    if ids:
+        for feedback, teacher_name in (
+            db.session.query(Feedback, Teacher.name)
+            .outerjoin(Teacher, Teacher.id == Feedback.teacher_id)
+            .filter(Feedback.id.in_(ids))
+        ):
+            feedback_by_id[feedback.id] = (feedback, teacher_name)
+    category_lookup = {c.slug: c.title for c in Category.query.all()}
+
+    results = []
+    for feedback_id, score, text_snippet, context_snippet in rows:
+        feedback, teacher_name = feedback_by_id[feedback_id]
+        results.append(
             {
-                "id": log.id,
-                "actor_user_id": log.actor_user_id,
-                "actor_name": (
-                    user.name
-                    if log.actor_user_id and (user := db.session.get(User, log.actor_user_id))
-                    else None
-                ),
-                "action": log.action,
-                "target_type": log.target_type,
-                "target_id": log.target_id,
-                "details": log.details,
-                "created_at": log.created_at.isoformat(),
+                "id": feedback.id,
+                "teacher_name": teacher_name or "N/A",
+                "category": feedback.category,
+                "category_title": category_lookup.get(feedback.category, feedback.category),
+                "status": feedback.status,
+                "feedback_snippet": render_snippet(text_snippet),
+                "context_snippet": render_snippet(context_snippet) if feedback.context_detail else None,
+                "score": round(-score, 4),
+                "created_at": feedback.created_at.isoformat() if feedback.created_at else None,
             }
-            for log in logs
-        ]
+        )
+    return jsonify(
+        {
+            "items": results,
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "has_more": page * per_page < total,
+        }
+    )
+
+
+@bp.route("/api/admin/feedback/export", methods=["GET"])
+@auth_required(role="stuco_admin")
+def export_feedback():
+    try:
+        export_format, fields, criteria = parse_export_args(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    log_audit(
+        "feedback_exported",
+        "feedback",
+        details={
+            "format": export_format,
+            "fields": fields,
+            "filters": {
+                key: request.args[key]
+                for key in ("from", "to", "status", "category", "teacher_id")
+                if request.args.get(key)
+            },
+        },
+    )
+    db.session.commit()
+
+    # Run the query and render the first batch before any headers go out, so a failure is
+    # a proper error response rather than a truncated 200 download.
+    chunks = stream_feedback_export(export_format, fields, criteria)
+    try:
+        first_chunk = next(chunks, b"")
+    except Exception as exc:
+        db.session.rollback()
+        print(f"ERROR: Feedback export failed. {exc}")
+        return jsonify({"error": f"An error occurred during export: {exc}"}), 500
+
+    filename = f"feedback-export-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return Response(
+        stream_with_context(chain([first_chunk], chunks)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
     )
 
 
@@ -467,6 +749,7 @@ def retract_feedback_summary(feedback_id):
     old_status = feedback_item.status
     feedback_item.is_summary_approved = False
     feedback_item.status = "Retracted by Admin"
+    reroot_duplicates([feedback_item.id])
 
     job_type = "teacher" if feedback_item.category == "teacher" else "category"
     target_id = str(feedback_item.teacher_id) if job_type == "teacher" else feedback_item.category
@@ -516,6 +799,7 @@ def delete_feedback(feedback_id):
             note="Admin deleted feedback",
         )
         log_audit("feedback_deleted", "feedback", feedback_item.id, details={"previous_status": old_status})
+        forget_feedback(feedback_item.id)
         db.session.delete(feedback_item)
         db.session.commit()
 
@@ -530,6 +814,30 @@ def delete_feedback(feedback_id):
         return jsonify({"error": f"An error occurred during deletion: {exc}"}), 500
 
 
+@bp.route("/api/admin/feedback/bulk", methods=["POST"])
+@auth_required(role="stuco_admin")
+def bulk_moderate_feedback_items():
+    data = request.get_json(silent=True) or {}
+    try:
+        feedback_ids = parse_bulk_ids(data.get("feedback_ids"))
+        result = bulk_moderate_feedback(
+            data.get("action"), feedback_ids, actor_id=g.user.id, note=data.get("note")
+        )
+        db.session.commit()
+    except ValueError as exc:
+        db.session.rollback()
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:
+        db.session.rollback()
+        print(f"ERROR: Bulk moderation failed. {exc}")
+        return jsonify({"error": f"An error occurred during bulk moderation: {exc}"}), 500
+    result["message"] = (
+        f"{len(result['changed'])} feedback item(s) updated ({result['action']}). "
+        f"{result['jobs']} summary job(s) queued."
+    )
+    return jsonify(result), 200
+
+
 @bp.route("/api/admin/clarification_requests", methods=["GET"])
 @auth_required(role="stuco_admin")
 def get_clarification_queue():
@@ -585,6 +893,16 @@ def reply_to_clarification(request_id):
         return jsonify({"error": "Internal server error."}), 500
 
 
+@bp.route("/api/admin/worker/metrics", methods=["GET"])
+@auth_required(role="stuco_admin")
+def admin_worker_metrics():
+    payload = metrics_snapshot()
+    payload["summary_output"] = summary_output_stats(payload["counters"])
+    payload["worker_running"] = is_worker_running()
+    payload["pending_jobs"] = SummaryJobQueue.query.filter_by(status="pending").count()
+    return jsonify(payload)
+
+
 @bp.route("/api/admin/reset_database", methods=["POST"])
 @auth_required(role="stuco_admin")
 def reset_database():
@@ -598,6 +916,7 @@ def reset_database():
         db.drop_all()
         db.create_all()
         ensure_schema_updates()
+        reset_duplicate_index()
         seed_data()
         log_audit("database_reset", "database", "all", details={"action": "reset"})
         db.session.commit()
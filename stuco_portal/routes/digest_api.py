@@ -1,18 +1,35 @@
 from datetime import date
 
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, current_app, jsonify, g, request
 
 from ..auth import auth_required
+from ..extensions import db
+from ..http_cache import apply_cache_headers, make_etag, not_modified_response
 from ..models import MonthlyDigest
 from ..services.ai.summaries import (
+    complete_digest_filter,
     get_month_date_range,
+    is_digest_complete,
+    is_digest_retry_waiting,
     is_last_day_of_month,
+    latest_complete_digest,
     month_key_for_date,
-    run_monthly_digest,
+)
+from ..services.ai.rollups import get_daily_rollups
+from ..services.audit import log_audit
+from ..services.digests import (
+    is_backfill_running,
+    parse_month_key,
+    plan_digest_backfill,
+    serialize_digest,
+    start_backfill_thread,
+    start_digest_thread,
 )
 
 bp = Blueprint("digest_api", __name__)
 
+DIGEST_MAX_AGE_SECONDS = 300
+
 
 @bp.route("/api/monthly_digest", methods=["GET"])
 @auth_required()
@@ -25,18 +42,28 @@ def get_monthly_digest():
     start_date, end_date = get_month_date_range(today)
     is_last_day = is_last_day_of_month(today)
 
-    digest = MonthlyDigest.query.filter_by(month_key=current_key).first()
+    digest = db.session.get(MonthlyDigest, current_key)
     status_message = ""
     note = ""
+    pending = False
 
-    if is_last_day and not digest:
-        digest = run_monthly_digest(today)
-        status_message = "New digest generated for month end."
+    if is_last_day and not is_digest_complete(digest):
+        # Generation runs in the background; this request answers right away. After a
+        # failed run, page loads leave the retry until its backoff has passed.
+        if not is_digest_retry_waiting(digest):
+            start_digest_thread(current_app._get_current_object(), today)
+        pending = True
+    elif digest is not None and not is_digest_complete(digest):
+        pending = True
 
-    if not digest:
-        digest = MonthlyDigest.query.order_by(MonthlyDigest.month_key.desc()).first()
+    if not is_digest_complete(digest):
+        digest = latest_complete_digest()
         if not digest:
-            return jsonify(
+            etag = make_etag("monthly_digest", current_key, today, pending)
+            cached = not_modified_response(etag)
+            if cached:
+                return cached
+            response = jsonify(
                 {
                     "title": f"Monthly digest: {current_key}",
                     "coverage": f"{start_date.isoformat()} to {end_date.isoformat()}",
@@ -44,23 +71,41 @@ def get_monthly_digest():
                     "feedback_count": 0,
                     "positive_bullets": [],
                     "actionable_bullets": [],
-                    "status_message": "Monthly digest will generate on the last day of the month.",
+                    "segments": {"category": [], "year_level": []},
+                    "status_message": (
+                        "This month's digest is being generated. Check back shortly."
+                        if pending
+                        else "Monthly digest will generate on the last day of the month."
+                    ),
                     "next_run": end_date.isoformat(),
                     "note": "No digest is available yet.",
+                    "pending": pending,
                 }
-            ), 200
-        status_message = "Showing the most recent digest on file."
-        note = "The next digest will be generated on the last day of the current month."
-    else:
-        if digest.month_key != current_key:
+            )
+            return apply_cache_headers(response, etag)
+        if pending:
+            status_message = (
+                "This month's digest is being generated. Showing the most recent digest on file."
+            )
+        else:
             status_message = "Showing the most recent digest on file."
-        elif not is_last_day:
+            note = "The next digest will be generated on the last day of the current month."
+    else:
+        if not is_last_day:
             status_message = "Digest generated at the last month end."
 
+    # A finished digest never changes; the status text only changes with the date or
+    # when a new month's generation starts, so both are part of the validator.
+    max_age = 0 if pending else DIGEST_MAX_AGE_SECONDS
+    etag = make_etag("monthly_digest", digest.month_key, digest.generated_at, today, pending)
+    cached = not_modified_response(etag, digest.generated_at, max_age)
+    if cached:
+        return cached
+
     generated_at = digest.generated_at.isoformat() if digest.generated_at else None
     coverage = f"{digest.start_date.isoformat()} to {digest.end_date.isoformat()}"
 
-    return jsonify(
+    response = jsonify(
         {
             "title": f"Monthly digest: {digest.month_key}",
             "coverage": coverage,
@@ -68,8 +113,120 @@ def get_monthly_digest():
             "feedback_count": digest.feedback_count or 0,
             "positive_bullets": digest.positive_bullets or [],
             "actionable_bullets": digest.actionable_bullets or [],
+            "segments": digest.segments or {"category": [], "year_level": []},
             "status_message": status_message,
             "next_run": end_date.isoformat(),
             "note": note,
+            "pending": pending,
+        }
+    )
+    return apply_cache_headers(response, etag, digest.generated_at, max_age)
+
+
+@bp.route("/api/monthly_digest/preview", methods=["GET"])
+@auth_required()
+def get_monthly_digest_preview():
+    if g.user.role not in {"teacher", "stuco_admin"}:
+        return jsonify({"error": "Access is limited to teachers and STUCO admins."}), 403
+
+    today = date.today()
+    start_date, end_date = get_month_date_range(today)
+    rollups = get_daily_rollups(start_date, end_date)
+    return jsonify(
+        {
+            "month_key": month_key_for_date(today),
+            "coverage": f"{start_date.isoformat()} to {end_date.isoformat()}",
+            "feedback_count": sum(rollup.feedback_count or 0 for rollup in rollups),
+            "days": [
+                {
+                    "day": rollup.day.isoformat(),
+                    "feedback_count": rollup.feedback_count or 0,
+                    "positive_bullets": rollup.positive_bullets or [],
+                    "actionable_bullets": rollup.actionable_bullets or [],
+                    "generated_at": (
+                        rollup.generated_at.isoformat() if rollup.generated_at else None
+                    ),
+                }
+                for rollup in rollups
+            ],
+        }
+    ), 200
+
+
+@bp.route("/api/monthly_digests", methods=["GET"])
+@auth_required()
+def list_monthly_digests():
+    if g.user.role not in {"teacher", "stuco_admin"}:
+        return jsonify({"error": "Access is limited to teachers and STUCO admins."}), 403
+
+    try:
+        page = max(1, int(request.args.get("page", "1")))
+        per_page = max(1, min(int(request.args.get("per_page", "12")), 50))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers."}), 400
+
+    query = MonthlyDigest.query.filter(complete_digest_filter())
+    try:
+        from_month = parse_month_key(request.args["from"]) if request.args.get("from") else None
+        to_month = parse_month_key(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "from and to must look like YYYY-MM."}), 400
+    # Month keys are zero-padded, so string comparison is chronological.
+    if from_month:
+        query = query.filter(MonthlyDigest.month_key >= from_month.strftime("%Y-%m"))
+    if to_month:
+        query = query.filter(MonthlyDigest.month_key <= to_month.strftime("%Y-%m"))
+
+    total = query.count()
+    digests = (
+        query.order_by(MonthlyDigest.month_key.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return jsonify(
+        {
+            "items": [serialize_digest(digest) for digest in digests],
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "has_more": page * per_page < total,
         }
     ), 200
+
+
+@bp.route("/api/admin/digests/backfill", methods=["GET", "POST"])
+@auth_required(role="stuco_admin")
+def backfill_monthly_digests_route():
+    if request.method == "GET":
+        return jsonify({"active": is_backfill_running()})
+
+    data = request.get_json(silent=True) or {}
+    try:
+        start_month = parse_month_key(str(data.get("start_month", "")))
+        end_month = parse_month_key(str(data.get("end_month", "")))
+    except ValueError:
+        return jsonify({"error": "start_month and end_month must look like YYYY-MM."}), 400
+    if start_month > end_month:
+        return jsonify({"error": "start_month must not be after end_month."}), 400
+
+    plan = plan_digest_backfill(start_month, end_month)
+    if data.get("dry_run") or not plan["missing"]:
+        return jsonify({"dry_run": bool(data.get("dry_run")), **plan})
+    if is_backfill_running():
+        return jsonify({"error": "A digest backfill is already running."}), 409
+
+    workers = data.get("workers")
+    log_audit(
+        "digest_backfill_started",
+        "monthly_digest",
+        None,
+        details={"months": plan["missing"]},
+    )
+    db.session.commit()
+    start_backfill_thread(
+        current_app._get_current_object(),
+        plan["missing"],
+        workers=int(workers) if isinstance(workers, int) else None,
+    )
+    return jsonify({"message": "Digest backfill running in background.", **plan}), 202
@@ -1,12 +1,14 @@
 from collections import defaultdict
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, current_app, jsonify, request, g
 
 from ..auth import auth_required
 from ..extensions import db
 from ..models import Category, Feedback, FeedbackStatusHistory, SummaryJobQueue, Teacher
-from ..services.ai.moderation import run_toxicity_check
+from ..services.ai.moderation import RESCREEN_STATUS, run_toxicity_check
 from ..services.audit import record_feedback_status
+from ..services.dedup import find_near_duplicate, remember_fingerprint, simhash, target_key_for
+from ..services.feedback_queries import count_feedback, keyset_page, parse_page_args
 
 bp = Blueprint("student_api", __name__)
 
@@ -63,9 +65,27 @@ def submit_feedback():
         if not teacher_profile or not teacher_profile.is_active:
             return jsonify({"error": "Teacher not found."}), 400
 
+    fingerprint = simhash(feedback_text)
+    target_key = target_key_for(category_record.slug, teacher_id_int)
+    duplicate = find_near_duplicate(target_key, fingerprint, g.user.id)
+    if duplicate and duplicate.same_user:
+        return (
+            jsonify(
+                {
+                    "error": "You already submitted very similar feedback recently.",
+                    "duplicate_of": duplicate.feedback_id,
+                }
+            ),
+            409,
+        )
+    duplicate_of_id = duplicate.root_id if duplicate else None
+
     try:
-        screening = run_toxicity_check(feedback_text)
+        screening = run_toxicity_check(
+            feedback_text, deadline=current_app.config.get("MODERATION_TIMEOUT", 3)
+        )
         is_inappropriate = screening["is_inappropriate"]
+        needs_rescreen = screening.get("needs_rescreen", False)
 
         new_feedback = Feedback(
             submitted_by_user_id=g.user.id,
@@ -77,15 +97,20 @@ def submit_feedback():
             willing_to_share_name=willing_to_share_name,
             toxicity_score=screening["toxicity_score"],
             is_inappropriate=is_inappropriate,
+            screened_by=screening.get("screened_by"),
             status="New",
             is_summary_approved=False,
             rating_clarity=data.get("rating_clarity"),
             rating_pacing=data.get("rating_pacing"),
             rating_resources=data.get("rating_resources"),
             rating_support=data.get("rating_support"),
+            text_fingerprint=fingerprint,
+            duplicate_of_id=duplicate_of_id,
         )
 
-        if is_inappropriate:
+        if needs_rescreen:
+            new_feedback.status = RESCREEN_STATUS
+        elif is_inappropriate:
             new_feedback.status = "Screened - Escalation"
         else:
             new_feedback.status = "Approved"
@@ -95,7 +120,15 @@ def submit_feedback():
         db.session.flush()
         record_feedback_status(new_feedback.id, None, new_feedback.status, g.user.id)
 
-        if not is_inappropriate:
+        if needs_rescreen:
+            print(f"API: Deferring moderation of feedback {new_feedback.id} to background re-screen.")
+            job = SummaryJobQueue(
+                job_type="rescreen",
+                target_id=str(new_feedback.id),
+                feedback_id=new_feedback.id,
+            )
+            db.session.add(job)
+        elif not is_inappropriate and not duplicate_of_id:
             job_type = "teacher" if category_record.requires_teacher else "category"
             target_id = str(teacher_id_int) if job_type == "teacher" else category_record.slug
 
@@ -104,6 +137,11 @@ def submit_feedback():
                 job_type=job_type, target_id=target_id, feedback_id=new_feedback.id
             )
             db.session.add(job)
+        if not is_inappropriate:
+            # Applied to the in-process index only if the commit below succeeds.
+            remember_fingerprint(
+                target_key, new_feedback.id, g.user.id, fingerprint, root_id=duplicate_of_id
+            )
         db.session.commit()
 
         return (
@@ -112,6 +150,7 @@ def submit_feedback():
                     "message": f"Feedback submitted successfully. Status: {new_feedback.status}",
                     "id": new_feedback.id,
                     "status": new_feedback.status,
+                    "duplicate_of": duplicate_of_id,
                 }
             ),
             201,
@@ -127,11 +166,21 @@ def submit_feedback():
 @auth_required(role="student")
 def get_student_feedback():
     status_filter = request.args.get("status")
-    query = Feedback.query.filter_by(submitted_by_user_id=g.user.id)
-    if status_filter:
-        query = query.filter(Feedback.status == status_filter)
-
-    feedback_items = query.order_by(Feedback.id.desc()).all()
+    try:
+        cursor, limit = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "cursor and limit must be integers."}), 400
+    criteria = [Feedback.submitted_by_user_id == g.user.id]
+    if status_filter and status_filter != "all":
+        criteria.append(Feedback.status == status_filter)
+
+    query = (
+        db.session.query(Feedback, Teacher.name)
+        .outerjoin(Teacher, Teacher.id == Feedback.teacher_id)
+        .filter(*criteria)
+    )
+    rows, next_cursor = keyset_page(query, cursor, limit, id_of=lambda row: row[0].id)
+    feedback_items = [item for item, _ in rows]
     feedback_ids = [item.id for item in feedback_items]
     history_map = defaultdict(list)
     if feedback_ids:
@@ -152,11 +201,7 @@ def get_student_feedback():
                 }
             )
     results = []
-    for item in feedback_items:
-        teacher_name = None
-        if item.teacher_id:
-            teacher = db.session.get(Teacher, item.teacher_id)
-            teacher_name = teacher.name if teacher else None
+    for item, teacher_name in rows:
         results.append(
             {
                 "id": item.id,
@@ -169,4 +214,19 @@ def get_student_feedback():
                 "status_history": history_map.get(item.id, []),
             }
         )
-    return jsonify(results)
+    # Per-status counts for the dashboard stats, read from the (submitter, status) index.
+    status_counts = dict(
+        db.session.query(Feedback.status, db.func.count(Feedback.id))
+        .filter(Feedback.submitted_by_user_id == g.user.id)
+        .group_by(Feedback.status)
+        .all()
+    )
+    return jsonify(
+        {
+            "items": results,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "total": count_feedback(criteria),
+            "status_counts": status_counts,
+        }
+    )
@@ -3,11 +3,17 @@ from sqlalchemy import func
 
 from ..auth import auth_required
 from ..extensions import db
+from ..http_cache import apply_cache_headers, make_etag, not_modified_response
 from ..models import ClarificationRequest, Feedback, TeacherSummary
-from ..services.ai.summaries import get_summary_bullets, render_bullets_html
+from ..services.ai.summaries import build_summary_payload, get_summary_payload
 
 bp = Blueprint("teacher_api", __name__)
 
+NO_SUMMARY_PAYLOAD = build_summary_payload(
+    ["No summaries have been generated yet."],
+    ["Please check back after new feedback is submitted."],
+)
+
 
 @bp.route("/api/teacher/stats", methods=["GET"])
 @auth_required(role="teacher")
@@ -60,34 +66,35 @@ def get_teacher_stats():
 def get_teacher_holistic_summary():
     teacher_id = g.teacher_profile.id
     summary = db.session.get(TeacherSummary, teacher_id)
+    # The fingerprint covers rewrites that land within the same second as the last one.
+    etag = make_etag(
+        "teacher_summary",
+        teacher_id,
+        g.teacher_profile.name,
+        summary.last_updated if summary else None,
+        summary.input_fingerprint if summary else None,
+    )
+    last_modified = summary.last_updated if summary else None
+    cached = not_modified_response(etag, last_modified)
+    if cached:
+        return cached
     if not summary:
-        positive_bullets = ["No summaries have been generated yet."]
-        actionable_bullets = ["Please check back after new feedback is submitted."]
-        return jsonify(
-            {
-                "teacher_name": g.teacher_profile.name,
-                "positive_bullets": positive_bullets,
-                "actionable_bullets": actionable_bullets,
-                "positive_summary": render_bullets_html(positive_bullets),
-                "actionable_summary": render_bullets_html(actionable_bullets),
-            }
-        )
-    positive_bullets = get_summary_bullets(summary, True)
-    actionable_bullets = get_summary_bullets(summary, False)
-    if not positive_bullets:
-        positive_bullets = ["No summaries have been generated yet."]
-    if not actionable_bullets:
-        actionable_bullets = ["Please check back after new feedback is submitted."]
-    return jsonify(
+        response = jsonify({"teacher_name": g.teacher_profile.name, **NO_SUMMARY_PAYLOAD})
+        return apply_cache_headers(response, etag)
+
+    payload = dict(get_summary_payload(summary))
+    for side in ("positive", "actionable"):
+        if not payload[f"{side}_bullets"]:
+            payload[f"{side}_bullets"] = NO_SUMMARY_PAYLOAD[f"{side}_bullets"]
+            payload[f"{side}_summary"] = NO_SUMMARY_PAYLOAD[f"{side}_summary"]
+    response = jsonify(
         {
             "teacher_name": g.teacher_profile.name,
-            "positive_bullets": positive_bullets,
-            "actionable_bullets": actionable_bullets,
-            "positive_summary": render_bullets_html(positive_bullets),
-            "actionable_summary": render_bullets_html(actionable_bullets),
+            **payload,
             "last_updated": summary.last_updated.isoformat(),
         }
     )
+    return apply_cache_headers(response, etag, last_modified)
 
 
 @bp.route("/api/clarification_request", methods=["POST"])
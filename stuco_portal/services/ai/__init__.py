@@ -1,13 +1,17 @@
-from .moderation import run_toxicity_check
+from .moderation import RESCREEN_STATUS, rescreen_feedback, run_toxicity_check
 from .providers import get_provider
 from .summaries import (
+    backfill_summary_payloads,
+    build_summary_payload,
     extract_bullets_from_html,
     generate_mock_summary,
     get_summary_bullets,
+    get_summary_payload,
     get_month_date_range,
     is_last_day_of_month,
     month_key_for_date,
     render_bullets_html,
+    run_category_summaries,
     run_category_summary,
     run_monthly_digest,
     run_teacher_summary,
@@ -16,13 +20,19 @@ from .summaries import (
 __all__ = [
     "get_provider",
     "run_toxicity_check",
+    "rescreen_feedback",
+    "RESCREEN_STATUS",
     "run_teacher_summary",
     "run_category_summary",
+    "run_category_summaries",
     "run_monthly_digest",
     "extract_bullets_from_html",
     "render_bullets_html",
     "generate_mock_summary",
     "get_summary_bullets",
+    "get_summary_payload",
+    "build_summary_payload",
+    "backfill_summary_payloads",
     "get_month_date_range",
     "is_last_day_of_month",
     "month_key_for_date",
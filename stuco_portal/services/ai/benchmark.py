@@ -0,0 +1,141 @@
+import random
+import time
+
+import requests
+
+from .clustering import clustered_prompt_text
+from .extractive import extractive_summary
+from .providers import AIProviderError, get_provider
+from .summaries import TEACHER_SUMMARY_PROMPT
+from .summary_output import parse_bullet_summary
+
+# Each theme has a keyword the bullets must mention to count as covered.
+BENCHMARK_THEMES = [
+    (
+        "homework",
+        "The homework is really helpful for practicing what we learned.",
+        "There is too much homework on weekends, please spread it out.",
+    ),
+    (
+        "examples",
+        "The examples in class are great and make the topic clear.",
+        "We need more worked examples before the test.",
+    ),
+    (
+        "feedback",
+        "I appreciate the detailed feedback on every assignment.",
+        "Feedback on essays comes back too late to be useful.",
+    ),
+    (
+        "pace",
+        "The pace of the lessons feels good and easy to follow.",
+        "The pace is too fast and hard to keep up with.",
+    ),
+    (
+        "questions",
+        "Thanks for always answering our questions patiently.",
+        "Questions at the end get cut off, could we have more time for them?",
+    ),
+    (
+        "slides",
+        "The slides are well organized and useful for revision.",
+        "The slides are confusing and should be shared before class.",
+    ),
+]
+FILLER_SENTENCES = [
+    "Overall this term was okay.",
+    "I sit near the back of the room.",
+    "We had a substitute for two weeks in October.",
+]
+
+
+def build_synthetic_corpus(targets=10, entries_per_target=40, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(targets):
+        themes = rng.sample(BENCHMARK_THEMES, 4)
+        # Each theme shows up on one side per target, so recall and side accuracy are well defined.
+        expected = {keyword: rng.choice(("positive", "actionable")) for keyword, _, _ in themes}
+        texts = []
+        for _ in range(entries_per_target):
+            keyword, positive, actionable = rng.choice(themes)
+            sentence = positive if expected[keyword] == "positive" else actionable
+            parts = [sentence]
+            if rng.random() < 0.4:
+                parts.append(rng.choice(FILLER_SENTENCES))
+            rng.shuffle(parts)
+            texts.append(" ".join(parts))
+        corpus.append({"texts": texts, "expected": expected})
+    return corpus
+
+
+def score_summary(expected, positive_bullets, actionable_bullets):
+    bullets = {"positive": positive_bullets, "actionable": actionable_bullets}
+    covered = sum(
+        1
+        for keyword, side in expected.items()
+        if any(keyword in bullet.lower() for bullet in bullets[side])
+    )
+    placed = correct = 0
+    for side, side_bullets in bullets.items():
+        for bullet in side_bullets:
+            for keyword, expected_side in expected.items():
+                if keyword in bullet.lower():
+                    placed += 1
+                    correct += expected_side == side
+    return covered, len(expected), correct, placed
+
+
+def _llm_summary(texts, provider):
+    messages = [
+        {"role": "system", "content": TEACHER_SUMMARY_PROMPT},
+        {
+            "role": "user",
+            "content": f"Here is the collected feedback:\n\n{clustered_prompt_text(texts)}",
+        },
+    ]
+    content = provider.chat(messages, response_format={"type": "json_object"})
+    return parse_bullet_summary(content, provider)
+
+
+def _run_engine(corpus, summarize):
+    covered = themes = correct = placed = failures = 0
+    elapsed = 0.0
+    for target in corpus:
+        started = time.perf_counter()
+        try:
+            positive_bullets, actionable_bullets = summarize(target["texts"])
+        except (AIProviderError, requests.RequestException) as exc:
+            failures += 1
+            print(f"BENCHMARK: Provider call failed: {exc}")
+            continue
+        finally:
+            elapsed += time.perf_counter() - started
+        result = score_summary(target["expected"], positive_bullets, actionable_bullets)
+        covered += result[0]
+        themes += result[1]
+        correct += result[2]
+        placed += result[3]
+    return {
+        "targets": len(corpus),
+        "failures": failures,
+        "ms_per_target": round(elapsed * 1000.0 / max(len(corpus), 1), 2),
+        "theme_recall": round(covered / themes, 3) if themes else None,
+        "side_accuracy": round(correct / placed, 3) if placed else None,
+    }
+
+
+def benchmark_summary_engines(targets=10, entries_per_target=40, seed=7, max_bullets=5, provider=None):
+    corpus = build_synthetic_corpus(targets, entries_per_target, seed)
+    results = {
+        "corpus": {"targets": targets, "entries_per_target": entries_per_target, "seed": seed},
+        "local": _run_engine(corpus, lambda texts: extractive_summary(texts, max_bullets)),
+    }
+    provider = provider or get_provider()
+    if provider.is_configured():
+        results["llm"] = _run_engine(corpus, lambda texts: _llm_summary(texts, provider))
+        results["llm"]["provider"] = provider.name
+        results["llm"]["model"] = provider.model
+    else:
+        results["llm"] = None
+    return results
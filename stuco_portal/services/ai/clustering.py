@@ -0,0 +1,127 @@
+import math
+import re
+from collections import Counter, namedtuple
+
+from flask import current_app
+
+from ..metrics import increment_metric
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOKEN_REGEX = re.compile(r"[a-z0-9']+")
+STOP_WORDS = frozenset(
+    {
+        "a", "about", "all", "also", "am", "an", "and", "are", "as", "at", "be", "been",
+        "but", "by", "can", "could", "do", "does", "for", "from", "get", "had", "has",
+        "have", "he", "her", "his", "i", "i'm", "if", "in", "is", "it", "it's", "its",
+        "just", "me", "my", "of", "on", "or", "our", "really", "she", "so", "that", "the",
+        "their", "them", "there", "they", "this", "to", "us", "very", "was", "we", "were",
+        "what", "when", "which", "will", "with", "would", "you", "your",
+    }
+)
+
+CLUSTER_COUNT_RULES = (
+    " Entries ending in '(xN similar entries)' stand for N near-identical submissions; "
+    "weigh those points accordingly."
+)
+
+FeedbackCluster = namedtuple("FeedbackCluster", ["representative", "count"])
+
+
+def _tokenize(text):
+    return [
+        token
+        for token in TOKEN_REGEX.findall((text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def tfidf_vectors(texts):
+    token_lists = [_tokenize(text) for text in texts]
+    document_frequency = Counter()
+    for tokens in token_lists:
+        document_frequency.update(set(tokens))
+    total = len(texts)
+    idf = {
+        term: math.log((1 + total) / (1 + count)) + 1.0
+        for term, count in document_frequency.items()
+    }
+
+    vectors = []
+    for tokens in token_lists:
+        weights = {
+            term: (1.0 + math.log(count)) * idf[term] for term, count in Counter(tokens).items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        vectors.append({term: weight / norm for term, weight in weights.items()} if norm else {})
+    return vectors, sorted(document_frequency)
+
+
+def similarity_matrix(vectors, vocabulary):
+    if np is not None:
+        column = {term: index for index, term in enumerate(vocabulary)}
+        matrix = np.zeros((len(vectors), len(vocabulary)))
+        for row, vector in enumerate(vectors):
+            for term, weight in vector.items():
+                matrix[row, column[term]] = weight
+        return (matrix @ matrix.T).tolist()
+
+    similarities = [[0.0] * len(vectors) for _ in vectors]
+    for i, left in enumerate(vectors):
+        similarities[i][i] = 1.0 if left else 0.0
+        for j in range(i + 1, len(vectors)):
+            right = vectors[j]
+            if len(right) < len(left):
+                small, large = right, left
+            else:
+                small, large = left, right
+            score = sum(weight * large.get(term, 0.0) for term, weight in small.items())
+            similarities[i][j] = similarities[j][i] = score
+    return similarities
+
+
+def cluster_feedback(texts, threshold):
+    texts = list(texts)
+    if threshold <= 0 or len(texts) < 2:
+        return [FeedbackCluster(text, 1) for text in texts]
+
+    vectors, vocabulary = tfidf_vectors(texts)
+    similarities = similarity_matrix(vectors, vocabulary)
+
+    # Greedy leader clustering in input order keeps the output stable for the chunk cache.
+    clusters = []
+    for index in range(len(texts)):
+        best_cluster, best_score = None, threshold
+        for members in clusters:
+            score = similarities[index][members[0]]
+            if score >= best_score:
+                best_cluster, best_score = members, score
+        if best_cluster is None:
+            clusters.append([index])
+        else:
+            best_cluster.append(index)
+
+    result = []
+    for members in clusters:
+        # The medoid (highest total similarity to the rest) reads most like the group.
+        representative = max(
+            members, key=lambda member: sum(similarities[member][other] for other in members)
+        )
+        result.append(FeedbackCluster(texts[representative], len(members)))
+    return result
+
+
+def clustered_prompt_text(texts):
+    texts = list(texts)
+    clusters = cluster_feedback(texts, current_app.config.get("SUMMARY_CLUSTER_THRESHOLD", 0.7))
+    increment_metric("summary_entries_clustered", len(texts) - len(clusters))
+    lines = []
+    for cluster in clusters:
+        if cluster.count > 1:
+            lines.append(f"{cluster.representative} (x{cluster.count} similar entries)")
+        else:
+            lines.append(cluster.representative)
+    return "\n---\n".join(lines)
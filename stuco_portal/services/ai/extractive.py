@@ -0,0 +1,174 @@
+import re
+
+from .clustering import np, similarity_matrix, tfidf_vectors
+
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_REGEX = re.compile(r"[a-z']+")
+MAX_SENTENCES = 400
+MIN_SENTENCE_WORDS = 3
+DAMPING = 0.85
+ITERATIONS = 30
+REDUNDANCY_THRESHOLD = 0.6
+SUPPORT_THRESHOLD = 0.35
+HONORIFICS = ("mr", "mrs", "ms", "miss", "mx", "dr", "sir", "madam", "coach")
+# Bullets quote students verbatim, so personal references are redacted before splitting,
+# matching the LLM prompts' "avoid naming individual students or teachers".
+HONORIFIC_REGEX = re.compile(
+    r"\b(?:" + "|".join(HONORIFICS) + r")\.?\s+[a-z][\w'-]*", re.IGNORECASE
+)
+# Placeholder account names ("Admin User") should not redact ordinary words.
+NON_NAME_PARTS = frozenset(HONORIFICS) | {"admin", "student", "teacher", "user", "staff"}
+EMAIL_REGEX = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+
+POSITIVE_CUES = frozenset(
+    {
+        "amazing", "appreciate", "appreciated", "awesome", "best", "clear", "clearly",
+        "enjoy", "enjoyed", "engaging", "excellent", "fun", "good", "great", "helpful",
+        "helps", "interesting", "kind", "love", "loved", "nice", "patient", "supportive",
+        "thank", "thanks", "useful", "well", "wonderful",
+    }
+)
+ACTIONABLE_CUES = frozenset(
+    {
+        "boring", "bad", "broken", "can't", "cannot", "confusing", "could", "didn't",
+        "difficult", "dirty", "don't", "fix", "hard", "harder", "improve", "isn't", "late",
+        "less", "more", "need", "needs", "never", "not", "please", "should", "slow", "stressful",
+        "too", "unclear", "unfair", "wish", "worse", "wouldn't",
+    }
+)
+
+
+def build_name_regex(names):
+    # Capitalized name parts (3+ letters) of known teachers and users, honorifics stripped.
+    tokens = set()
+    for name in names:
+        for part in re.findall(r"[\w'-]+", name or ""):
+            if len(part) >= 3 and part[0].isupper() and part.lower() not in NON_NAME_PARTS:
+                tokens.add(part)
+    if not tokens:
+        return None
+    alternatives = "|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True))
+    return re.compile(r"\b(?:" + alternatives + r")\b")
+
+
+def redact_personal_references(sentence, name_regex=None):
+    sentence = EMAIL_REGEX.sub("[email]", sentence)
+    sentence = HONORIFIC_REGEX.sub("the teacher", sentence)
+    if name_regex is not None:
+        sentence = name_regex.sub("[name]", sentence)
+    return sentence
+
+
+def split_sentences(texts, name_regex=None):
+    # Longer histories are sampled evenly so early and recent feedback are both ranked:
+    # every stride-th sentence is kept, and the stride doubles whenever the sample grows
+    # past twice MAX_SENTENCES, so memory stays bounded however long the stream is.
+    sentences = []
+    stride = 1
+    total = 0
+    for text in texts:
+        text = redact_personal_references(text or "", name_regex)
+        for sentence in SENTENCE_SPLIT_REGEX.split(text):
+            sentence = sentence.strip(" -\t")
+            if len(WORD_REGEX.findall(sentence.lower())) < MIN_SENTENCE_WORDS:
+                continue
+            if total % stride == 0:
+                sentences.append(sentence)
+            total += 1
+            if len(sentences) > 2 * MAX_SENTENCES:
+                sentences = sentences[::2]
+                stride *= 2
+    if len(sentences) > MAX_SENTENCES:
+        step = len(sentences) / MAX_SENTENCES
+        sentences = [sentences[int(index * step)] for index in range(MAX_SENTENCES)]
+    if total > MAX_SENTENCES:
+        print(f"INFO: Extractive summary ranked an even sample of {len(sentences)} of {total} sentences.")
+    return sentences
+
+
+def classify_sentence(sentence):
+    words = WORD_REGEX.findall(sentence.lower())
+    positive = sum(1 for word in words if word in POSITIVE_CUES)
+    actionable = sum(1 for word in words if word in ACTIONABLE_CUES)
+    if actionable and actionable >= positive:
+        return "actionable"
+    if positive:
+        return "positive"
+    return None
+
+
+def textrank_scores(similarities):
+    count = len(similarities)
+    if np is not None:
+        matrix = np.array(similarities)
+        np.fill_diagonal(matrix, 0.0)
+        row_sums = matrix.sum(axis=1, keepdims=True)
+        transition = np.divide(matrix, row_sums, out=np.zeros_like(matrix), where=row_sums > 0)
+        scores = np.full(count, 1.0 / count)
+        for _ in range(ITERATIONS):
+            scores = (1 - DAMPING) / count + DAMPING * transition.T.dot(scores)
+        return scores.tolist()
+
+    neighbors = []
+    for i, row in enumerate(similarities):
+        edges = [(j, weight) for j, weight in enumerate(row) if j != i and weight > 0]
+        total = sum(weight for _, weight in edges)
+        neighbors.append([(j, weight / total) for j, weight in edges])
+    scores = [1.0 / count] * count
+    for _ in range(ITERATIONS):
+        incoming = [0.0] * count
+        for i, edges in enumerate(neighbors):
+            for j, weight in edges:
+                incoming[j] += weight * scores[i]
+        scores = [(1 - DAMPING) / count + DAMPING * value for value in incoming]
+    return scores
+
+
+def _format_bullet(sentence, support):
+    bullet = sentence[0].upper() + sentence[1:]
+    if bullet[-1] not in ".!?":
+        bullet += "."
+    if support > 1:
+        bullet += f" ({support} mentions)"
+    return bullet
+
+
+def _select(indices, scores, similarities, max_bullets):
+    ranked = sorted(indices, key=lambda index: scores[index], reverse=True)
+    chosen = []
+    for index in ranked:
+        if any(similarities[index][other] >= REDUNDANCY_THRESHOLD for other in chosen):
+            continue
+        chosen.append(index)
+        if len(chosen) == max_bullets:
+            break
+    return chosen
+
+
+def extractive_summary(texts, max_bullets=5, name_regex=None):
+    sentences = split_sentences(texts, name_regex)
+    if not sentences:
+        return [], []
+    vectors, vocabulary = tfidf_vectors(sentences)
+    similarities = similarity_matrix(vectors, vocabulary)
+    scores = textrank_scores(similarities)
+
+    sides = {"positive": [], "actionable": []}
+    for index, sentence in enumerate(sentences):
+        side = classify_sentence(sentence)
+        if side:
+            sides[side].append(index)
+
+    results = []
+    for side in ("positive", "actionable"):
+        members = sides[side]
+        bullets = []
+        for index in _select(members, scores, similarities, max_bullets):
+            support = sum(
+                1
+                for other in members
+                if other == index or similarities[index][other] >= SUPPORT_THRESHOLD
+            )
+            bullets.append(_format_bullet(sentences[index], support))
+        results.append(bullets)
+    return results[0], results[1]
@@ -0,0 +1,223 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import chain, islice
+
+from flask import current_app
+
+from ...extensions import db
+from ...models import SummaryChunkCache
+from ..feedback_queries import chunked
+from .clustering import CLUSTER_COUNT_RULES, clustered_prompt_text
+from .summary_output import parse_bullet_summary
+
+MAP_PROMPT_VERSION = "map-v2"
+REDUCE_FAN_IN = 8
+
+MAP_SYSTEM_PROMPT = (
+    "You are condensing ONE batch of raw, anonymous student feedback into intermediate notes "
+    "that will later be merged with notes from other batches. Context: {context}. "
+    "Your response MUST be a single, valid JSON object with exactly two keys: "
+    "'positive_highlights' and 'actionable_growth', each a list of short bullet strings. "
+    "Keep every distinct point, merge only true repeats, and note in parentheses how many "
+    "entries raised a point when more than one did. Do not use markdown."
+) + CLUSTER_COUNT_RULES
+
+INTERMEDIATE_REDUCE_PROMPT = (
+    "You are merging intermediate notes, each summarizing a batch of raw, anonymous student "
+    "feedback. Context: {context}. Your response MUST be a single, valid JSON object with exactly "
+    "two keys: 'positive_highlights' and 'actionable_growth', each a list of short bullet strings. "
+    "Consolidate overlapping points, keep every distinct point, and keep the counts in "
+    "parentheses up to date. Do not use markdown."
+)
+
+FINAL_REDUCE_RULES = (
+    " The input consists of intermediate notes, each summarizing a batch of the collected "
+    "feedback, rather than the raw feedback itself. Counts in parentheses show how many entries "
+    "raised a point; weigh points accordingly."
+)
+
+
+def _format_partials(partials):
+    blocks = []
+    for index, (positive, actionable) in enumerate(partials, start=1):
+        lines = [f"Batch {index} positive:"] + [f"- {item}" for item in positive]
+        lines += [f"Batch {index} actionable:"] + [f"- {item}" for item in actionable]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def _entry_hash(entry):
+    return int.from_bytes(hashlib.blake2b(entry.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def content_defined_chunks(entries, chunk_size):
+    # Boundaries depend on entry content, not position: a chunk ends after an entry whose
+    # hash picks it once the chunk holds chunk_size // 2 entries (averaging chunk_size,
+    # capped at twice that). Deleting or editing one entry only changes the chunks around
+    # it, so the rest keep their cache keys.
+    min_size = max(1, chunk_size // 2)
+    divisor = chunk_size - min_size + 1
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= 2 * chunk_size or (
+            len(chunk) >= min_size and _entry_hash(entry) % divisor == 0
+        ):
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _chunk_cache_key(provider, context, chunk):
+    digest = hashlib.sha256()
+    threshold = str(current_app.config.get("SUMMARY_CLUSTER_THRESHOLD", 0.7))
+    for part in (MAP_PROMPT_VERSION, provider.name, provider.model or "", context, threshold):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    for entry in chunk:
+        digest.update(entry.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def _call(provider, system_prompt, user_prompt):
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    content = provider.chat(messages, response_format={"type": "json_object"})
+    return parse_bullet_summary(content, provider)
+
+
+def _map_window(window, provider, context, system_prompt, pool, pending, used):
+    keys = [_chunk_cache_key(provider, context, chunk) for chunk in window]
+    cached = {
+        row.cache_key: (row.positive_bullets or [], row.actionable_bullets or [])
+        for row in db.session.query(
+            SummaryChunkCache.cache_key,
+            SummaryChunkCache.positive_bullets,
+            SummaryChunkCache.actionable_bullets,
+        ).filter(SummaryChunkCache.cache_key.in_(set(keys)))
+    }
+    used.update(cached)
+    missing = {}
+    for key, chunk in zip(keys, window):
+        if key not in cached and key not in missing:
+            missing[key] = chunk
+
+    if missing:
+        # Prompts are built here: clustering reads app config, which worker threads lack.
+        prompts = [clustered_prompt_text(chunk) for chunk in missing.values()]
+        results = pool.map(lambda prompt: _call(provider, system_prompt, prompt), prompts)
+        for key, (positive, actionable) in zip(missing.keys(), results):
+            cached[key] = (positive, actionable)
+            pending.append(
+                SummaryChunkCache(
+                    cache_key=key, positive_bullets=positive, actionable_bullets=actionable
+                )
+            )
+    return [cached[key] for key in keys], len(missing)
+
+
+def _map_chunks(chunks, provider, context, max_workers):
+    # Chunks are consumed a window at a time, so only max_workers chunks of raw text
+    # are held in memory however large the input stream is.
+    system_prompt = MAP_SYSTEM_PROMPT.format(context=context)
+    partials = []
+    pending = []
+    used = set()
+    summarized = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for window in chunked(chunks, max_workers):
+                window_partials, window_missing = _map_window(
+                    window, provider, context, system_prompt, pool, pending, used
+                )
+                partials.extend(window_partials)
+                summarized += window_missing
+    finally:
+        # Written once the source stream is done, so a failed reduce (or a failed later
+        # window) never repeats the map calls that already succeeded.
+        if pending:
+            for row in pending:
+                db.session.merge(row)
+        if used:
+            # Hits stay fresh; entries nothing reads any more age out in prune_summary_chunk_cache.
+            now = datetime.utcnow()
+            for keys in chunked(sorted(used), 500):
+                SummaryChunkCache.query.filter(SummaryChunkCache.cache_key.in_(keys)).update(
+                    {SummaryChunkCache.last_used_at: now}, synchronize_session=False
+                )
+        if pending or used:
+            db.session.commit()
+
+    print(
+        f"INFO: Map-reduce over {len(partials)} chunks ({len(partials) - summarized} cached, "
+        f"{summarized} summarized)."
+    )
+    return partials
+
+
+def prune_summary_chunk_cache(max_age_days=None):
+    if max_age_days is None:
+        max_age_days = current_app.config.get("SUMMARY_CHUNK_CACHE_DAYS", 30)
+    if max_age_days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    deleted = SummaryChunkCache.query.filter(
+        db.func.coalesce(SummaryChunkCache.last_used_at, SummaryChunkCache.created_at) < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        print(f"INFO: Pruned {deleted} unused summary chunk cache entries.")
+    return deleted
+
+
+def map_reduce_summary(feedback_entries, provider, system_prompt, context):
+    chunk_size = max(1, current_app.config.get("SUMMARY_CHUNK_SIZE", 40))
+    max_workers = max(1, current_app.config.get("SUMMARY_MAP_WORKERS", 4))
+    # feedback_entries may be any iterable, including a streamed query.
+    chunks = content_defined_chunks(feedback_entries, chunk_size)
+    partials = _map_chunks(chunks, provider, context, max_workers)
+    return reduce_partial_summaries(partials, provider, system_prompt, context)
+
+
+def summarize_feedback_texts(feedback_entries, provider, system_prompt, context):
+    # One call for small inputs, map-reduce once the entries exceed a chunk.
+    chunk_size = max(1, current_app.config.get("SUMMARY_CHUNK_SIZE", 40))
+    iterator = iter(feedback_entries)
+    head = list(islice(iterator, chunk_size + 1))
+    if len(head) > chunk_size:
+        return map_reduce_summary(chain(head, iterator), provider, system_prompt, context)
+    return _call(
+        provider,
+        system_prompt,
+        f"Feedback entries ({context}):\n{clustered_prompt_text(head)}",
+    )
+
+
+def reduce_partial_summaries(partials, provider, system_prompt, context):
+    # partials: (positive_bullets, actionable_bullets) pairs, e.g. map outputs or daily rollups.
+    max_workers = max(1, current_app.config.get("SUMMARY_MAP_WORKERS", 4))
+    reduce_prompt = INTERMEDIATE_REDUCE_PROMPT.format(context=context)
+    while len(partials) > REDUCE_FAN_IN:
+        groups = [
+            partials[index : index + REDUCE_FAN_IN]
+            for index in range(0, len(partials), REDUCE_FAN_IN)
+        ]
+        print(f"INFO: Reduce round merging {len(partials)} partial summaries.")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            partials = list(
+                pool.map(
+                    lambda group: _call(provider, reduce_prompt, _format_partials(group)),
+                    groups,
+                )
+            )
+
+    return _call(
+        provider,
+        system_prompt + FINAL_REDUCE_RULES,
+        "Intermediate notes:\n\n" + _format_partials(partials),
+    )
@@ -1,7 +1,25 @@
+import json
 import re
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
+import requests
+
+from ...extensions import db
+from ...models import Feedback, SummaryJobQueue
+from ..audit import record_feedback_status
+from ..dedup import reroot_duplicates
 from .providers import AIProviderError, get_provider, parse_json_response
 
+RESCREEN_STATUS = "Pending Re-screen"
+RESCREEN_NOTE = "Background re-screen"
+# Calls that overrun their deadline keep running here until the socket timeout ends them.
+DEADLINE_SCREEN_WORKERS = 8
+# Background re-screens that cannot reach the provider retry with exponential backoff.
+RESCREEN_BACKOFF_SECONDS = 30
+RESCREEN_BACKOFF_MAX_SECONDS = 3600
 
 MOCK_TOXICITY_REGEXES = [
     re.compile(pattern)
@@ -24,44 +42,248 @@ MOCK_TOXICITY_REGEXES = [
 ]
 
 
+MOCK_SCREENER = "mock"
+FAILSAFE_SCREENER = "failsafe"
+
+MODERATION_SYSTEM_PROMPT = (
+    "You are an extremely strict content moderation expert for a school feedback system. "
+    "Your job is to protect teachers from ANY personal insults, profanity, or abusive language. "
+    "Your response MUST be in a single, valid JSON object format with two keys: 'is_inappropriate' "
+    "(boolean) and 'toxicity_score' (float 0.0-1.0). "
+    "CRITICAL: Set 'is_inappropriate' to true if the text contains any profanity, personal insults, "
+    "bullying, or threats. Be extremely sensitive and err on the side of caution."
+)
+
+BATCH_MODERATION_SYSTEM_PROMPT = (
+    "You are an extremely strict content moderation expert for a school feedback system. "
+    "Your job is to protect teachers from ANY personal insults, profanity, or abusive language. "
+    "You will receive a JSON array of objects with 'id' and 'text'. Your response MUST be a single, "
+    "valid JSON object with one key 'results': an array containing, for EVERY input id, an object "
+    "with 'id', 'is_inappropriate' (boolean) and 'toxicity_score' (float 0.0-1.0). "
+    "CRITICAL: Set 'is_inappropriate' to true if the text contains any profanity, personal insults, "
+    "bullying, or threats. Be extremely sensitive and err on the side of caution."
+)
+
+
 def run_mock_toxicity_check(text_input):
     text_lower = text_input.lower()
     is_inappropriate = any(regex.search(text_lower) for regex in MOCK_TOXICITY_REGEXES)
     toxicity_score = 0.95 if is_inappropriate else 0.0
-    return {"toxicity_score": toxicity_score, "is_inappropriate": is_inappropriate}
+    return {
+        "toxicity_score": toxicity_score,
+        "is_inappropriate": is_inappropriate,
+        "screened_by": MOCK_SCREENER,
+    }
 
 
-def run_toxicity_check(text_input, provider=None):
-    provider = provider or get_provider()
+def _verdict_from_result(result, screened_by):
+    is_inappropriate = bool(result.get("is_inappropriate", False))
+    toxicity_score = float(result.get("toxicity_score", 0.0))
+    if is_inappropriate and toxicity_score < 0.8:
+        toxicity_score = 0.95
+    return {
+        "toxicity_score": toxicity_score,
+        "is_inappropriate": is_inappropriate,
+        "screened_by": screened_by,
+    }
+
+
+def failsafe_verdict():
+    return {"toxicity_score": 1.0, "is_inappropriate": True, "screened_by": FAILSAFE_SCREENER}
+
+
+def _screen_single(text_input, provider):
+    # Raises requests.RequestException on transport failures, AIProviderError/ValueError on
+    # unusable responses; callers decide how to fail.
+    messages = [
+        {"role": "system", "content": MODERATION_SYSTEM_PROMPT},
+        {"role": "user", "content": text_input},
+    ]
+    content = provider.chat(
+        messages,
+        temperature=0.0,
+        max_tokens=120,
+        response_format={"type": "json_object"},
+    )
+    return _verdict_from_result(parse_json_response(content), provider.name)
+
+
+_deadline_pool = None
+_deadline_pool_lock = threading.Lock()
+# One slot per pool worker, so a submission never waits in the executor queue.
+_deadline_slots = threading.BoundedSemaphore(DEADLINE_SCREEN_WORKERS)
+
+
+def _deadline_executor():
+    global _deadline_pool
+    with _deadline_pool_lock:
+        if _deadline_pool is None:
+            _deadline_pool = ThreadPoolExecutor(
+                max_workers=DEADLINE_SCREEN_WORKERS, thread_name_prefix="moderation"
+            )
+    return _deadline_pool
+
+
+def _deferred_verdict(deadline, reason):
+    print(f"WARNING: Toxicity check unavailable within {deadline}s: {reason}. Deferring to re-screen.")
+    return {
+        "toxicity_score": 0.0,
+        "is_inappropriate": False,
+        "screened_by": None,
+        "needs_rescreen": True,
+    }
+
+
+def _screen_within_deadline(text_input, provider, deadline):
+    # The provider timeout only bounds each socket read; the future bounds the whole call
+    # (connect, a slowly trickled response, retries) by wall-clock time.
+    if not _deadline_slots.acquire(blocking=False):
+        return _deferred_verdict(deadline, "all moderation workers busy")
+    try:
+        future = _deadline_executor().submit(_screen_single, text_input, provider)
+    except Exception:
+        _deadline_slots.release()
+        raise
+    future.add_done_callback(lambda _: _deadline_slots.release())
+    try:
+        return future.result(timeout=deadline)
+    except FutureTimeoutError:
+        # Drops a call that never started; one already running ends at the socket timeout.
+        future.cancel()
+        return _deferred_verdict(deadline, "timed out")
+    except requests.RequestException as exc:
+        return _deferred_verdict(deadline, exc)
+    except (AIProviderError, ValueError) as exc:
+        print(f"CRITICAL TOXICITY CHECK ERROR: {exc}. Defaulting to 'inappropriate'.")
+        return failsafe_verdict()
+
+
+def run_toxicity_check(text_input, provider=None, deadline=None):
+    provider = provider or get_provider(timeout=deadline)
     if not provider.is_configured():
         print("WARNING: AI provider key missing. Using mock toxicity checks.")
         return run_mock_toxicity_check(text_input)
+    if deadline is not None:
+        return _screen_within_deadline(text_input, provider, deadline)
 
-    system_prompt = (
-        "You are an extremely strict content moderation expert for a school feedback system. "
-        "Your job is to protect teachers from ANY personal insults, profanity, or abusive language. "
-        "Your response MUST be in a single, valid JSON object format with two keys: 'is_inappropriate' "
-        "(boolean) and 'toxicity_score' (float 0.0-1.0). "
-        "CRITICAL: Set 'is_inappropriate' to true if the text contains any profanity, personal insults, "
-        "bullying, or threats. Be extremely sensitive and err on the side of caution."
-    )
+    try:
+        return _screen_single(text_input, provider)
+    except (requests.RequestException, AIProviderError, ValueError) as exc:
+        print(f"CRITICAL TOXICITY CHECK ERROR: {exc}. Defaulting to 'inappropriate'.")
+        return failsafe_verdict()
+
+
+def run_toxicity_batch(items, provider=None):
+    """Screen ``[(id, text), ...]`` in one provider call; returns ``{id: verdict}``.
+
+    Ids missing from (or malformed in) the batched response are screened individually; an
+    item whose single check is also unusable gets the failsafe verdict. Transport errors
+    propagate so bulk callers can retry the whole batch later.
+    """
+    provider = provider or get_provider()
+    if not provider.is_configured():
+        raise AIProviderError("AI provider key missing.")
+    if not items:
+        return {}
+
+    payload = [{"id": item_id, "text": text} for item_id, text in items]
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": text_input},
+        {"role": "system", "content": BATCH_MODERATION_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(payload)},
     ]
+    verdicts = {}
     try:
         content = provider.chat(
             messages,
             temperature=0.0,
-            max_tokens=120,
+            max_tokens=60 + 40 * len(items),
             response_format={"type": "json_object"},
         )
-        result = parse_json_response(content)
-        is_inappropriate = bool(result.get("is_inappropriate", False))
-        toxicity_score = float(result.get("toxicity_score", 0.0))
-        if is_inappropriate and toxicity_score < 0.8:
-            toxicity_score = 0.95
-        return {"toxicity_score": toxicity_score, "is_inappropriate": is_inappropriate}
-    except (AIProviderError, ValueError) as exc:
-        print(f"CRITICAL TOXICITY CHECK ERROR: {exc}. Defaulting to 'inappropriate'.")
-        return {"toxicity_score": 1.0, "is_inappropriate": True}
+        results = parse_json_response(content).get("results") or []
+        expected_ids = {item_id for item_id, _ in items}
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            try:
+                result_id = int(result.get("id"))
+                verdict = _verdict_from_result(result, provider.name)
+            except (TypeError, ValueError):
+                continue
+            if result_id in expected_ids:
+                verdicts[result_id] = verdict
+    except (AIProviderError, ValueError, AttributeError) as exc:
+        print(f"WARNING: Batched toxicity check failed: {exc}. Falling back to single checks.")
+
+    for item_id, text in items:
+        if item_id in verdicts:
+            continue
+        try:
+            verdicts[item_id] = _screen_single(text, provider)
+        except (AIProviderError, ValueError) as exc:
+            print(f"WARNING: Toxicity check for feedback {item_id} unusable: {exc}.")
+            verdicts[item_id] = failsafe_verdict()
+    return verdicts
+
+
+def _requeue_rescreen(feedback_item, exc):
+    attempts = SummaryJobQueue.query.filter_by(
+        job_type="rescreen", feedback_id=feedback_item.id
+    ).count()
+    delay = min(RESCREEN_BACKOFF_MAX_SECONDS, RESCREEN_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0))
+    print(
+        f"WARNING: Re-screen of feedback {feedback_item.id} failed: {exc}. Retrying in {delay}s."
+    )
+    db.session.add(
+        SummaryJobQueue(
+            job_type="rescreen",
+            target_id=str(feedback_item.id),
+            feedback_id=feedback_item.id,
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+        )
+    )
+
+
+def rescreen_feedback(feedback_id, provider=None):
+    feedback_item = db.session.get(Feedback, int(feedback_id))
+    if not feedback_item or feedback_item.status != RESCREEN_STATUS:
+        return None
+
+    provider = provider or get_provider()
+    if not provider.is_configured():
+        screening = run_toxicity_check(feedback_item.feedback_text, provider=provider)
+    else:
+        try:
+            screening = _screen_single(feedback_item.feedback_text, provider)
+        except requests.RequestException as exc:
+            # An unreachable provider says nothing about the text: stay pending, retry later.
+            _requeue_rescreen(feedback_item, exc)
+            db.session.commit()
+            return feedback_item
+        except (AIProviderError, ValueError) as exc:
+            print(f"CRITICAL TOXICITY CHECK ERROR: {exc}. Defaulting to 'inappropriate'.")
+            screening = failsafe_verdict()
+    old_status = feedback_item.status
+    feedback_item.toxicity_score = screening["toxicity_score"]
+    feedback_item.is_inappropriate = screening["is_inappropriate"]
+    feedback_item.screened_by = screening["screened_by"]
+    if feedback_item.is_inappropriate:
+        feedback_item.status = "Screened - Escalation"
+        reroot_duplicates([feedback_item.id])
+    else:
+        feedback_item.status = "Approved"
+        feedback_item.is_summary_approved = True
+        if not feedback_item.duplicate_of_id:
+            job_type = "teacher" if feedback_item.category == "teacher" else "category"
+            target_id = (
+                str(feedback_item.teacher_id) if job_type == "teacher" else feedback_item.category
+            )
+            db.session.add(
+                SummaryJobQueue(
+                    job_type=job_type, target_id=target_id, feedback_id=feedback_item.id
+                )
+            )
+    record_feedback_status(
+        feedback_item.id, old_status, feedback_item.status, note=RESCREEN_NOTE
+    )
+    db.session.commit()
+    return feedback_item
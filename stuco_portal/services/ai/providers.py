@@ -203,9 +203,9 @@ def _fetch_and_encode_image(url):
     return {"mime_type": mime_type, "data": data}
 
 
-def get_provider(config=None, override=None):
+def get_provider(config=None, override=None, timeout=None):
     provider_name = (override or _value_from_config(config, "AI_PROVIDER", "deepseek")).lower()
-    timeout = _value_from_config(config, "AI_TIMEOUT", 60)
+    timeout = timeout or _value_from_config(config, "AI_TIMEOUT", 60)
     max_tokens = _value_from_config(config, "AI_MAX_TOKENS", 800)
 
     if provider_name == "openai":
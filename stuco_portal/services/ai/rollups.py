@@ -0,0 +1,118 @@
+from datetime import date, datetime, timedelta
+
+from ...extensions import db
+from ...models import DailyDigestRollup, Feedback
+from ..feedback_queries import (
+    created_between_filters,
+    stream_feedback_texts,
+    summary_eligible_filters,
+)
+from ..metrics import increment_metric
+from .clustering import CLUSTER_COUNT_RULES
+from .map_reduce import summarize_feedback_texts
+
+DAILY_ROLLUP_PROMPT = (
+    "You are condensing ONE day of approved, anonymous student feedback into compact notes "
+    "that will later be merged into a monthly digest for STUCO leaders. Your response MUST be "
+    "a single, valid JSON object with exactly two keys: 'positive_highlights' and "
+    "'actionable_growth', each a list of short bullet strings. Keep every distinct point, "
+    "merge only true repeats, and note in parentheses how many entries raised a point when "
+    "more than one did. Avoid naming individual students or teachers. Do not use markdown."
+) + CLUSTER_COUNT_RULES
+
+
+def _day_bounds(day):
+    return datetime.combine(day, datetime.min.time()), datetime.combine(day, datetime.max.time())
+
+
+def daily_feedback_signatures(start_date, end_date):
+    # One grouped query for the whole range; count/sum/max of ids changes whenever an entry
+    # is approved, retracted or deleted, so unchanged days are skipped without reading text.
+    start_dt, _ = _day_bounds(start_date)
+    _, end_dt = _day_bounds(end_date)
+    day_column = db.func.date(Feedback.created_at)
+    rows = (
+        db.session.query(
+            day_column,
+            db.func.count(Feedback.id),
+            db.func.sum(Feedback.id),
+            db.func.max(Feedback.id),
+        )
+        .filter(*created_between_filters(start_dt, end_dt), *summary_eligible_filters())
+        .group_by(day_column)
+        .all()
+    )
+    signatures = {}
+    for day_value, count, id_sum, id_max in rows:
+        if isinstance(day_value, str):
+            day_value = date.fromisoformat(day_value)
+        signatures[day_value] = (count, f"{count}:{id_sum}:{id_max}")
+    return signatures
+
+
+def summarize_day(day, provider):
+    start_dt, end_dt = _day_bounds(day)
+    filters = (*created_between_filters(start_dt, end_dt), *summary_eligible_filters())
+    return summarize_feedback_texts(
+        stream_feedback_texts(filters, order_by=Feedback.created_at),
+        provider,
+        DAILY_ROLLUP_PROMPT,
+        context=f"daily digest rollup for {day.isoformat()}",
+    )
+
+
+def refresh_daily_rollups(start_date, end_date, provider):
+    signatures = daily_feedback_signatures(start_date, end_date)
+    rollups = {
+        rollup.day: rollup
+        for rollup in DailyDigestRollup.query.filter(
+            DailyDigestRollup.day >= start_date, DailyDigestRollup.day <= end_date
+        )
+    }
+
+    for day, rollup in list(rollups.items()):
+        if day not in signatures:
+            db.session.delete(rollup)
+            del rollups[day]
+    db.session.commit()
+
+    for day in sorted(signatures):
+        count, signature = signatures[day]
+        existing = rollups.get(day)
+        if existing and existing.input_signature == signature:
+            continue
+        print(f"INFO: Rolling up {count} feedback entries for {day.isoformat()}.")
+        positive_bullets, actionable_bullets = summarize_day(day, provider)
+        rollups[day] = db.session.merge(
+            DailyDigestRollup(
+                day=day,
+                positive_bullets=positive_bullets,
+                actionable_bullets=actionable_bullets,
+                feedback_count=count,
+                input_signature=signature,
+                generated_at=datetime.utcnow(),
+            )
+        )
+        # Commit per day so a failure later in the range keeps the days already done.
+        db.session.commit()
+        increment_metric("digest_rollups_generated")
+
+    return [rollups[day] for day in sorted(rollups)]
+
+
+def advance_daily_rollups(provider, today=None):
+    # Completed days of the current month only; the month-end digest picks up the last day.
+    today = today or date.today()
+    if today.day == 1:
+        return []
+    return refresh_daily_rollups(today.replace(day=1), today - timedelta(days=1), provider)
+
+
+def get_daily_rollups(start_date, end_date):
+    return (
+        DailyDigestRollup.query.filter(
+            DailyDigestRollup.day >= start_date, DailyDigestRollup.day <= end_date
+        )
+        .order_by(DailyDigestRollup.day)
+        .all()
+    )
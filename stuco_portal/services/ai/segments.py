@@ -0,0 +1,99 @@
+from itertools import islice
+
+from ...extensions import db
+from ...models import Feedback
+from ..feedback_queries import fetch_feedback_texts, stream_feedback_rows
+from ..metrics import increment_metric
+
+RATING_FIELDS = ("clarity", "pacing", "resources", "support")
+UNKNOWN_YEAR_LEVEL = "unknown"
+
+
+def segment_breakdown(filters):
+    # One GROUP BY over (category, year level) keeps rating sums and non-null counts,
+    # so both the per-category and the per-year-level views are rolled up exactly here.
+    rating_columns = [getattr(Feedback, f"rating_{field}") for field in RATING_FIELDS]
+    aggregates = [db.func.count(Feedback.id)]
+    for column in rating_columns:
+        aggregates += [db.func.sum(column), db.func.count(column)]
+    rows = (
+        db.session.query(Feedback.category, Feedback.year_level_submitted, *aggregates)
+        .filter(*filters)
+        .group_by(Feedback.category, Feedback.year_level_submitted)
+        .all()
+    )
+
+    totals = {"category": {}, "year_level": {}}
+    feedback_count = 0
+    for category, year_level, count, *rating_values in rows:
+        feedback_count += count
+        keys = (("category", category), ("year_level", year_level or UNKNOWN_YEAR_LEVEL))
+        for dimension, key in keys:
+            entry = totals[dimension].setdefault(
+                key, {"count": 0, "sums": [0] * len(RATING_FIELDS), "rated": [0] * len(RATING_FIELDS)}
+            )
+            entry["count"] += count
+            for index in range(len(RATING_FIELDS)):
+                entry["sums"][index] += rating_values[2 * index] or 0
+                entry["rated"][index] += rating_values[2 * index + 1] or 0
+
+    segments = {}
+    for dimension, entries in totals.items():
+        segments[dimension] = [
+            {
+                "key": key,
+                "feedback_count": entry["count"],
+                "average_ratings": {
+                    field: (
+                        round(entry["sums"][index] / entry["rated"][index], 2)
+                        if entry["rated"][index]
+                        else None
+                    )
+                    for index, field in enumerate(RATING_FIELDS)
+                },
+                "positive_bullets": [],
+                "actionable_bullets": [],
+                "summarized": False,
+            }
+            for key, entry in sorted(entries.items(), key=lambda item: -item[1]["count"])
+        ]
+    return feedback_count, segments
+
+
+def segment_filter(dimension, key):
+    if dimension == "category":
+        return Feedback.category == key
+    if key == UNKNOWN_YEAR_LEVEL:
+        return Feedback.year_level_submitted.is_(None)
+    return Feedback.year_level_submitted == key
+
+
+def sample_segment_texts(filters, feedback_count, sample_size):
+    # Evenly spaced ids across the segment (only ids are read), then texts for those ids.
+    # Segment cost stays at one bounded prompt however busy the month was.
+    stride = max(1, -(-feedback_count // sample_size))
+    rows = stream_feedback_rows((Feedback.id,), filters, order_by=Feedback.created_at)
+    sampled_ids = [row[0] for row in islice(rows, 0, None, stride)][:sample_size]
+    return fetch_feedback_texts(sampled_ids)
+
+
+def summarize_segments(segments, filters, summarize, min_feedback, sample_size):
+    # Only segments with enough volume are worth a summary; smaller ones keep their
+    # counts and averages but never reach the summarizer.
+    for dimension, entries in segments.items():
+        for segment in entries:
+            if segment["feedback_count"] < min_feedback:
+                continue
+            texts = sample_segment_texts(
+                (*filters, segment_filter(dimension, segment["key"])),
+                segment["feedback_count"],
+                sample_size,
+            )
+            label = "category" if dimension == "category" else "year level"
+            positive_bullets, actionable_bullets = summarize(texts, f"{label} {segment['key']}")
+            segment["positive_bullets"] = positive_bullets
+            segment["actionable_bullets"] = actionable_bullets
+            segment["summarized"] = True
+            segment["sampled_count"] = len(texts)
+            increment_metric("digest_segments_summarized")
+    return segments
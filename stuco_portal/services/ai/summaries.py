@@ -1,13 +1,31 @@
+import hashlib
 import html as html_lib
 import random
 import re
 from datetime import date, datetime, timedelta
+from itertools import chain, islice
 
 from flask import current_app
+from sqlalchemy.exc import IntegrityError
 
 from ...extensions import db
-from ...models import CategorySummary, Feedback, MonthlyDigest, TeacherSummary
-from .providers import AIProviderError, get_provider, parse_json_response
+from ...models import CategorySummary, Feedback, MonthlyDigest, Teacher, TeacherSummary, User
+from ..feedback_queries import (
+    created_between_filters,
+    fetch_feedback_texts,
+    stream_feedback_rows,
+    stream_feedback_texts,
+    summary_eligible_filters,
+    target_filter,
+)
+from ..metrics import increment_metric
+from .clustering import CLUSTER_COUNT_RULES, clustered_prompt_text
+from .extractive import build_name_regex, extractive_summary
+from .map_reduce import map_reduce_summary, reduce_partial_summaries, summarize_feedback_texts
+from .providers import AIProviderError, get_provider
+from .rollups import refresh_daily_rollups
+from .segments import segment_breakdown, summarize_segments
+from .summary_output import coerce_bullet_summary, extract_json_object, parse_bullet_summary
 
 BULLET_REGEX = re.compile(r"<li>(.*?)</li>", re.IGNORECASE | re.DOTALL)
 
@@ -53,6 +71,58 @@ def render_bullets_html(bullets):
     return "<ul>" + "".join(f"<li>{item}</li>" for item in safe_items) + "</ul>"
 
 
+def build_summary_payload(positive_bullets, actionable_bullets):
+    return {
+        "positive_bullets": positive_bullets,
+        "actionable_bullets": actionable_bullets,
+        "positive_summary": render_bullets_html(positive_bullets),
+        "actionable_summary": render_bullets_html(actionable_bullets),
+    }
+
+
+NO_FEEDBACK_PAYLOAD = build_summary_payload(["No feedback available."], ["No feedback available."])
+
+
+def summary_content_fields(positive_bullets, actionable_bullets, payload=None):
+    # Everything a read needs is rendered once here, at write time.
+    payload = payload or build_summary_payload(positive_bullets, actionable_bullets)
+    return {
+        "latest_positive_summary": payload["positive_summary"],
+        "latest_actionable_summary": payload["actionable_summary"],
+        "raw_positive_bullets": positive_bullets,
+        "raw_actionable_bullets": actionable_bullets,
+        "response_payload": payload,
+    }
+
+
+def get_summary_payload(summary_entry):
+    if summary_entry.response_payload:
+        return summary_entry.response_payload
+    # Only rows written before payloads existed and not yet backfilled end up here.
+    return build_summary_payload(
+        get_summary_bullets(summary_entry, True), get_summary_bullets(summary_entry, False)
+    )
+
+
+def backfill_summary_payloads():
+    updated = 0
+    for model in (TeacherSummary, CategorySummary):
+        for summary_entry in model.query.all():
+            if summary_entry.response_payload:
+                continue
+            payload = get_summary_payload(summary_entry)
+            # Cleared summaries keep empty raw bullets so the placeholder never reaches a prompt.
+            if payload != NO_FEEDBACK_PAYLOAD:
+                summary_entry.raw_positive_bullets = payload["positive_bullets"]
+                summary_entry.raw_actionable_bullets = payload["actionable_bullets"]
+            summary_entry.response_payload = payload
+            updated += 1
+    if updated:
+        db.session.commit()
+        print(f"INFO: Backfilled stored payloads for {updated} legacy summaries.")
+    return updated
+
+
 def generate_mock_summary(target_id, summary_type="teacher"):
     print(f"MOCK SUMMARY: Generating FAST, SAFE summary for {summary_type} ID: {target_id}.")
     mock_positives = [
@@ -94,28 +164,20 @@ def generate_mock_summary(target_id, summary_type="teacher"):
         if new_act not in actionable_bullets:
             actionable_bullets.append(new_act)
 
-    positive_summary_html = "<ul>" + "".join(
-        f"<li>{item}</li>" for item in positive_bullets
-    ) + "</ul>"
-    actionable_summary_html = "<ul>" + "".join(
-        f"<li>{item}</li>" for item in actionable_bullets
-    ) + "</ul>"
-
+    content_fields = summary_content_fields(positive_bullets, actionable_bullets)
     if summary_type == "teacher":
         new_summary_entry = TeacherSummary(
             teacher_id=int(target_id),
-            latest_positive_summary=positive_summary_html,
-            latest_actionable_summary=actionable_summary_html,
-            raw_positive_bullets=positive_bullets,
-            raw_actionable_bullets=actionable_bullets,
+            summarized_feedback_ids=None,
+            input_fingerprint=None,
+            **content_fields,
         )
     else:
         new_summary_entry = CategorySummary(
             category_name=target_id,
-            latest_positive_summary=positive_summary_html,
-            latest_actionable_summary=actionable_summary_html,
-            raw_positive_bullets=positive_bullets,
-            raw_actionable_bullets=actionable_bullets,
+            summarized_feedback_ids=None,
+            input_fingerprint=None,
+            **content_fields,
         )
 
     db.session.merge(new_summary_entry)
@@ -123,88 +185,315 @@ def generate_mock_summary(target_id, summary_type="teacher"):
     print(f"MOCK SUMMARY: Fast, SAFE summary updated for {summary_type} ID: {target_id}.")
 
 
-def _normalize_bullets(bullets):
-    if not bullets:
-        return []
-    if isinstance(bullets, list):
-        return [str(item).strip() for item in bullets if str(item).strip()]
-    return [str(bullets).strip()]
-
-
-def run_teacher_summary(target_id, provider=None):
-    teacher_id = int(target_id)
-    provider = provider or get_provider()
-    deepthink = current_app.config.get("DEEPTHINK_OR_NOT", False)
-    if not deepthink or not provider.is_configured():
-        print("INFO: Real summaries disabled or provider missing. Running MOCK teacher summary.")
-        generate_mock_summary(teacher_id, "teacher")
-        return
-
-    print(f"REAL AI SUMMARY: Generating holistic report for teacher_id {teacher_id}...")
+TEACHER_SUMMARY_PROMPT = (
+    "You are an expert educational analyst. Your task is to synthesize a list of raw, "
+    "anonymous student feedback into a holistic and cumulative report for the teacher. "
+    "Your response MUST be in a single, valid JSON object format. "
+    "The JSON object must have exactly two keys: 'positive_highlights' and 'actionable_growth'. "
+    "Each key must contain a list (an array) of bullet-point strings. "
+    "CRITICAL RULES: BE COMPREHENSIVE, DO NOT FORGET older points, consolidate similar points, "
+    "and keep growth points constructive. Do not use markdown."
+) + CLUSTER_COUNT_RULES
 
-    past_feedback = Feedback.query.filter(
-        Feedback.teacher_id == teacher_id,
-        Feedback.is_inappropriate.is_(False),
-        Feedback.is_summary_approved.is_(True),
-    ).all()
-
-    feedback_entries = [f.feedback_text for f in past_feedback]
-
-    if not feedback_entries:
-        print("INFO: No feedback to summarize for teacher. Clearing summary.")
-        summary_entry = TeacherSummary(
-            teacher_id=teacher_id,
-            latest_positive_summary="<ul><li>No feedback available.</li></ul>",
-            latest_actionable_summary="<ul><li>No feedback available.</li></ul>",
-            raw_positive_bullets=[],
-            raw_actionable_bullets=[],
-        )
-        db.session.merge(summary_entry)
-        db.session.commit()
-        return
+INCREMENTAL_SUMMARY_RULES = (
+    " You are UPDATING an existing report: you will receive the current bullets and only the "
+    "feedback that arrived since. Return the complete updated report, keeping every current "
+    "point unless new feedback clearly supersedes it and merging new points into it."
+)
 
-    combined_text = "\n---\n".join(feedback_entries)
 
-    system_prompt = (
-        "You are an expert educational analyst. Your task is to synthesize a list of raw, "
-        "anonymous student feedback into a holistic and cumulative report for the teacher. "
+def _category_summary_prompt(category_name):
+    return (
+        "You are an expert operational analyst for a school's Student Council (STUCO). "
+        "Your task is to synthesize raw, anonymous student feedback about a specific school category "
+        f"into a holistic and cumulative report for STUCO admins. The category is: {category_name.upper()}. "
         "Your response MUST be in a single, valid JSON object format. "
         "The JSON object must have exactly two keys: 'positive_highlights' and 'actionable_growth'. "
         "Each key must contain a list (an array) of bullet-point strings. "
         "CRITICAL RULES: BE COMPREHENSIVE, DO NOT FORGET older points, consolidate similar points, "
         "and keep growth points constructive. Do not use markdown."
+    ) + CLUSTER_COUNT_RULES
+
+
+def _approved_feedback_filter(summary_type, target_id):
+    return (target_filter(summary_type, target_id), *summary_eligible_filters())
+
+
+def _summary_entry(summary_type, target_id, **fields):
+    if summary_type == "teacher":
+        return TeacherSummary(teacher_id=target_id, **fields)
+    return CategorySummary(category_name=target_id, **fields)
+
+
+def _full_rebuild_due(summary_entry):
+    last_full = summary_entry.last_full_rebuild_at
+    if not last_full:
+        return True
+    hours = current_app.config.get("SUMMARY_FULL_REBUILD_HOURS", 168)
+    return datetime.utcnow() - last_full >= timedelta(hours=hours)
+
+
+def _format_bullet_block(title, bullets):
+    lines = "\n".join(f"- {item}" for item in bullets) or "- (none yet)"
+    return f"{title}:\n{lines}"
+
+
+def _update_fingerprint(digest, feedback_id, feedback_text):
+    digest.update(f"{feedback_id}:".encode("utf-8"))
+    digest.update(hashlib.sha256((feedback_text or "").encode("utf-8")).digest())
+
+
+def compute_input_fingerprint(rows, seen_ids=None):
+    digest = hashlib.sha256()
+    for feedback_id, feedback_text in rows:
+        _update_fingerprint(digest, feedback_id, feedback_text)
+        if seen_ids is not None:
+            seen_ids.add(feedback_id)
+    return digest.hexdigest()
+
+
+def _tee_folded_rows(rows, folded_ids, digest):
+    # Fingerprints the already-summarized subset during the same pass; it matches the
+    # stored input_fingerprint only while every folded entry is unchanged.
+    for row in rows:
+        if row[0] in folded_ids:
+            _update_fingerprint(digest, row[0], row[1])
+        yield row
+
+
+def _split_small_input(entries, limit):
+    # Reads at most limit + 1 entries: returns (entries, None) when the whole input fits
+    # one prompt, otherwise (None, iterator over the full input) for map-reduce.
+    iterator = iter(entries)
+    head = list(islice(iterator, limit + 1))
+    if len(head) <= limit:
+        return head, None
+    return None, chain(head, iterator)
+
+
+def _clear_target_summary(summary_type, target_id, input_fingerprint):
+    summary_entry = _summary_entry(
+        summary_type,
+        target_id,
+        summarized_feedback_ids=[],
+        last_full_rebuild_at=datetime.utcnow(),
+        input_fingerprint=input_fingerprint,
+        **summary_content_fields([], [], payload=NO_FEEDBACK_PAYLOAD),
     )
-    user_prompt = f"Here is the collected feedback:\n\n{combined_text}"
+    db.session.merge(summary_entry)
+    db.session.commit()
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
 
-    try:
-        content = provider.chat(messages, response_format={"type": "json_object"})
-        summary_json = parse_json_response(content)
-        positive_bullets = _normalize_bullets(summary_json.get("positive_highlights", []))
-        actionable_bullets = _normalize_bullets(summary_json.get("actionable_growth", []))
-        positive_summary_html = render_bullets_html(positive_bullets)
-        actionable_summary_html = render_bullets_html(actionable_bullets)
-        summary_entry = TeacherSummary(
-            teacher_id=teacher_id,
-            latest_positive_summary=positive_summary_html,
-            latest_actionable_summary=actionable_summary_html,
-            raw_positive_bullets=positive_bullets,
-            raw_actionable_bullets=actionable_bullets,
+def _plan_target_summary(summary_type, target_id, label, force_full):
+    # Returns None when the target needed no provider call (unchanged or cleared).
+    model = TeacherSummary if summary_type == "teacher" else CategorySummary
+    existing = db.session.get(model, target_id)
+    filters = _approved_feedback_filter(summary_type, target_id)
+    folded_ids = set(existing.summarized_feedback_ids or []) if existing else set()
+    folded_digest = hashlib.sha256()
+    # First pass streams (id, text) pairs to fingerprint the input without keeping texts.
+    approved_ids = set()
+    input_fingerprint = compute_input_fingerprint(
+        _tee_folded_rows(
+            stream_feedback_rows((Feedback.id, Feedback.feedback_text), filters),
+            folded_ids,
+            folded_digest,
+        ),
+        approved_ids,
+    )
+    if not force_full and existing and existing.input_fingerprint == input_fingerprint:
+        print(f"INFO: Approved feedback for {label} is unchanged. Skipping regeneration.")
+        increment_metric("summary_skipped_unchanged")
+        return None
+
+    if not approved_ids:
+        print(f"INFO: No feedback to summarize for {label}. Clearing summary.")
+        _clear_target_summary(summary_type, target_id, input_fingerprint)
+        return None
+
+    new_ids = approved_ids - folded_ids
+    chunk_size = current_app.config.get("SUMMARY_CHUNK_SIZE", 40)
+    # Folding in only new entries is safe while every already-summarized entry is still
+    # approved and its text unchanged; otherwise the summary is rebuilt in full. Large
+    # backlogs of new entries also rebuild, using the chunk cache for unchanged chunks.
+    folded_unchanged = bool(existing) and existing.input_fingerprint == folded_digest.hexdigest()
+    incremental = (
+        not force_full
+        and bool(new_ids)
+        and bool(folded_ids)
+        and folded_ids <= approved_ids
+        and folded_unchanged
+        and len(new_ids) <= chunk_size
+        and not _full_rebuild_due(existing)
+    )
+
+    plan = {
+        "existing": existing,
+        "approved_ids": approved_ids,
+        "input_fingerprint": input_fingerprint,
+        "incremental": incremental,
+        "feedback_entries": None,
+        "streamed_entries": None,
+        "prompt_body": None,
+    }
+    if incremental:
+        print(f"INFO: Incremental summary for {label}: folding in {len(new_ids)} new entries.")
+        plan["feedback_entries"] = fetch_feedback_texts(new_ids)
+        plan["prompt_body"] = "\n\n".join(
+            [
+                _format_bullet_block(
+                    "Current positive highlights", existing.raw_positive_bullets or []
+                ),
+                _format_bullet_block(
+                    "Current actionable growth", existing.raw_actionable_bullets or []
+                ),
+                "New feedback since the last update:\n\n"
+                + clustered_prompt_text(plan["feedback_entries"]),
+            ]
         )
-        db.session.merge(summary_entry)
-        db.session.commit()
+    else:
+        plan["feedback_entries"], plan["streamed_entries"] = _split_small_input(
+            stream_feedback_texts(filters), chunk_size
+        )
+        if plan["feedback_entries"] is not None:
+            plan["prompt_body"] = clustered_prompt_text(plan["feedback_entries"])
+    return plan
+
+
+def _store_target_summary(summary_type, target_id, plan, positive_bullets, actionable_bullets):
+    existing = plan["existing"]
+    summary_entry = _summary_entry(
+        summary_type,
+        target_id,
+        summarized_feedback_ids=sorted(plan["approved_ids"]),
+        last_full_rebuild_at=(
+            existing.last_full_rebuild_at if plan["incremental"] else datetime.utcnow()
+        ),
+        input_fingerprint=plan["input_fingerprint"],
+        **summary_content_fields(positive_bullets, actionable_bullets),
+    )
+    db.session.merge(summary_entry)
+    db.session.commit()
+    increment_metric("summary_generated")
+
+
+def _run_target_summary(summary_type, target_id, provider, label, system_prompt, force_full):
+    plan = _plan_target_summary(summary_type, target_id, label, force_full)
+    if plan is None:
+        return
+
+    try:
+        if plan["streamed_entries"] is not None:
+            positive_bullets, actionable_bullets = map_reduce_summary(
+                plan["streamed_entries"], provider, system_prompt, context=f"feedback for {label}"
+            )
+        else:
+            if plan["incremental"]:
+                system_prompt = system_prompt + INCREMENTAL_SUMMARY_RULES
+                user_prompt = plan["prompt_body"]
+            elif summary_type == "teacher":
+                user_prompt = f"Here is the collected feedback:\n\n{plan['prompt_body']}"
+            else:
+                user_prompt = (
+                    f"Here is the collected feedback for {target_id}:\n\n{plan['prompt_body']}"
+                )
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+            content = provider.chat(messages, response_format={"type": "json_object"})
+            positive_bullets, actionable_bullets = parse_bullet_summary(content, provider)
+        _store_target_summary(summary_type, target_id, plan, positive_bullets, actionable_bullets)
     except AIProviderError as exc:
         db.session.rollback()
-        print(f"CRITICAL AI ERROR (Teacher Summary): {exc}")
+        kind = "Teacher" if summary_type == "teacher" else "Category"
+        print(f"CRITICAL AI ERROR ({kind} Summary): {exc}")
         raise
 
 
-def run_category_summary(target_id, provider=None):
+def uses_local_summaries():
+    return current_app.config.get("SUMMARY_ENGINE", "llm") == "local"
+
+
+def uses_llm_summaries(provider):
+    return (
+        not uses_local_summaries()
+        and current_app.config.get("DEEPTHINK_OR_NOT", False)
+        and provider.is_configured()
+    )
+
+
+def _known_name_regex():
+    # Local bullets quote students verbatim; known teacher and user names are redacted.
+    names = [name for (name,) in db.session.query(Teacher.name)]
+    names += [name for (name,) in db.session.query(User.name).filter(User.name.isnot(None))]
+    return build_name_regex(names)
+
+
+def _run_local_summary(summary_type, target_id, label, force_full):
+    model = TeacherSummary if summary_type == "teacher" else CategorySummary
+    existing = db.session.get(model, target_id)
+    filters = _approved_feedback_filter(summary_type, target_id)
+    approved_ids = set()
+    input_fingerprint = compute_input_fingerprint(
+        stream_feedback_rows((Feedback.id, Feedback.feedback_text), filters), approved_ids
+    )
+    if not force_full and existing and existing.input_fingerprint == input_fingerprint:
+        print(f"INFO: Approved feedback for {label} is unchanged. Skipping regeneration.")
+        increment_metric("summary_skipped_unchanged")
+        return
+    if not approved_ids:
+        print(f"INFO: No feedback to summarize for {label}. Clearing summary.")
+        _clear_target_summary(summary_type, target_id, input_fingerprint)
+        return
+
+    # Local summaries are cheap enough to always rebuild from every approved entry.
+    positive_bullets, actionable_bullets = extractive_summary(
+        stream_feedback_texts(filters),
+        current_app.config.get("SUMMARY_LOCAL_MAX_BULLETS", 5),
+        name_regex=_known_name_regex(),
+    )
+    plan = {
+        "existing": existing,
+        "approved_ids": approved_ids,
+        "input_fingerprint": input_fingerprint,
+        "incremental": False,
+    }
+    _store_target_summary(summary_type, target_id, plan, positive_bullets, actionable_bullets)
+
+
+def run_teacher_summary(target_id, provider=None, force_full=False):
+    teacher_id = int(target_id)
+    if uses_local_summaries():
+        print(f"LOCAL SUMMARY: Extracting report for teacher_id {teacher_id}...")
+        _run_local_summary("teacher", teacher_id, f"teacher_id {teacher_id}", force_full)
+        return
+
+    provider = provider or get_provider()
+    deepthink = current_app.config.get("DEEPTHINK_OR_NOT", False)
+    if not deepthink or not provider.is_configured():
+        print("INFO: Real summaries disabled or provider missing. Running MOCK teacher summary.")
+        generate_mock_summary(teacher_id, "teacher")
+        return
+
+    print(f"REAL AI SUMMARY: Generating holistic report for teacher_id {teacher_id}...")
+    _run_target_summary(
+        "teacher",
+        teacher_id,
+        provider,
+        label=f"teacher_id {teacher_id}",
+        system_prompt=TEACHER_SUMMARY_PROMPT,
+        force_full=force_full,
+    )
+
+
+def run_category_summary(target_id, provider=None, force_full=False):
     category_name = target_id
+    if uses_local_summaries():
+        print(f"LOCAL SUMMARY: Extracting report for category '{category_name}'...")
+        _run_local_summary("category", category_name, f"category '{category_name}'", force_full)
+        return
+
     provider = provider or get_provider()
     deepthink = current_app.config.get("DEEPTHINK_OR_NOT", False)
     if not deepthink or not provider.is_configured():
@@ -215,67 +504,127 @@ def run_category_summary(target_id, provider=None):
         return
 
     print(f"REAL AI SUMMARY: Generating holistic report for category '{category_name}'...")
-
-    past_feedback = Feedback.query.filter(
-        Feedback.category == category_name,
-        Feedback.is_inappropriate.is_(False),
-        Feedback.is_summary_approved.is_(True),
-    ).all()
-
-    feedback_entries = [f.feedback_text for f in past_feedback]
-
-    if not feedback_entries:
-        print(f"INFO: No feedback to summarize for category '{category_name}'. Clearing summary.")
-        summary_entry = CategorySummary(
-            category_name=category_name,
-            latest_positive_summary="<ul><li>No feedback available.</li></ul>",
-            latest_actionable_summary="<ul><li>No feedback available.</li></ul>",
-            raw_positive_bullets=[],
-            raw_actionable_bullets=[],
-        )
-        db.session.merge(summary_entry)
-        db.session.commit()
-        return
-
-    combined_text = "\n---\n".join(feedback_entries)
-
-    system_prompt = (
-        "You are an expert operational analyst for a school's Student Council (STUCO). "
-        "Your task is to synthesize raw, anonymous student feedback about a specific school category "
-        f"into a holistic and cumulative report for STUCO admins. The category is: {category_name.upper()}. "
-        "Your response MUST be in a single, valid JSON object format. "
-        "The JSON object must have exactly two keys: 'positive_highlights' and 'actionable_growth'. "
-        "Each key must contain a list (an array) of bullet-point strings. "
-        "CRITICAL RULES: BE COMPREHENSIVE, DO NOT FORGET older points, consolidate similar points, "
-        "and keep growth points constructive. Do not use markdown."
+    _run_target_summary(
+        "category",
+        category_name,
+        provider,
+        label=f"category '{category_name}'",
+        system_prompt=_category_summary_prompt(category_name),
+        force_full=force_full,
     )
-    user_prompt = f"Here is the collected feedback for {category_name}:\n\n{combined_text}"
 
+
+CATEGORY_BATCH_PROMPT = (
+    "You are an expert operational analyst for a school's Student Council (STUCO). "
+    "You will receive raw, anonymous student feedback for SEVERAL independent school "
+    "categories, each under its own '### Category: <key>' heading. Summarize every category "
+    "on its own and never move points between categories. Categories marked UPDATE come with "
+    "their current report and only the feedback that arrived since: return the complete "
+    "updated report, keeping every current point unless new feedback clearly supersedes it. "
+    "Your response MUST be a single, valid JSON object with one key 'summaries' that maps "
+    "every category key to an object with exactly two keys: 'positive_highlights' and "
+    "'actionable_growth', each a list (an array) of bullet-point strings. "
+    "CRITICAL RULES: BE COMPREHENSIVE, consolidate similar points, and keep growth points "
+    "constructive. Do not use markdown."
+) + CLUSTER_COUNT_RULES
+
+
+def _parse_batched_summaries(content, category_names):
+    # Repaired locally only: a follow-up call would cost as much as the single-call fallback.
+    summary_json = extract_json_object(content)
+    summaries = summary_json.get("summaries") if summary_json else None
+    if not isinstance(summaries, dict):
+        increment_metric("summary_output_invalid")
+        raise AIProviderError("Batched summary response is missing the 'summaries' object.")
+    results = {}
+    for category_name in category_names:
+        result = coerce_bullet_summary(summaries.get(category_name))
+        if result:
+            results[category_name] = result[0]
+            increment_metric(
+                "summary_output_repaired_locally" if result[1] else "summary_output_valid"
+            )
+        else:
+            increment_metric("summary_output_invalid")
+    return results
+
+
+def _run_category_batch(group, provider):
+    sections = []
+    for category_name, plan in group:
+        mode = "UPDATE" if plan["incremental"] else "FULL"
+        sections.append(f"### Category: {category_name} ({mode})\n\n{plan['prompt_body']}")
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
+        {"role": "system", "content": CATEGORY_BATCH_PROMPT},
+        {"role": "user", "content": "\n\n".join(sections)},
     ]
-
     try:
         content = provider.chat(messages, response_format={"type": "json_object"})
-        summary_json = parse_json_response(content)
-        positive_bullets = _normalize_bullets(summary_json.get("positive_highlights", []))
-        actionable_bullets = _normalize_bullets(summary_json.get("actionable_growth", []))
-        positive_summary_html = render_bullets_html(positive_bullets)
-        actionable_summary_html = render_bullets_html(actionable_bullets)
-        summary_entry = CategorySummary(
-            category_name=category_name,
-            latest_positive_summary=positive_summary_html,
-            latest_actionable_summary=actionable_summary_html,
-            raw_positive_bullets=positive_bullets,
-            raw_actionable_bullets=actionable_bullets,
-        )
-        db.session.merge(summary_entry)
-        db.session.commit()
+        results = _parse_batched_summaries(content, [name for name, _ in group])
     except AIProviderError as exc:
-        db.session.rollback()
-        print(f"CRITICAL AI ERROR (Category Summary): {exc}")
-        raise
+        print(f"WARNING: Batched category summary unusable ({exc}). Falling back to single calls.")
+        results = {}
+
+    leftovers = []
+    for category_name, plan in group:
+        if category_name in results:
+            _store_target_summary("category", category_name, plan, *results[category_name])
+            increment_metric("summary_batched_targets")
+        else:
+            leftovers.append(category_name)
+            increment_metric("summary_batch_fallbacks")
+    return leftovers
+
+
+def run_category_summaries(category_names, provider=None):
+    # Low-volume categories share one provider call; anything larger, or anything the
+    # combined response did not cover validly, gets its own run_category_summary call.
+    # Returns {category_name: exception} for categories that still failed.
+    provider = provider or get_provider()
+    deepthink = current_app.config.get("DEEPTHINK_OR_NOT", False)
+    max_targets = current_app.config.get("SUMMARY_BATCH_MAX_TARGETS", 6)
+    max_entries = current_app.config.get("SUMMARY_BATCH_MAX_ENTRIES", 5)
+
+    individual = []
+    batchable = []
+    batching = (
+        deepthink and provider.is_configured() and max_targets > 1 and not uses_local_summaries()
+    )
+    if not batching or len(category_names) < 2:
+        individual = list(category_names)
+    else:
+        for category_name in category_names:
+            plan = _plan_target_summary(
+                "category", category_name, f"category '{category_name}'", False
+            )
+            if plan is None:
+                continue
+            entries = plan["feedback_entries"]
+            if entries is None or len(entries) > max_entries:
+                individual.append(category_name)
+            else:
+                batchable.append((category_name, plan))
+
+    for index in range(0, len(batchable), max_targets):
+        group = batchable[index : index + max_targets]
+        if len(group) == 1:
+            individual.append(group[0][0])
+            continue
+        print(
+            "REAL AI SUMMARY: Generating batched report for categories "
+            + ", ".join(f"'{name}'" for name, _ in group)
+            + "..."
+        )
+        individual.extend(_run_category_batch(group, provider))
+
+    failures = {}
+    for category_name in individual:
+        try:
+            run_category_summary(category_name, provider=provider)
+        except Exception as exc:
+            db.session.rollback()
+            failures[category_name] = exc
+    return failures
 
 
 def month_key_for_date(target_date):
@@ -317,97 +666,217 @@ def generate_mock_monthly_digest(month_key, feedback_count):
     return positive_bullets, actionable_bullets
 
 
+DIGEST_STATUS_GENERATING = "generating"
+DIGEST_STATUS_FAILED = "failed"
+DIGEST_STATUS_COMPLETE = "complete"
+INCOMPLETE_DIGEST_STATUSES = (DIGEST_STATUS_GENERATING, DIGEST_STATUS_FAILED)
+DIGEST_CLAIM_TIMEOUT_MINUTES = 30
+# A failed run keeps its row (generated_at = failure time) so retries wait this long.
+DIGEST_RETRY_BACKOFF_MINUTES = 10
+
+
+def is_digest_complete(digest):
+    return digest is not None and digest.status not in INCOMPLETE_DIGEST_STATUSES
+
+
+def is_digest_retry_waiting(digest, now=None):
+    if digest is None or digest.status != DIGEST_STATUS_FAILED or digest.generated_at is None:
+        return False
+    now = now or datetime.utcnow()
+    return now - digest.generated_at < timedelta(minutes=DIGEST_RETRY_BACKOFF_MINUTES)
+
+
+def complete_digest_filter():
+    return db.or_(
+        MonthlyDigest.status.is_(None),
+        MonthlyDigest.status.notin_(INCOMPLETE_DIGEST_STATUSES),
+    )
+
+
+def latest_complete_digest():
+    return (
+        MonthlyDigest.query.filter(complete_digest_filter())
+        .order_by(MonthlyDigest.month_key.desc())
+        .first()
+    )
+
+
+def claim_monthly_digest(month_key, start_date, end_date):
+    # The month_key primary key is the lock: only one process can insert the
+    # "generating" row. A stale claim, or a failed run past its backoff, is taken over
+    # with a conditional UPDATE.
+    now = datetime.utcnow()
+    if db.session.get(MonthlyDigest, month_key) is None:
+        db.session.add(
+            MonthlyDigest(
+                month_key=month_key,
+                start_date=start_date,
+                end_date=end_date,
+                generated_at=now,
+                feedback_count=0,
+                status=DIGEST_STATUS_GENERATING,
+            )
+        )
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+
+    claim_cutoff = now - timedelta(minutes=DIGEST_CLAIM_TIMEOUT_MINUTES)
+    retry_cutoff = now - timedelta(minutes=DIGEST_RETRY_BACKOFF_MINUTES)
+    taken_over = (
+        MonthlyDigest.query.filter(
+            MonthlyDigest.month_key == month_key,
+            db.or_(
+                db.and_(
+                    MonthlyDigest.status == DIGEST_STATUS_GENERATING,
+                    MonthlyDigest.generated_at < claim_cutoff,
+                ),
+                db.and_(
+                    MonthlyDigest.status == DIGEST_STATUS_FAILED,
+                    MonthlyDigest.generated_at < retry_cutoff,
+                ),
+            ),
+        ).update(
+            {"generated_at": now, "status": DIGEST_STATUS_GENERATING},
+            synchronize_session=False,
+        )
+    )
+    db.session.commit()
+    return taken_over == 1
+
+
+def fail_monthly_digest_claim(month_key):
+    # Keeps the row with the failure time so readers and the worker back off.
+    MonthlyDigest.query.filter_by(
+        month_key=month_key, status=DIGEST_STATUS_GENERATING
+    ).update(
+        {"status": DIGEST_STATUS_FAILED, "generated_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+
 def run_monthly_digest(target_date=None, provider=None):
     target_date = target_date or date.today()
     month_key = month_key_for_date(target_date)
     existing = db.session.get(MonthlyDigest, month_key)
-    if existing:
+    if is_digest_complete(existing):
         return existing
 
     start_date, end_date = get_month_date_range(target_date)
-    start_dt = datetime.combine(start_date, datetime.min.time())
-    end_dt = datetime.combine(end_date, datetime.max.time())
+    if not claim_monthly_digest(month_key, start_date, end_date):
+        print(f"INFO: Monthly digest for {month_key} is being generated or waiting to retry.")
+        db.session.expire_all()
+        return db.session.get(MonthlyDigest, month_key)
 
-    feedback_entries = (
-        Feedback.query.filter(
-            Feedback.created_at >= start_dt,
-            Feedback.created_at <= end_dt,
-            Feedback.is_inappropriate.is_(False),
-            Feedback.is_summary_approved.is_(True),
+    try:
+        positive_bullets, actionable_bullets, feedback_count, segments = (
+            _generate_monthly_digest(month_key, start_date, end_date, provider)
         )
-        .order_by(Feedback.created_at)
-        .all()
+    except Exception:
+        db.session.rollback()
+        fail_monthly_digest_claim(month_key)
+        raise
+
+    summary_entry = MonthlyDigest(
+        month_key=month_key,
+        start_date=start_date,
+        end_date=end_date,
+        generated_at=datetime.utcnow(),
+        positive_bullets=positive_bullets,
+        actionable_bullets=actionable_bullets,
+        feedback_count=feedback_count,
+        segments=segments,
+        status=DIGEST_STATUS_COMPLETE,
     )
-    feedback_texts = [item.feedback_text for item in feedback_entries]
-    feedback_count = len(feedback_texts)
-
-    if not feedback_texts:
-        summary_entry = MonthlyDigest(
-            month_key=month_key,
-            start_date=start_date,
-            end_date=end_date,
-            positive_bullets=["No approved feedback was submitted this month."],
-            actionable_bullets=["Encourage students to submit feedback before month end."],
-            feedback_count=0,
+    summary_entry = db.session.merge(summary_entry)
+    db.session.commit()
+    return summary_entry
+
+
+MONTHLY_DIGEST_PROMPT = (
+    "You are an expert educational analyst. Summarize approved, anonymous student feedback "
+    "into a monthly digest for STUCO leaders. Respond ONLY with a valid JSON object with "
+    "exactly two keys: 'positive_highlights' and 'actionable_growth'. Each key must contain "
+    "a list (array) of concise bullet strings. Avoid naming individual students or teachers. "
+    "Keep the list focused and use plain language. Do not use markdown."
+) + CLUSTER_COUNT_RULES
+
+
+def _generate_monthly_digest(month_key, start_date, end_date, provider=None):
+    start_dt = datetime.combine(start_date, datetime.min.time())
+    end_dt = datetime.combine(end_date, datetime.max.time())
+
+    digest_filters = (*created_between_filters(start_dt, end_dt), *summary_eligible_filters())
+    # The segment breakdown's single grouped pass also yields the month's total.
+    feedback_count, segments = segment_breakdown(digest_filters)
+
+    if not feedback_count:
+        return (
+            ["No approved feedback was submitted this month."],
+            ["Encourage students to submit feedback before month end."],
+            0,
+            segments,
         )
-        db.session.merge(summary_entry)
-        db.session.commit()
-        return summary_entry
 
     provider = provider or get_provider()
-    deepthink = current_app.config.get("DEEPTHINK_OR_NOT", False)
-    if not deepthink or not provider.is_configured():
+    min_feedback = current_app.config.get("DIGEST_SEGMENT_MIN_FEEDBACK", 10)
+    # Capped at one chunk so each segment is a single provider call, never a map-reduce.
+    sample_size = max(
+        1,
+        min(
+            current_app.config.get("DIGEST_SEGMENT_SAMPLE_SIZE", 40),
+            current_app.config.get("SUMMARY_CHUNK_SIZE", 40),
+        ),
+    )
+    window = f"{start_date.isoformat()} to {end_date.isoformat()}"
+    if uses_local_summaries():
+        max_bullets = current_app.config.get("SUMMARY_LOCAL_MAX_BULLETS", 5)
+        name_regex = _known_name_regex()
+        positive_bullets, actionable_bullets = extractive_summary(
+            stream_feedback_texts(digest_filters, order_by=Feedback.created_at),
+            max_bullets,
+            name_regex=name_regex,
+        )
+        summarize_segments(
+            segments,
+            digest_filters,
+            lambda texts, label: extractive_summary(texts, max_bullets, name_regex=name_regex),
+            min_feedback,
+            sample_size,
+        )
+        return positive_bullets, actionable_bullets, feedback_count, segments
+    if not uses_llm_summaries(provider):
         positive_bullets, actionable_bullets = generate_mock_monthly_digest(
             month_key, feedback_count
         )
-        summary_entry = MonthlyDigest(
-            month_key=month_key,
-            start_date=start_date,
-            end_date=end_date,
-            positive_bullets=positive_bullets,
-            actionable_bullets=actionable_bullets,
-            feedback_count=feedback_count,
-        )
-        db.session.merge(summary_entry)
-        db.session.commit()
-        return summary_entry
-
-    combined_text = "\n---\n".join(feedback_texts)
-
-    system_prompt = (
-        "You are an expert educational analyst. Summarize approved, anonymous student feedback "
-        "into a monthly digest for STUCO leaders. Respond ONLY with a valid JSON object with "
-        "exactly two keys: 'positive_highlights' and 'actionable_growth'. Each key must contain "
-        "a list (array) of concise bullet strings. Avoid naming individual students or teachers. "
-        "Keep the list focused and use plain language. Do not use markdown."
-    )
-    user_prompt = (
-        f"Monthly feedback window: {start_date.isoformat()} to {end_date.isoformat()}.\n\n"
-        f"Feedback entries:\n{combined_text}"
-    )
-
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
+        return positive_bullets, actionable_bullets, feedback_count, segments
 
     try:
-        content = provider.chat(messages, response_format={"type": "json_object"})
-        summary_json = parse_json_response(content)
-        positive_bullets = _normalize_bullets(summary_json.get("positive_highlights", []))
-        actionable_bullets = _normalize_bullets(summary_json.get("actionable_growth", []))
-        summary_entry = MonthlyDigest(
-            month_key=month_key,
-            start_date=start_date,
-            end_date=end_date,
-            positive_bullets=positive_bullets,
-            actionable_bullets=actionable_bullets,
-            feedback_count=feedback_count,
+        # The worker keeps completed days rolled up, so month end usually only
+        # summarizes the last day before reducing about 30 compact rollups.
+        rollups = refresh_daily_rollups(start_date, end_date, provider)
+        positive_bullets, actionable_bullets = reduce_partial_summaries(
+            [(rollup.positive_bullets or [], rollup.actionable_bullets or []) for rollup in rollups],
+            provider,
+            MONTHLY_DIGEST_PROMPT,
+            context=f"school-wide monthly digest for {window}; each batch is one day",
         )
-        db.session.merge(summary_entry)
-        db.session.commit()
-        return summary_entry
+        summarize_segments(
+            segments,
+            digest_filters,
+            lambda texts, label: summarize_feedback_texts(
+                texts,
+                provider,
+                MONTHLY_DIGEST_PROMPT,
+                context=f"{label} digest for {window} (a representative sample)",
+            ),
+            min_feedback,
+            sample_size,
+        )
+        return positive_bullets, actionable_bullets, feedback_count, segments
     except AIProviderError as exc:
-        db.session.rollback()
         print(f"CRITICAL AI ERROR (Monthly Digest): {exc}")
         raise
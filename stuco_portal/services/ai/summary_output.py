@@ -0,0 +1,114 @@
+import json
+import re
+
+from ..metrics import increment_metric
+from .providers import AIProviderError
+
+SUMMARY_KEYS = ("positive_highlights", "actionable_growth")
+CODE_FENCE_REGEX = re.compile(r"```(?:json)?", re.IGNORECASE)
+
+FIX_JSON_PROMPT = (
+    "The user message was meant to be a single JSON object with exactly two keys: "
+    "'positive_highlights' and 'actionable_growth', each a list of bullet-point strings. "
+    "Return ONLY that corrected JSON object. Keep the wording of every point; do not add, "
+    "drop or rewrite points. Do not use markdown."
+)
+
+
+def normalize_bullets(bullets):
+    if not bullets:
+        return []
+    if isinstance(bullets, list):
+        return [str(item).strip() for item in bullets if str(item).strip()]
+    return [str(bullets).strip()]
+
+
+def extract_json_object(content):
+    # Local repair: drop markdown fences and decode the first complete JSON object,
+    # ignoring any prose the model wrapped around it.
+    text = CODE_FENCE_REGEX.sub("", content or "")
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"\{", text):
+        try:
+            value, _ = decoder.raw_decode(text, match.start())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def coerce_bullet_summary(value):
+    # Returns ((positive, actionable), coerced) or None when the schema cannot be met.
+    if not isinstance(value, dict) or not all(key in value for key in SUMMARY_KEYS):
+        return None
+    coerced = False
+    lists = []
+    for key in SUMMARY_KEYS:
+        item = value[key]
+        if isinstance(item, list):
+            if not all(isinstance(entry, str) for entry in item):
+                if any(isinstance(entry, (dict, list)) for entry in item):
+                    return None
+                coerced = True
+        elif item is None or isinstance(item, (str, int, float)):
+            coerced = True
+        else:
+            return None
+        lists.append(normalize_bullets(item))
+    return (lists[0], lists[1]), coerced
+
+
+def _local_parse(content):
+    try:
+        result = coerce_bullet_summary(json.loads(content))
+        if result:
+            return result
+    except (TypeError, json.JSONDecodeError):
+        pass
+    result = coerce_bullet_summary(extract_json_object(content))
+    if result:
+        return result[0], True
+    return None
+
+
+def parse_bullet_summary(content, provider=None):
+    result = _local_parse(content)
+    if result:
+        bullets, repaired = result
+        increment_metric("summary_output_repaired_locally" if repaired else "summary_output_valid")
+        return bullets
+
+    if provider is not None:
+        # Much cheaper than redoing the summary: the model only re-serializes its own answer.
+        messages = [
+            {"role": "system", "content": FIX_JSON_PROMPT},
+            {"role": "user", "content": content or ""},
+        ]
+        fixed = provider.chat(messages, response_format={"type": "json_object"})
+        result = _local_parse(fixed)
+        if result:
+            increment_metric("summary_output_repaired_by_followup")
+            return result[0]
+
+    increment_metric("summary_output_invalid")
+    raise AIProviderError("Summary response did not match the expected bullet schema.")
+
+
+def summary_output_stats(counters):
+    valid = counters.get("summary_output_valid", 0)
+    local = counters.get("summary_output_repaired_locally", 0)
+    followup = counters.get("summary_output_repaired_by_followup", 0)
+    invalid = counters.get("summary_output_invalid", 0)
+    total = valid + local + followup + invalid
+
+    def rate(count):
+        return round(count / total, 4) if total else None
+
+    return {
+        "responses": total,
+        "local_repair_rate": rate(local),
+        "followup_repair_rate": rate(followup),
+        "repair_rate": rate(local + followup),
+        "failure_rate": rate(invalid),
+    }
@@ -0,0 +1,204 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from ..extensions import db
+from ..models import Category, FeedbackStat, Teacher
+from .ai.segments import RATING_FIELDS
+
+STATS_TABLE = "feedback_stats"
+ESCALATION_STATUS = "Screened - Escalation"
+DEFAULT_ANALYTICS_WEEKS = 26
+MAX_ANALYTICS_WEEKS = 260
+
+# dimension -> (bucket expression, row condition); "{row}" is new/old in triggers and f in rebuilds.
+STAT_DIMENSIONS = {
+    "total": ("''", "1"),
+    "category": ("{row}.category", "1"),
+    "teacher": ("CAST({row}.teacher_id AS TEXT)", "{row}.teacher_id IS NOT NULL"),
+    # SQLite week buckets start on Monday.
+    "week": ("coalesce(date({row}.created_at, 'weekday 0', '-6 days'), 'unknown')", "1"),
+}
+STAT_COLUMNS = ["feedback_count", "flagged_count"] + [
+    f"rating_{field}_{part}" for field in RATING_FIELDS for part in ("sum", "count")
+]
+WATCHED_COLUMNS = ["status", "category", "teacher_id", "created_at", "is_inappropriate"] + [
+    f"rating_{field}" for field in RATING_FIELDS
+]
+
+
+def _stat_values(row, sign):
+    values = [str(sign), f"{sign} * coalesce({row}.is_inappropriate, 0)"]
+    for field in RATING_FIELDS:
+        values.append(f"{sign} * coalesce({row}.rating_{field}, 0)")
+        values.append(f"{sign} * ({row}.rating_{field} IS NOT NULL)")
+    return values
+
+
+def _apply_row_sql(row, sign):
+    # One upsert per dimension adds (sign=1) or removes (sign=-1) a single feedback row.
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in STAT_COLUMNS)
+    statements = []
+    for dimension, (bucket, condition) in STAT_DIMENSIONS.items():
+        values = ", ".join(
+            [f"'{dimension}'", bucket.format(row=row), f"coalesce({row}.status, '')"]
+            + _stat_values(row, sign)
+        )
+        statements.append(
+            f"INSERT INTO {STATS_TABLE} (dimension, bucket, status, {', '.join(STAT_COLUMNS)}) "
+            f"SELECT {values} WHERE {condition.format(row=row)} "
+            f"ON CONFLICT(dimension, bucket, status) DO UPDATE SET {updates};"
+        )
+    return "\n".join(statements)
+
+
+STATS_TRIGGERS = {
+    "feedback_stats_ai": (
+        "CREATE TRIGGER IF NOT EXISTS feedback_stats_ai AFTER INSERT ON feedback BEGIN\n"
+        f"{_apply_row_sql('new', 1)}\nEND"
+    ),
+    "feedback_stats_ad": (
+        "CREATE TRIGGER IF NOT EXISTS feedback_stats_ad AFTER DELETE ON feedback BEGIN\n"
+        f"{_apply_row_sql('old', -1)}\nEND"
+    ),
+    "feedback_stats_au": (
+        "CREATE TRIGGER IF NOT EXISTS feedback_stats_au "
+        f"AFTER UPDATE OF {', '.join(WATCHED_COLUMNS)} ON feedback BEGIN\n"
+        f"{_apply_row_sql('old', -1)}\n{_apply_row_sql('new', 1)}\nEND"
+    ),
+}
+
+
+def analytics_available():
+    return db.engine.dialect.name == "sqlite"
+
+
+def _rebuild_statements():
+    aggregates = [
+        "count(*)",
+        "sum(coalesce(f.is_inappropriate, 0))",
+    ]
+    for field in RATING_FIELDS:
+        aggregates += [f"sum(coalesce(f.rating_{field}, 0))", f"count(f.rating_{field})"]
+    statements = [f"DELETE FROM {STATS_TABLE}"]
+    for dimension, (bucket, condition) in STAT_DIMENSIONS.items():
+        statements.append(
+            f"INSERT INTO {STATS_TABLE} (dimension, bucket, status, {', '.join(STAT_COLUMNS)}) "
+            f"SELECT '{dimension}', {bucket.format(row='f')}, coalesce(f.status, ''), "
+            f"{', '.join(aggregates)} FROM feedback f WHERE {condition.format(row='f')} "
+            "GROUP BY 2, 3"
+        )
+    return statements
+
+
+def _rebuild(connection):
+    for statement in _rebuild_statements():
+        connection.execute(text(statement))
+    return connection.execute(
+        text(f"SELECT coalesce(sum(feedback_count), 0) FROM {STATS_TABLE} WHERE dimension = 'total'")
+    ).scalar()
+
+
+def ensure_feedback_stats():
+    # Triggers keep the rollup exact for ORM writes and set-based UPDATE/DELETE statements alike.
+    if not analytics_available():
+        return False
+    with db.engine.begin() as connection:
+        existing = {
+            row[0]
+            for row in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            )
+        }
+        if "feedback" not in existing or STATS_TABLE not in existing:
+            return False
+        missing = [name for name in STATS_TRIGGERS if name not in existing]
+        if not missing:
+            return True
+        for name in missing:
+            connection.execute(text(STATS_TRIGGERS[name]))
+        # A trigger was (re)created, so writes may have been missed: recount from scratch.
+        _rebuild(connection)
+        print("INFO: Rebuilt feedback analytics rollup.")
+    return True
+
+
+def rebuild_feedback_stats():
+    with db.engine.begin() as connection:
+        return _rebuild(connection)
+
+
+def _empty_entry():
+    return {
+        "feedback_count": 0,
+        "flagged_count": 0,
+        "by_status": {},
+        "sums": [0] * len(RATING_FIELDS),
+        "rated": [0] * len(RATING_FIELDS),
+    }
+
+
+def _add_stat(entry, stat):
+    entry["feedback_count"] += stat.feedback_count
+    entry["flagged_count"] += stat.flagged_count
+    entry["by_status"][stat.status] = stat.feedback_count
+    for index, field in enumerate(RATING_FIELDS):
+        entry["sums"][index] += getattr(stat, f"rating_{field}_sum")
+        entry["rated"][index] += getattr(stat, f"rating_{field}_count")
+
+
+def _finish_entry(entry):
+    count = entry["feedback_count"]
+    return {
+        "feedback_count": count,
+        "by_status": entry["by_status"],
+        "pending_escalations": entry["by_status"].get(ESCALATION_STATUS, 0),
+        "flagged_count": entry["flagged_count"],
+        "escalation_rate": round(entry["flagged_count"] / count, 4) if count else None,
+        "average_ratings": {
+            field: (
+                round(entry["sums"][index] / entry["rated"][index], 2)
+                if entry["rated"][index]
+                else None
+            )
+            for index, field in enumerate(RATING_FIELDS)
+        },
+    }
+
+
+def feedback_analytics(weeks=DEFAULT_ANALYTICS_WEEKS, today=None):
+    # Reads only rollup rows: the cost depends on the number of statuses, categories,
+    # teachers and weeks, never on the number of feedback entries.
+    today = today or date.today()
+    first_week = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    stats = FeedbackStat.query.filter(
+        FeedbackStat.feedback_count != 0,
+        db.or_(FeedbackStat.dimension != "week", FeedbackStat.bucket >= first_week.isoformat()),
+    ).all()
+
+    entries = defaultdict(lambda: defaultdict(_empty_entry))
+    for stat in stats:
+        _add_stat(entries[stat.dimension][stat.bucket], stat)
+
+    category_titles = dict(db.session.query(Category.slug, Category.title))
+    teacher_names = dict(db.session.query(Teacher.id, Teacher.name))
+    by_category = [
+        {"category": key, "title": category_titles.get(key, key), **_finish_entry(entry)}
+        for key, entry in entries["category"].items()
+    ]
+    by_teacher = [
+        {"teacher_id": int(key), "teacher_name": teacher_names.get(int(key)), **_finish_entry(entry)}
+        for key, entry in entries["teacher"].items()
+    ]
+    by_week = [
+        {"week_start": key, **_finish_entry(entry)}
+        for key, entry in sorted(entries["week"].items())
+    ]
+    return {
+        "overall": _finish_entry(entries["total"][""]),
+        "by_category": sorted(by_category, key=lambda item: -item["feedback_count"]),
+        "by_teacher": sorted(by_teacher, key=lambda item: -item["feedback_count"]),
+        "by_week": by_week,
+        "weeks": weeks,
+    }
@@ -1,7 +1,8 @@
 from flask import g
 
 from ..extensions import db
-from ..models import AuditLog, FeedbackStatusHistory
+from ..models import AuditLog, FeedbackStatusHistory, User
+from .feedback_queries import date_range_filters
 
 
 def log_audit(action, target_type=None, target_id=None, details=None, actor_id=None):
@@ -29,3 +30,41 @@ def record_feedback_status(feedback_id, old_status, new_status, actor_id=None, n
         note=note,
     )
     db.session.add(entry)
+
+
+def audit_log_filters(args):
+    # Raises ValueError for a malformed actor id or date.
+    criteria = []
+    actions = [action.strip() for action in (args.get("action") or "").split(",") if action.strip()]
+    if actions:
+        criteria.append(AuditLog.action.in_(actions))
+    if args.get("target_type"):
+        criteria.append(AuditLog.target_type == args["target_type"])
+    if args.get("target_id"):
+        criteria.append(AuditLog.target_id == args["target_id"])
+    if args.get("actor_user_id"):
+        criteria.append(AuditLog.actor_user_id == int(args["actor_user_id"]))
+    criteria.extend(date_range_filters(AuditLog.created_at, args))
+    return criteria
+
+
+def audit_log_query(criteria):
+    # Actor names come from the same query, not one lookup per row.
+    return (
+        db.session.query(AuditLog, User.name)
+        .outerjoin(User, User.id == AuditLog.actor_user_id)
+        .filter(*criteria)
+    )
+
+
+def serialize_audit_log(log, actor_name=None):
+    return {
+        "id": log.id,
+        "actor_user_id": log.actor_user_id,
+        "actor_name": actor_name,
+        "action": log.action,
+        "target_type": log.target_type,
+        "target_id": log.target_id,
+        "details": log.details,
+        "created_at": log.created_at.isoformat() if log.created_at else None,
+    }
@@ -0,0 +1,122 @@
+from sqlalchemy import insert
+
+from ..extensions import db
+from ..models import AuditLog, Feedback, FeedbackStatusHistory, SummaryJobQueue
+from .dedup import forget_feedback_ids, reroot_duplicates
+
+BULK_MODERATION_MAX_IDS = 500
+DELETED_STATUS = "Deleted"
+
+# action -> (new status, is_summary_approved, audit action)
+BULK_ACTIONS = {
+    "approve": ("Approved", True, "feedback_approved"),
+    "retract": ("Retracted by Admin", False, "feedback_retracted"),
+    "delete": (DELETED_STATUS, None, "feedback_deleted"),
+}
+
+
+def parse_bulk_ids(raw_ids):
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError("feedback_ids must be a non-empty list.")
+    try:
+        feedback_ids = list(dict.fromkeys(int(value) for value in raw_ids))
+    except (TypeError, ValueError):
+        raise ValueError("feedback_ids must be integers.") from None
+    if len(feedback_ids) > BULK_MODERATION_MAX_IDS:
+        raise ValueError(
+            f"At most {BULK_MODERATION_MAX_IDS} feedback ids can be moderated at once."
+        )
+    return feedback_ids
+
+
+def _summary_target(category, teacher_id):
+    if category == "teacher":
+        return "teacher", str(teacher_id)
+    return "category", category
+
+
+def bulk_moderate_feedback(action, feedback_ids, actor_id=None, note=None):
+    # Everything is added to the session and flushed as a handful of statements; the caller
+    # commits once, so the whole batch lands (or rolls back) as one transaction.
+    if action not in BULK_ACTIONS:
+        raise ValueError("action must be one of: approve, retract, delete.")
+    new_status, approved, audit_action = BULK_ACTIONS[action]
+
+    rows = (
+        db.session.query(Feedback.id, Feedback.status, Feedback.category, Feedback.teacher_id)
+        .filter(Feedback.id.in_(feedback_ids))
+        .all()
+    )
+    found = {row.id for row in rows}
+    missing = [feedback_id for feedback_id in feedback_ids if feedback_id not in found]
+    if action == "delete":
+        changed = rows
+    else:
+        changed = [row for row in rows if row.status != new_status]
+    changed_ids = [row.id for row in changed]
+    unchanged = [row.id for row in rows if row.status == new_status and action != "delete"]
+    if not changed:
+        return {"action": action, "changed": [], "unchanged": unchanged, "missing": missing, "jobs": 0}
+
+    note = note or f"Admin bulk {action}"
+    db.session.execute(
+        insert(FeedbackStatusHistory),
+        [
+            {
+                "feedback_id": row.id,
+                "old_status": row.status,
+                "new_status": new_status,
+                "changed_by_user_id": actor_id,
+                "note": note,
+            }
+            for row in changed
+        ],
+    )
+    db.session.execute(
+        insert(AuditLog),
+        [
+            {
+                "actor_user_id": actor_id,
+                "action": audit_action,
+                "target_type": "feedback",
+                "target_id": str(row.id),
+                "details": (
+                    {"previous_status": row.status, "bulk": True}
+                    if action == "delete"
+                    else {"previous_status": row.status, "new_status": new_status, "bulk": True}
+                ),
+            }
+            for row in changed
+        ],
+    )
+
+    if action == "delete":
+        SummaryJobQueue.query.filter(SummaryJobQueue.feedback_id.in_(changed_ids)).delete(
+            synchronize_session=False
+        )
+        forget_feedback_ids(changed_ids)
+        Feedback.query.filter(Feedback.id.in_(changed_ids)).delete(synchronize_session=False)
+    else:
+        Feedback.query.filter(Feedback.id.in_(changed_ids)).update(
+            {Feedback.status: new_status, Feedback.is_summary_approved: approved},
+            synchronize_session=False,
+        )
+        if not approved:
+            reroot_duplicates(changed_ids)
+
+    # One job per affected teacher/category; the worker rebuilds from the current approved set.
+    targets = sorted({_summary_target(row.category, row.teacher_id) for row in changed})
+    db.session.execute(
+        insert(SummaryJobQueue),
+        [
+            {"job_type": job_type, "target_id": target_id, "feedback_id": None, "status": "pending"}
+            for job_type, target_id in targets
+        ],
+    )
+    return {
+        "action": action,
+        "changed": changed_ids,
+        "unchanged": unchanged,
+        "missing": missing,
+        "jobs": len(targets),
+    }
@@ -3,6 +3,8 @@ import re
 from sqlalchemy import inspect, text
 
 from ..extensions import db
+from .analytics import ensure_feedback_stats
+from .search import ensure_feedback_search
 
 
 def ensure_schema_updates():
@@ -17,10 +19,38 @@ def ensure_schema_updates():
         ],
         "feedback": [
             ("created_at", "DATETIME"),
+            ("text_fingerprint", "BIGINT"),
+            ("duplicate_of_id", "INTEGER"),
+            ("screened_by", "VARCHAR(30)"),
         ],
         "teachers": [
             ("is_active", "BOOLEAN"),
         ],
+        "teacher_summary": [
+            ("summarized_feedback_ids", "JSON"),
+            ("last_full_rebuild_at", "DATETIME"),
+            ("input_fingerprint", "VARCHAR(64)"),
+            ("response_payload", "JSON"),
+        ],
+        "category_summary": [
+            ("summarized_feedback_ids", "JSON"),
+            ("last_full_rebuild_at", "DATETIME"),
+            ("input_fingerprint", "VARCHAR(64)"),
+            ("response_payload", "JSON"),
+        ],
+        "monthly_digests": [
+            ("status", "VARCHAR(20) DEFAULT 'complete'"),
+            ("segments", "JSON"),
+        ],
+        "summary_chunk_cache": [
+            ("last_used_at", "DATETIME"),
+        ],
+        "maintenance_runs": [
+            ("owner", "VARCHAR(64)"),
+        ],
+        "summary_job_queue": [
+            ("run_after", "DATETIME"),
+        ],
     }
     with db.engine.begin() as connection:
         for table, columns in schema_updates.items():
@@ -40,6 +70,31 @@ def ensure_schema_updates():
                         f"WARNING: Could not add column '{column_name}' to '{table}': {exc}"
                     )
 
+    # Indexes declared on the models are only created with new tables; add them to old ones.
+    schema_indexes = [
+        ("ix_feedback_created_at", "feedback", "created_at"),
+        ("ix_feedback_status_category", "feedback", "status, category"),
+        ("ix_feedback_submitter_status", "feedback", "submitted_by_user_id, status"),
+        ("ix_audit_logs_created_at", "audit_logs", "created_at"),
+        ("ix_audit_logs_action", "audit_logs", "action"),
+        ("ix_audit_logs_actor_user_id", "audit_logs", "actor_user_id"),
+        ("ix_audit_logs_target", "audit_logs", "target_type, target_id"),
+        ("ix_summary_chunk_cache_last_used_at", "summary_chunk_cache", "last_used_at"),
+    ]
+    with db.engine.begin() as connection:
+        for index_name, table, columns in schema_indexes:
+            if table not in table_names:
+                continue
+            try:
+                connection.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+                )
+            except Exception as exc:
+                print(f"WARNING: Could not create index '{index_name}': {exc}")
+
+    ensure_feedback_search()
+    ensure_feedback_stats()
+
 
 def normalize_slug(value):
     value = (value or "").strip().lower()
@@ -0,0 +1,250 @@
+import hashlib
+import re
+import threading
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Feedback
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+FINGERPRINT_BITS = 64
+FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
+INDEX_SIZE_PER_TARGET = 200
+# moderation.RESCREEN_STATUS; moderation imports this module, so it is repeated here.
+PENDING_RESCREEN_STATUS = "Pending Re-screen"
+
+IndexEntry = namedtuple("IndexEntry", "feedback_id user_id fingerprint created_at root_id")
+DuplicateMatch = namedtuple("DuplicateMatch", "feedback_id root_id distance same_user")
+
+_index = {}
+_index_lock = threading.Lock()
+
+
+def simhash(text):
+    tokens = TOKEN_RE.findall((text or "").lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if (value >> bit) & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    # SQLite integers are signed 64-bit.
+    if fingerprint >= 1 << (FINGERPRINT_BITS - 1):
+        fingerprint -= 1 << FINGERPRINT_BITS
+    return fingerprint
+
+
+def hamming_distance(left, right):
+    return bin((left ^ right) & FINGERPRINT_MASK).count("1")
+
+
+def target_key_for(category, teacher_id=None):
+    if teacher_id:
+        return f"teacher:{teacher_id}"
+    return f"category:{category}"
+
+
+def _window():
+    hours = current_app.config.get("DUPLICATE_WINDOW_HOURS", 72)
+    return timedelta(hours=hours)
+
+
+def _pool_filter():
+    # Only rows that count (or may yet count) in summaries can be duplicate roots;
+    # an escalated root would hide every later near-duplicate from summaries.
+    return db.or_(
+        db.and_(Feedback.is_summary_approved.is_(True), Feedback.is_inappropriate.is_(False)),
+        Feedback.status == PENDING_RESCREEN_STATUS,
+    )
+
+
+def _load_target(target_key):
+    kind, _, value = target_key.partition(":")
+    query = db.session.query(
+        Feedback.id,
+        Feedback.submitted_by_user_id,
+        Feedback.text_fingerprint,
+        Feedback.created_at,
+        Feedback.duplicate_of_id,
+    ).filter(
+        Feedback.text_fingerprint.isnot(None),
+        Feedback.created_at >= datetime.utcnow() - _window(),
+        _pool_filter(),
+    )
+    if kind == "teacher":
+        query = query.filter(Feedback.teacher_id == int(value))
+    else:
+        query = query.filter(Feedback.category == value, Feedback.teacher_id.is_(None))
+    rows = query.order_by(Feedback.id.desc()).limit(INDEX_SIZE_PER_TARGET).all()
+    entries = deque(maxlen=INDEX_SIZE_PER_TARGET)
+    for row in reversed(rows):
+        entries.append(IndexEntry(row[0], row[1], row[2], row[3], row[4] or row[0]))
+    return entries
+
+
+def _entries_for(target_key):
+    entries = _index.get(target_key)
+    if entries is None:
+        entries = _load_target(target_key)
+        _index[target_key] = entries
+    return entries
+
+
+def _index_matches(target_key, fingerprint, user_id):
+    max_distance = current_app.config.get("DUPLICATE_MAX_DISTANCE", 3)
+    cutoff = datetime.utcnow() - _window()
+    matches = []
+    with _index_lock:
+        entries = _entries_for(target_key)
+        while entries and entries[0].created_at and entries[0].created_at < cutoff:
+            entries.popleft()
+        for entry in reversed(entries):
+            distance = hamming_distance(entry.fingerprint, fingerprint)
+            if distance <= max_distance:
+                matches.append(
+                    DuplicateMatch(entry.feedback_id, entry.root_id, distance, entry.user_id == user_id)
+                )
+    return matches
+
+
+def _live_root_ids(root_ids):
+    rows = db.session.query(Feedback.id).filter(
+        Feedback.id.in_(root_ids), Feedback.duplicate_of_id.is_(None), _pool_filter()
+    )
+    return {row.id for row in rows}
+
+
+def find_near_duplicate(target_key, fingerprint, user_id):
+    # The index is per process: the MCP server and extra workers retract, escalate and
+    # delete rows without updating it, so every matched root is confirmed in the database.
+    for attempt in range(2):
+        matches = _index_matches(target_key, fingerprint, user_id)
+        if not matches:
+            return None
+        root_ids = {match.root_id for match in matches}
+        live_roots = _live_root_ids(root_ids)
+        if attempt or live_roots == root_ids:
+            break
+        # Stale entries: reload this target from the database once and match again.
+        with _index_lock:
+            _index.pop(target_key, None)
+    matches = [match for match in matches if match.root_id in live_roots]
+    for match in matches:
+        if match.same_user:
+            return match
+    return min(matches, key=lambda match: match.root_id, default=None)
+
+
+def _after_commit(callback):
+    # The in-process index must never run ahead of the database: changes wait in the
+    # session and are applied only once its transaction commits.
+    session = db.session()
+    if not session.in_transaction():
+        # Without a transaction, rollback() is a no-op that fires no events.
+        session.begin()
+    session.info.setdefault("dedup_index_changes", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_index_changes(session):
+    for callback in session.info.pop("dedup_index_changes", []):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_index_changes(session, previous_transaction):
+    # Fires even when no statement ran yet; a savepoint rollback keeps the outer
+    # transaction (and its pending changes) alive.
+    if not session.in_transaction():
+        session.info.pop("dedup_index_changes", None)
+
+
+def remember_fingerprint(target_key, feedback_id, user_id, fingerprint, root_id=None):
+    def apply():
+        with _index_lock:
+            _entries_for(target_key).append(
+                IndexEntry(
+                    feedback_id, user_id, fingerprint, datetime.utcnow(), root_id or feedback_id
+                )
+            )
+
+    _after_commit(apply)
+
+
+def reroot_duplicates(root_ids, deleted=False):
+    # Called when roots leave the summary pool (retracted, escalated or deleted). Each
+    # root's earliest eligible duplicate (else its earliest) becomes the new root, so the
+    # cluster still counts once. A surviving old root becomes a duplicate of the new root.
+    root_ids = set(root_ids)
+    if not root_ids:
+        return {}
+    clusters = {}
+    for row in (
+        db.session.query(
+            Feedback.id,
+            Feedback.duplicate_of_id,
+            Feedback.is_summary_approved,
+            Feedback.is_inappropriate,
+        )
+        .filter(Feedback.duplicate_of_id.in_(root_ids))
+        .order_by(Feedback.id)
+    ):
+        clusters.setdefault(row.duplicate_of_id, []).append(row)
+
+    new_roots = {}
+    for root_id, members in clusters.items():
+        eligible = [row for row in members if row.is_summary_approved and not row.is_inappropriate]
+        new_roots[root_id] = (eligible or members)[0].id
+    if new_roots:
+        Feedback.query.filter(Feedback.id.in_(list(new_roots.values()))).update(
+            {Feedback.duplicate_of_id: None}, synchronize_session=False
+        )
+        for root_id, new_root in new_roots.items():
+            moved = [root_id] if not deleted else []
+            Feedback.query.filter(
+                db.or_(Feedback.duplicate_of_id == root_id, Feedback.id.in_(moved))
+            ).update({Feedback.duplicate_of_id: new_root}, synchronize_session=False)
+
+    def apply():
+        with _index_lock:
+            for target_key, entries in _index.items():
+                kept = deque(maxlen=INDEX_SIZE_PER_TARGET)
+                for entry in entries:
+                    if deleted and entry.feedback_id in root_ids:
+                        continue
+                    if entry.root_id in root_ids:
+                        new_root = new_roots.get(entry.root_id)
+                        # A root with nothing left to point at leaves the index.
+                        if new_root is None:
+                            continue
+                        entry = entry._replace(root_id=new_root)
+                    kept.append(entry)
+                _index[target_key] = kept
+
+    _after_commit(apply)
+    return new_roots
+
+
+def forget_feedback(feedback_id):
+    forget_feedback_ids([feedback_id])
+
+
+def forget_feedback_ids(feedback_ids):
+    reroot_duplicates(feedback_ids, deleted=True)
+
+
+def reset_duplicate_index():
+    with _index_lock:
+        _index.clear()
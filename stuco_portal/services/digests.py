@@ -0,0 +1,141 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import MonthlyDigest
+from .ai.summaries import (
+    get_month_date_range,
+    is_digest_complete,
+    month_key_for_date,
+    run_monthly_digest,
+)
+
+digest_thread = None
+backfill_thread = None
+
+
+def is_digest_thread_running():
+    return digest_thread is not None and digest_thread.is_alive()
+
+
+def start_digest_thread(app, target_date):
+    # Readers never wait on generation; run_monthly_digest's claim keeps other
+    # processes (and the worker) from starting a second run for the same month.
+    global digest_thread
+    if is_digest_thread_running():
+        return False
+
+    def target():
+        with app.app_context():
+            try:
+                run_monthly_digest(target_date)
+            except Exception as exc:
+                db.session.rollback()
+                print(f"DIGEST: Monthly digest generation failed: {exc}")
+
+    digest_thread = threading.Thread(target=target, daemon=True)
+    digest_thread.start()
+    return True
+
+
+def serialize_digest(digest):
+    return {
+        "month_key": digest.month_key,
+        "coverage": f"{digest.start_date.isoformat()} to {digest.end_date.isoformat()}",
+        "generated_at": digest.generated_at.isoformat() if digest.generated_at else None,
+        "feedback_count": digest.feedback_count or 0,
+        "positive_bullets": digest.positive_bullets or [],
+        "actionable_bullets": digest.actionable_bullets or [],
+        "segments": digest.segments or {"category": [], "year_level": []},
+    }
+
+
+def parse_month_key(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def months_between(start_month, end_month):
+    months = []
+    current = start_month.replace(day=1)
+    while current <= end_month:
+        months.append(current)
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+
+def plan_digest_backfill(start_month, end_month, today=None):
+    # Only months that have fully ended; the current month is left to month-end generation.
+    today = today or date.today()
+    months = [
+        month for month in months_between(start_month, end_month)
+        if get_month_date_range(month)[1] < today
+    ]
+    keys = [month_key_for_date(month) for month in months]
+    present = {
+        digest.month_key
+        for digest in MonthlyDigest.query.filter(MonthlyDigest.month_key.in_(keys))
+        if is_digest_complete(digest)
+    }
+    return {
+        "missing": [key for key in keys if key not in present],
+        "present": [key for key in keys if key in present],
+    }
+
+
+def _backfill_month(app, month_key):
+    with app.app_context():
+        digest = run_monthly_digest(get_month_date_range(parse_month_key(month_key))[1])
+        # None (claim lost and the row already gone) or an unfinished row: skipped.
+        return is_digest_complete(digest)
+
+
+def backfill_monthly_digests(app, month_keys, workers=None):
+    # DIGEST_BACKFILL_WORKERS is a ceiling: callers (API body, CLI) may only ask for fewer.
+    max_workers = max(1, current_app.config.get("DIGEST_BACKFILL_WORKERS", 2))
+    workers = max(1, min(workers or max_workers, max_workers))
+    print(f"DIGEST: Backfilling {len(month_keys)} monthly digests with {workers} workers.")
+    result = {"generated": [], "skipped": [], "failed": {}}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_backfill_month, app, key): key for key in month_keys}
+        for future in as_completed(futures):
+            month_key = futures[future]
+            error = future.exception()
+            if error:
+                result["failed"][month_key] = str(error)
+                print(f"DIGEST: Backfill for {month_key} failed: {error}")
+            elif future.result():
+                result["generated"].append(month_key)
+            else:
+                # Another process holds the claim for this month.
+                result["skipped"].append(month_key)
+    result["generated"].sort()
+    print(
+        f"DIGEST: Backfill finished: {len(result['generated'])} generated, "
+        f"{len(result['skipped'])} in progress elsewhere, {len(result['failed'])} failed."
+    )
+    return result
+
+
+def is_backfill_running():
+    return backfill_thread is not None and backfill_thread.is_alive()
+
+
+def start_backfill_thread(app, month_keys, workers=None):
+    global backfill_thread
+    if is_backfill_running():
+        return False
+
+    def target():
+        with app.app_context():
+            try:
+                backfill_monthly_digests(app, month_keys, workers=workers)
+            except Exception as exc:
+                db.session.rollback()
+                print(f"DIGEST: Backfill stopped: {exc}")
+
+    backfill_thread = threading.Thread(target=target, daemon=True)
+    backfill_thread.start()
+    return True
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from ..extensions import db
+from ..models import Feedback, Teacher
+from .feedback_queries import STREAM_BATCH_SIZE, date_range_filters
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# Submitter identity is deliberately not exportable; feedback is anonymous to STUCO readers.
+EXPORT_FIELDS = {
+    "id": Feedback.id,
+    "created_at": Feedback.created_at,
+    "status": Feedback.status,
+    "category": Feedback.category,
+    "teacher_id": Feedback.teacher_id,
+    "teacher_name": Teacher.name,
+    "year_level_submitted": Feedback.year_level_submitted,
+    "feedback_text": Feedback.feedback_text,
+    "context_detail": Feedback.context_detail,
+    "rating_clarity": Feedback.rating_clarity,
+    "rating_pacing": Feedback.rating_pacing,
+    "rating_resources": Feedback.rating_resources,
+    "rating_support": Feedback.rating_support,
+    "toxicity_score": Feedback.toxicity_score,
+    "is_inappropriate": Feedback.is_inappropriate,
+    "is_summary_approved": Feedback.is_summary_approved,
+    "screened_by": Feedback.screened_by,
+    "duplicate_of_id": Feedback.duplicate_of_id,
+}
+DEFAULT_EXPORT_FIELDS = [
+    "id",
+    "created_at",
+    "status",
+    "category",
+    "teacher_name",
+    "year_level_submitted",
+    "feedback_text",
+    "context_detail",
+    "rating_clarity",
+    "rating_pacing",
+    "rating_resources",
+    "rating_support",
+]
+# Spreadsheet apps run cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parse_export_args(args):
+    # Returns (format, fields, criteria); raises ValueError for bad input.
+    export_format = (args.get("format") or "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("format must be csv or ndjson.")
+    fields = [field.strip() for field in (args.get("fields") or "").split(",") if field.strip()]
+    fields = list(dict.fromkeys(fields)) or DEFAULT_EXPORT_FIELDS
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown)}.")
+
+    try:
+        criteria = date_range_filters(Feedback.created_at, args)
+        if args.get("teacher_id"):
+            criteria.append(Feedback.teacher_id == int(args["teacher_id"]))
+    except ValueError:
+        raise ValueError("teacher_id must be an integer; from/to must be ISO dates.") from None
+    if args.get("status"):
+        criteria.append(Feedback.status == args["status"])
+    if args.get("category") and args["category"] != "all":
+        criteria.append(Feedback.category == args["category"])
+    return export_format, fields, criteria
+
+
+def _export_rows(fields, criteria, batch_size):
+    # select_from keeps the join anchored when only joined columns (e.g. teacher_name) are picked.
+    query = db.session.query(*(EXPORT_FIELDS[field] for field in fields)).select_from(Feedback)
+    if "teacher_name" in fields:
+        query = query.outerjoin(Teacher, Teacher.id == Feedback.teacher_id)
+    # yield_per streams from the cursor in batches instead of loading the whole result.
+    return query.filter(*criteria).order_by(Feedback.id).yield_per(batch_size)
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_feedback_export(export_format, fields, criteria, batch_size=STREAM_BATCH_SIZE):
+    # Yields encoded chunks of about one batch each, so memory stays flat for any export size.
+    rows = _export_rows(fields, criteria, batch_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(fields)
+
+    pending = 0
+    for row in rows:
+        if export_format == "csv":
+            writer.writerow([_csv_value(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, map(_json_value, row))), ensure_ascii=False))
+            buffer.write("\n")
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from itertools import islice
+
+from ..extensions import db
+from ..models import Feedback
+
+STREAM_BATCH_SIZE = 500
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def summary_eligible_filters():
+    return (
+        Feedback.is_inappropriate.is_(False),
+        Feedback.is_summary_approved.is_(True),
+        Feedback.duplicate_of_id.is_(None),
+    )
+
+
+def target_filter(summary_type, target_id):
+    if summary_type == "teacher":
+        return Feedback.teacher_id == int(target_id)
+    return Feedback.category == target_id
+
+
+def created_between_filters(start_dt, end_dt):
+    return (Feedback.created_at >= start_dt, Feedback.created_at <= end_dt)
+
+
+def stream_feedback_rows(columns, criteria, order_by=None, batch_size=STREAM_BATCH_SIZE):
+    # Column tuples only (no ORM hydration), fetched from the cursor in batches.
+    query = (
+        db.session.query(*columns)
+        .filter(*criteria)
+        .order_by(order_by if order_by is not None else Feedback.id)
+        .yield_per(batch_size)
+    )
+    for row in query:
+        yield row
+
+
+def stream_feedback_texts(criteria, order_by=None, batch_size=STREAM_BATCH_SIZE):
+    for row in stream_feedback_rows((Feedback.feedback_text,), criteria, order_by, batch_size):
+        yield row[0]
+
+
+def fetch_feedback_texts(feedback_ids):
+    if not feedback_ids:
+        return []
+    return [
+        row[0]
+        for row in db.session.query(Feedback.feedback_text)
+        .filter(Feedback.id.in_(sorted(feedback_ids)))
+        .order_by(Feedback.id)
+        .all()
+    ]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def date_range_filters(column, args):
+    # `from`/`to` accept YYYY-MM-DD or a full ISO timestamp; a bare `to` date covers that
+    # whole day. Raises ValueError for anything else.
+    criteria = []
+    if args.get("from"):
+        criteria.append(column >= datetime.fromisoformat(args["from"]))
+    if args.get("to"):
+        end = datetime.fromisoformat(args["to"])
+        if len(args["to"]) == 10:
+            criteria.append(column < end + timedelta(days=1))
+        else:
+            criteria.append(column <= end)
+    return criteria
+
+
+def parse_page_args(args, default_limit=DEFAULT_PAGE_SIZE):
+    # Raises ValueError for a non-integer cursor or limit.
+    cursor = args.get("cursor")
+    limit = args.get("limit")
+    cursor = int(cursor) if cursor else None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE)) if limit else default_limit
+    return cursor, limit
+
+
+def keyset_page(query, cursor, limit, id_of=lambda row: row.id, id_column=Feedback.id):
+    # Keyset on the id column (newest first): each page is an index range scan, however deep.
+    if cursor is not None:
+        query = query.filter(id_column < cursor)
+    rows = query.order_by(id_column.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(id_of(rows[-1]))
+    return rows, next_cursor
+
+
+def count_feedback(criteria):
+    # Filters on indexed columns only, so SQLite answers from the index without table reads.
+    return db.session.query(db.func.count(Feedback.id)).filter(*criteria).scalar() or 0
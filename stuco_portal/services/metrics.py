@@ -0,0 +1,18 @@
+import threading
+from collections import Counter
+from datetime import datetime
+
+_counters = Counter()
+_lock = threading.Lock()
+_started_at = datetime.utcnow()
+
+
+def increment_metric(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def metrics_snapshot():
+    with _lock:
+        counters = dict(_counters)
+    return {"since": _started_at.isoformat() + "Z", "counters": counters}
@@ -0,0 +1,276 @@
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from sqlalchemy import or_
+
+from ..extensions import db
+from ..models import Feedback, FeedbackStatusHistory, MaintenanceRun, SummaryJobQueue
+from .ai.moderation import (
+    FAILSAFE_SCREENER,
+    MOCK_SCREENER,
+    RESCREEN_NOTE,
+    RESCREEN_STATUS,
+    run_toxicity_batch,
+)
+from .ai.providers import get_provider
+from .audit import record_feedback_status
+from .dedup import reroot_duplicates
+
+RESCREEN_TASK = "bulk_rescreen"
+BULK_RESCREEN_NOTE = "Bulk re-screen"
+BULK_CLEAR_NOTE = "Bulk re-screen cleared failsafe escalation"
+# Status changes made by screening itself; any other change after submission is a moderator's.
+SCREENING_NOTES = (RESCREEN_NOTE, BULK_RESCREEN_NOTE, BULK_CLEAR_NOTE)
+FAILED_SAMPLE_SIZE = 50
+
+
+def _rescreen_candidates():
+    return Feedback.query.filter(
+        or_(
+            Feedback.screened_by.is_(None),
+            Feedback.screened_by.in_([MOCK_SCREENER, FAILSAFE_SCREENER]),
+        ),
+        Feedback.status != RESCREEN_STATUS,
+    )
+
+
+def serialize_run(run):
+    if not run:
+        return None
+    percent = 100.0 if run.status == "complete" else 0.0
+    if run.total and run.status != "complete":
+        percent = round(min(run.processed or 0, run.total) * 100.0 / run.total, 1)
+    return {
+        "id": run.id,
+        "task": run.task,
+        "status": run.status,
+        "cursor": run.cursor,
+        "processed": run.processed or 0,
+        "changed": run.changed or 0,
+        "total": run.total or 0,
+        "percent": percent,
+        "details": run.details or {},
+        "last_error": run.last_error,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "updated_at": run.updated_at.isoformat() if run.updated_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
+
+
+def get_latest_rescreen_run():
+    return (
+        MaintenanceRun.query.filter_by(task=RESCREEN_TASK)
+        .order_by(MaintenanceRun.id.desc())
+        .first()
+    )
+
+
+def start_rescreen_run():
+    run = get_latest_rescreen_run()
+    if run and run.status in {"running", "paused", "failed"}:
+        run.status = "running"
+        run.last_error = None
+    else:
+        run = MaintenanceRun(
+            task=RESCREEN_TASK,
+            status="running",
+            cursor="0",
+            total=_rescreen_candidates().count(),
+        )
+        db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def pause_rescreen_run():
+    run = get_latest_rescreen_run()
+    if run and run.status == "running":
+        run.status = "paused"
+        db.session.commit()
+    return run
+
+
+def _summary_job(feedback_item):
+    job_type = "teacher" if feedback_item.category == "teacher" else "category"
+    target_id = str(feedback_item.teacher_id) if job_type == "teacher" else feedback_item.category
+    return SummaryJobQueue(job_type=job_type, target_id=target_id, feedback_id=feedback_item.id)
+
+
+def _moderator_decided_ids(feedback_ids):
+    # Ids whose latest status change was a moderator's (admin UI, bulk action or MCP)
+    # rather than the submission or a screening pass.
+    if not feedback_ids:
+        return set()
+    latest_ids = (
+        db.session.query(db.func.max(FeedbackStatusHistory.id))
+        .filter(FeedbackStatusHistory.feedback_id.in_(feedback_ids))
+        .group_by(FeedbackStatusHistory.feedback_id)
+    )
+    rows = db.session.query(FeedbackStatusHistory.feedback_id).filter(
+        FeedbackStatusHistory.id.in_(latest_ids),
+        FeedbackStatusHistory.old_status.isnot(None),
+        or_(
+            FeedbackStatusHistory.note.is_(None),
+            FeedbackStatusHistory.note.notin_(SCREENING_NOTES),
+        ),
+    )
+    return {row[0] for row in rows}
+
+
+def _apply_verdict(feedback_item, verdict, moderator_decided=False):
+    # Re-screening tightens approved items. The one thing it relaxes is an escalation that
+    # only the fail-closed default made: a real model verdict of "clean" returns it to the
+    # pool. Mock keyword escalations (which include safeguarding terms) stay with admins,
+    # and a moderator's own decision is never overturned; only the score is refreshed.
+    previous_screener = feedback_item.screened_by
+    feedback_item.toxicity_score = verdict["toxicity_score"]
+    feedback_item.screened_by = verdict["screened_by"]
+    if moderator_decided:
+        return False
+    feedback_item.is_inappropriate = verdict["is_inappropriate"]
+
+    if (
+        not verdict["is_inappropriate"]
+        and previous_screener == FAILSAFE_SCREENER
+        and feedback_item.status == "Screened - Escalation"
+    ):
+        feedback_item.status = "Approved"
+        feedback_item.is_summary_approved = True
+        record_feedback_status(
+            feedback_item.id,
+            "Screened - Escalation",
+            feedback_item.status,
+            note=BULK_CLEAR_NOTE,
+        )
+        db.session.add(_summary_job(feedback_item))
+        return True
+
+    if not verdict["is_inappropriate"] or feedback_item.status != "Approved":
+        return False
+
+    feedback_item.status = "Screened - Escalation"
+    feedback_item.is_summary_approved = False
+    reroot_duplicates([feedback_item.id])
+    record_feedback_status(
+        feedback_item.id, "Approved", feedback_item.status, note=BULK_RESCREEN_NOTE
+    )
+    db.session.add(_summary_job(feedback_item))
+    return True
+
+
+def advance_rescreen_run(provider=None):
+    run = MaintenanceRun.query.filter_by(task=RESCREEN_TASK, status="running").first()
+    if not run:
+        return None
+
+    per_minute = max(1, current_app.config.get("RESCREEN_BATCHES_PER_MINUTE", 6))
+    now = datetime.utcnow()
+    if run.last_batch_at and now - run.last_batch_at < timedelta(seconds=60.0 / per_minute):
+        return run
+
+    provider = provider or get_provider()
+    if not provider.is_configured():
+        run.status = "paused"
+        run.last_error = "AI provider key missing; re-screening paused."
+        db.session.commit()
+        return run
+
+    batch_size = max(1, current_app.config.get("RESCREEN_BATCH_SIZE", 20))
+    max_attempts = max(1, current_app.config.get("RESCREEN_MAX_ATTEMPTS", 3))
+    details = dict(run.details or {})
+    # Items with unusable verdicts wait here (id -> attempts) while the cursor moves on.
+    retry = {int(key): value for key, value in (details.get("retry") or {}).items()}
+    # Items given up on are counted; only a capped sample of their ids is kept.
+    failed_count = details.get("failed_count", 0)
+    failed_sample = list(details.get("failed_sample") or [])
+
+    batch = []
+    if retry:
+        # Entries deleted or already resolved elsewhere need no further attempts.
+        still_pending = {
+            row[0]
+            for row in _rescreen_candidates()
+            .with_entities(Feedback.id)
+            .filter(Feedback.id.in_(list(retry)))
+        }
+        retry = {key: value for key, value in retry.items() if key in still_pending}
+        batch = (
+            _rescreen_candidates()
+            .filter(Feedback.id.in_(sorted(retry)[:batch_size]))
+            .order_by(Feedback.id)
+            .all()
+        )
+    cursor = int(run.cursor or 0)
+    new_items = []
+    if len(batch) < batch_size:
+        new_items = (
+            _rescreen_candidates()
+            .filter(Feedback.id > cursor)
+            .order_by(Feedback.id)
+            .limit(batch_size - len(batch))
+            .all()
+        )
+        batch += new_items
+    if not batch:
+        run.status = "complete"
+        run.finished_at = now
+        details["retry"] = {}
+        run.details = details
+        db.session.commit()
+        print(
+            f"WORKER: Bulk re-screen complete ({run.processed} rows, {run.changed} changed, "
+            f"{failed_count} failed)."
+        )
+        return run
+
+    try:
+        verdicts = run_toxicity_batch(
+            [(item.id, item.feedback_text) for item in batch], provider=provider
+        )
+    except requests.RequestException as exc:
+        # Transport failures say nothing about the items; retry the same batch next window.
+        run.last_error = f"Provider unavailable: {exc}"
+        run.last_batch_at = now
+        db.session.commit()
+        return run
+
+    changed = finished = 0
+    moderator_decided = _moderator_decided_ids([item.id for item in batch])
+    for item in batch:
+        verdict = verdicts[item.id]
+        if verdict["screened_by"] == FAILSAFE_SCREENER:
+            # Never apply fail-closed defaults in bulk; count the attempt instead.
+            attempts = retry.get(item.id, 0) + 1
+            if attempts < max_attempts:
+                retry[item.id] = attempts
+                continue
+            retry.pop(item.id, None)
+            failed_count += 1
+            if len(failed_sample) < FAILED_SAMPLE_SIZE:
+                failed_sample.append(item.id)
+            finished += 1
+            print(f"WORKER: Giving up re-screening feedback {item.id} after {attempts} attempts.")
+            continue
+        retry.pop(item.id, None)
+        finished += 1
+        if _apply_verdict(item, verdict, item.id in moderator_decided):
+            changed += 1
+
+    if new_items:
+        run.cursor = str(new_items[-1].id)
+    run.processed = (run.processed or 0) + finished
+    run.changed = (run.changed or 0) + changed
+    run.last_batch_at = now
+    run.last_error = None
+    details["provider"] = provider.name
+    details["retry"] = {str(key): value for key, value in retry.items()}
+    details["failed_count"] = failed_count
+    details["failed_sample"] = failed_sample
+    run.details = details
+    db.session.commit()
+    print(
+        f"WORKER: Re-screened {finished} rows up to id {run.cursor} ({changed} changed, "
+        f"{len(retry)} waiting for retry)."
+    )
+    return run
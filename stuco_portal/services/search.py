@@ -0,0 +1,132 @@
+import html as html_lib
+import re
+
+from sqlalchemy import text
+
+from ..extensions import db
+
+SEARCH_TABLE = "feedback_fts"
+SNIPPET_TOKENS = 12
+TERM_REGEX = re.compile(r"\w+", re.UNICODE)
+# Control characters never occur in feedback, so they can mark matches until the
+# snippet has been HTML-escaped.
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+SEARCH_TRIGGERS = {
+    "feedback_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS feedback_fts_ai AFTER INSERT ON feedback BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, feedback_text, context_detail)
+            VALUES (new.id, new.feedback_text, new.context_detail);
+        END
+    """,
+    "feedback_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS feedback_fts_ad AFTER DELETE ON feedback BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, feedback_text, context_detail)
+            VALUES ('delete', old.id, old.feedback_text, old.context_detail);
+        END
+    """,
+    "feedback_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS feedback_fts_au
+        AFTER UPDATE OF feedback_text, context_detail ON feedback BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, feedback_text, context_detail)
+            VALUES ('delete', old.id, old.feedback_text, old.context_detail);
+            INSERT INTO {SEARCH_TABLE}(rowid, feedback_text, context_detail)
+            VALUES (new.id, new.feedback_text, new.context_detail);
+        END
+    """,
+}
+
+
+def search_available():
+    return db.engine.dialect.name == "sqlite"
+
+
+def ensure_feedback_search():
+    # External-content FTS5 index over feedback; SQLite triggers keep it in sync for
+    # ORM writes and set-based UPDATE/DELETE statements alike.
+    if not search_available():
+        return False
+    with db.engine.begin() as connection:
+        existing = {
+            row[0]
+            for row in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            )
+        }
+        if "feedback" not in existing:
+            return False
+        needs_rebuild = False
+        try:
+            if SEARCH_TABLE not in existing:
+                connection.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                        "feedback_text, context_detail, content='feedback', content_rowid='id')"
+                    )
+                )
+                needs_rebuild = True
+            for name, statement in SEARCH_TRIGGERS.items():
+                if name not in existing:
+                    connection.execute(text(statement))
+                    # Triggers vanish with a dropped feedback table, so the index is stale.
+                    needs_rebuild = True
+            if needs_rebuild:
+                connection.execute(
+                    text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+                )
+                print("INFO: Rebuilt feedback search index.")
+        except Exception as exc:
+            print(f"WARNING: Feedback search is unavailable (SQLite FTS5 missing?): {exc}")
+            return False
+    return True
+
+
+def rebuild_feedback_search():
+    with db.engine.begin() as connection:
+        connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+        return connection.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+
+
+def build_match_query(raw_query):
+    # Quote every term so user input can never be parsed as FTS5 syntax; the last
+    # term also matches as a prefix, which suits search-as-you-type.
+    terms = TERM_REGEX.findall(raw_query or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def render_snippet(snippet):
+    escaped = html_lib.escape(snippet or "")
+    return escaped.replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+def search_feedback(match_query, status=None, category=None, teacher_id=None, limit=20, offset=0):
+    conditions = [f"{SEARCH_TABLE} MATCH :match"]
+    params = {"match": match_query, "limit": limit, "offset": offset}
+    if status:
+        conditions.append("f.status = :status")
+        params["status"] = status
+    if category:
+        conditions.append("f.category = :category")
+        params["category"] = category
+    if teacher_id is not None:
+        conditions.append("f.teacher_id = :teacher_id")
+        params["teacher_id"] = teacher_id
+    where = " AND ".join(conditions)
+    source = f"FROM {SEARCH_TABLE} JOIN feedback f ON f.id = {SEARCH_TABLE}.rowid WHERE {where}"
+
+    rows = db.session.execute(
+        text(
+            f"SELECT f.id, bm25({SEARCH_TABLE}) AS score, "
+            f"snippet({SEARCH_TABLE}, 0, :mark_start, :mark_end, '...', {SNIPPET_TOKENS}), "
+            f"snippet({SEARCH_TABLE}, 1, :mark_start, :mark_end, '...', {SNIPPET_TOKENS}) "
+            f"{source} ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        {**params, "mark_start": MATCH_START, "mark_end": MATCH_END},
+    ).all()
+    total = db.session.execute(text(f"SELECT count(*) {source}"), params).scalar() or 0
+    return rows, total
@@ -155,6 +155,7 @@ def seed_data():
             screening = run_toxicity_check(feedback_item.feedback_text)
             feedback_item.toxicity_score = screening["toxicity_score"]
             feedback_item.is_inappropriate = screening["is_inappropriate"]
+            feedback_item.screened_by = screening["screened_by"]
 
             if feedback_item.is_inappropriate:
                 feedback_item.status = "Screened - Escalation"
@@ -0,0 +1,382 @@
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import Feedback, MaintenanceRun
+from .ai.map_reduce import REDUCE_FAN_IN
+from .ai.providers import get_provider
+from .ai.summaries import (
+    run_category_summary,
+    run_teacher_summary,
+    uses_llm_summaries,
+    uses_local_summaries,
+)
+from .feedback_queries import summary_eligible_filters
+from .metrics import increment_metric
+
+REBUILD_TASK = "summary_rebuild"
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = 250
+OUTPUT_TOKENS_PER_CALL = 300
+# A claimed run whose owner has not committed progress for this long is treated as abandoned.
+REBUILD_CLAIM_TIMEOUT_MINUTES = 30
+MOCK_REBUILD_ERROR = (
+    "Real summaries are disabled (DEEPTHINK_OR_NOT) or no provider is configured; "
+    "a rebuild would only write mock summaries."
+)
+
+rebuild_thread = None
+
+
+def estimate_tokens(text):
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+class MeteredProvider:
+    # Wraps a provider for one rebuild: spaces calls to the configured rate across all
+    # rebuild threads and counts estimated tokens for the throughput report.
+
+    def __init__(self, provider, calls_per_minute):
+        self.provider = provider
+        self.name = provider.name
+        self.model = provider.model
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def is_configured(self):
+        return self.provider.is_configured()
+
+    def _wait_for_slot(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def chat(self, messages, **kwargs):
+        self._wait_for_slot()
+        content = self.provider.chat(messages, **kwargs)
+        prompt_tokens = sum(
+            estimate_tokens(str(message.get("content", ""))) for message in messages
+        )
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += estimate_tokens(content)
+        return content
+
+
+def list_rebuild_targets():
+    eligible = summary_eligible_filters()
+    teacher_rows = (
+        db.session.query(
+            Feedback.teacher_id,
+            db.func.count(Feedback.id),
+            db.func.coalesce(db.func.sum(db.func.length(Feedback.feedback_text)), 0),
+        )
+        .filter(Feedback.teacher_id.isnot(None), *eligible)
+        .group_by(Feedback.teacher_id)
+        .order_by(Feedback.teacher_id)
+        .all()
+    )
+    category_rows = (
+        db.session.query(
+            Feedback.category,
+            db.func.count(Feedback.id),
+            db.func.coalesce(db.func.sum(db.func.length(Feedback.feedback_text)), 0),
+        )
+        .filter(Feedback.category != "teacher", *eligible)
+        .group_by(Feedback.category)
+        .order_by(Feedback.category)
+        .all()
+    )
+    targets = [
+        {"key": f"teacher:{teacher_id}", "entries": entries, "chars": chars}
+        for teacher_id, entries, chars in teacher_rows
+    ]
+    targets += [
+        {"key": f"category:{category}", "entries": entries, "chars": chars}
+        for category, entries, chars in category_rows
+    ]
+    return targets
+
+
+def _estimate_calls(entries, chunk_size):
+    if entries <= chunk_size:
+        return 1
+    partials = math.ceil(entries / chunk_size)
+    calls = partials
+    while partials > REDUCE_FAN_IN:
+        partials = math.ceil(partials / REDUCE_FAN_IN)
+        calls += partials
+    return calls + 1
+
+
+def rebuild_engine(provider):
+    if uses_local_summaries():
+        return "local"
+    return "llm" if uses_llm_summaries(provider) else "mock"
+
+
+def estimate_summary_rebuild(provider=None):
+    # Upper bound: chunk cache hits and clustering only ever lower the real numbers.
+    provider = provider or get_provider()
+    chunk_size = max(1, current_app.config.get("SUMMARY_CHUNK_SIZE", 40))
+    targets = list_rebuild_targets()
+    engine = rebuild_engine(provider)
+    llm = engine == "llm"
+    calls = sum(_estimate_calls(target["entries"], chunk_size) for target in targets) if llm else 0
+    # Reduce rounds re-read earlier outputs, so each call's output is also counted as input.
+    input_tokens = 0 if not llm else (
+        sum(target["chars"] for target in targets) // CHARS_PER_TOKEN
+        + calls * (PROMPT_OVERHEAD_TOKENS + OUTPUT_TOKENS_PER_CALL)
+    )
+    output_tokens = calls * OUTPUT_TOKENS_PER_CALL
+    cost_per_1k = current_app.config.get("AI_COST_PER_1K_TOKENS", 0.0)
+    calls_per_minute = current_app.config.get("SUMMARY_REBUILD_CALLS_PER_MINUTE", 30)
+    return {
+        "engine": engine,
+        "provider": provider.name,
+        "model": provider.model,
+        "provider_configured": provider.is_configured(),
+        "targets": len(targets),
+        "teacher_targets": sum(1 for t in targets if t["key"].startswith("teacher:")),
+        "category_targets": sum(1 for t in targets if t["key"].startswith("category:")),
+        "feedback_entries": sum(target["entries"] for target in targets),
+        "estimated_calls": calls,
+        "estimated_input_tokens": input_tokens,
+        "estimated_output_tokens": output_tokens,
+        "estimated_cost": (
+            round((input_tokens + output_tokens) / 1000.0 * cost_per_1k, 4)
+            if cost_per_1k
+            else None
+        ),
+        "estimated_minutes_at_rate_limit": (
+            round(calls / calls_per_minute, 1) if calls_per_minute > 0 else None
+        ),
+    }
+
+
+def get_latest_rebuild_run():
+    return (
+        MaintenanceRun.query.filter_by(task=REBUILD_TASK)
+        .order_by(MaintenanceRun.id.desc())
+        .first()
+    )
+
+
+def is_rebuild_claimed(run):
+    # True while some process (this one or another) is actively executing the run.
+    if not run or run.status != "running" or not run.owner or not run.last_batch_at:
+        return False
+    cutoff = datetime.utcnow() - timedelta(minutes=REBUILD_CLAIM_TIMEOUT_MINUTES)
+    return run.last_batch_at >= cutoff
+
+
+def claim_rebuild_run(run_id, owner):
+    # The conditional UPDATE is the lock, as with monthly digests: the run is taken only when
+    # it is unowned or its owner stopped reporting progress, so a CLI and an API rebuild
+    # cannot both execute it.
+    now = datetime.utcnow()
+    cutoff = now - timedelta(minutes=REBUILD_CLAIM_TIMEOUT_MINUTES)
+    claimed = MaintenanceRun.query.filter(
+        MaintenanceRun.id == run_id,
+        MaintenanceRun.status == "running",
+        db.or_(
+            MaintenanceRun.owner.is_(None),
+            MaintenanceRun.last_batch_at.is_(None),
+            MaintenanceRun.last_batch_at < cutoff,
+        ),
+    ).update({"owner": owner, "last_batch_at": now}, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def start_summary_rebuild(restart=False):
+    run = get_latest_rebuild_run()
+    if run and run.status in {"running", "paused", "failed"} and not restart:
+        run.status = "running"
+        run.last_error = None
+        details = dict(run.details or {})
+        details["failed"] = {}
+        run.details = details
+    else:
+        if run and run.status in {"running", "paused", "failed"}:
+            run.status = "cancelled"
+            run.finished_at = datetime.utcnow()
+        targets = [target["key"] for target in list_rebuild_targets()]
+        run = MaintenanceRun(
+            task=REBUILD_TASK,
+            status="running",
+            cursor="0",
+            total=len(targets),
+            details={"targets": targets, "completed": [], "failed": {}},
+        )
+        db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def pause_summary_rebuild():
+    run = get_latest_rebuild_run()
+    if run and run.status == "running":
+        run.status = "paused"
+        db.session.commit()
+    return run
+
+
+def _rebuild_target(app, target_key, provider):
+    target_type, target_id = target_key.split(":", 1)
+    with app.app_context():
+        if target_type == "teacher":
+            run_teacher_summary(target_id, provider=provider, force_full=True)
+        else:
+            run_category_summary(target_id, provider=provider, force_full=True)
+
+
+def _record_stats(run, metered, started, completed_now):
+    elapsed = max(time.monotonic() - started, 0.001)
+    tokens = metered.prompt_tokens + metered.completion_tokens
+    details = dict(run.details or {})
+    details["provider"] = metered.name
+    details["stats"] = {
+        "elapsed_seconds": round(elapsed, 1),
+        "targets_completed": completed_now,
+        "provider_calls": metered.calls,
+        "estimated_prompt_tokens": metered.prompt_tokens,
+        "estimated_completion_tokens": metered.completion_tokens,
+        "targets_per_minute": round(completed_now * 60.0 / elapsed, 2),
+        "tokens_per_minute": round(tokens * 60.0 / elapsed, 1),
+    }
+    run.details = details
+
+
+def execute_summary_rebuild(app, run_id, provider=None, workers=None):
+    run = db.session.get(MaintenanceRun, run_id)
+    if not run or run.status != "running":
+        return run
+
+    provider = provider or get_provider()
+    if rebuild_engine(provider) == "mock":
+        run.status = "failed"
+        run.last_error = MOCK_REBUILD_ERROR
+        db.session.commit()
+        print(f"REBUILD: Run {run.id} refused: {MOCK_REBUILD_ERROR}")
+        return run
+    owner = uuid.uuid4().hex
+    if not claim_rebuild_run(run.id, owner):
+        print(f"REBUILD: Run {run.id} is already being executed elsewhere.")
+        return run
+    db.session.refresh(run)
+
+    workers = max(1, workers or current_app.config.get("SUMMARY_REBUILD_WORKERS", 2))
+    metered = MeteredProvider(
+        provider,
+        current_app.config.get("SUMMARY_REBUILD_CALLS_PER_MINUTE", 30),
+    )
+    completed = set(run.details.get("completed", []))
+    remaining = [key for key in run.details.get("targets", []) if key not in completed]
+    print(
+        f"REBUILD: Run {run.id} rebuilding {len(remaining)} of {run.total} targets "
+        f"with {workers} workers."
+    )
+
+    started = time.monotonic()
+    completed_now = 0
+    pending = {}
+    queue = iter(remaining)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while run.status == "running" and run.owner == owner and len(pending) < workers:
+                target_key = next(queue, None)
+                if target_key is None:
+                    break
+                pending[pool.submit(_rebuild_target, app, target_key, metered)] = target_key
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            details = dict(run.details)
+            completed_list = list(details.get("completed", []))
+            failed = dict(details.get("failed", {}))
+            for future in done:
+                target_key = pending.pop(future)
+                error = future.exception()
+                if error:
+                    failed[target_key] = str(error)
+                    print(f"REBUILD: {target_key} failed: {error}")
+                else:
+                    completed_list.append(target_key)
+                    completed_now += 1
+                    increment_metric("summary_rebuild_targets")
+            details["completed"] = completed_list
+            details["failed"] = failed
+            run.details = details
+            run.processed = len(completed_list)
+            run.cursor = str(len(completed_list))
+            _record_stats(run, metered, started, completed_now)
+            run.last_batch_at = datetime.utcnow()
+            db.session.commit()
+            # Picks up a pause requested through the admin API while this run was busy.
+            db.session.refresh(run)
+
+    if run.owner != owner:
+        print(f"REBUILD: Run {run.id} was taken over by another process.")
+        return run
+    run.owner = None
+    if run.status == "running":
+        if run.details.get("failed"):
+            run.status = "failed"
+            run.last_error = f"{len(run.details['failed'])} targets failed; start again to retry them."
+        else:
+            run.status = "complete"
+            run.finished_at = datetime.utcnow()
+    _record_stats(run, metered, started, completed_now)
+    db.session.commit()
+
+    stats = run.details["stats"]
+    print(
+        f"REBUILD: Run {run.id} {run.status}: {completed_now} targets in "
+        f"{stats['elapsed_seconds']}s ({stats['targets_per_minute']} targets/min, "
+        f"{stats['tokens_per_minute']} tokens/min, {stats['provider_calls']} provider calls)."
+    )
+    return run
+
+
+def is_rebuild_running():
+    return rebuild_thread is not None and rebuild_thread.is_alive()
+
+
+def start_rebuild_thread(app, run_id):
+    global rebuild_thread
+    if is_rebuild_running():
+        return False
+
+    def target():
+        with app.app_context():
+            try:
+                execute_summary_rebuild(app, run_id)
+            except Exception as exc:
+                db.session.rollback()
+                run = db.session.get(MaintenanceRun, run_id)
+                if run:
+                    run.status = "failed"
+                    run.owner = None
+                    run.last_error = str(exc)
+                    db.session.commit()
+                print(f"REBUILD: Run {run_id} stopped: {exc}")
+
+    rebuild_thread = threading.Thread(target=target, daemon=True)
+    rebuild_thread.start()
+    return True
@@ -1,16 +1,26 @@
 import threading
 from collections import defaultdict
-from datetime import date
+from datetime import date, datetime
 
 from ..extensions import db
 from ..models import MonthlyDigest, SummaryJobQueue
+from .ai.moderation import rescreen_feedback
+from .ai.providers import get_provider
+from .ai.map_reduce import prune_summary_chunk_cache
+from .ai.rollups import advance_daily_rollups
 from .ai.summaries import (
+    is_digest_complete,
+    is_digest_retry_waiting,
     is_last_day_of_month,
     month_key_for_date,
+    run_category_summaries,
     run_category_summary,
     run_monthly_digest,
     run_teacher_summary,
+    uses_llm_summaries,
 )
+from .metrics import increment_metric
+from .rescreen import advance_rescreen_run
 
 worker_thread = None
 worker_started = False
@@ -19,26 +29,59 @@ stop_worker_event = threading.Event()
 
 def summary_worker_thread(flask_app):
     print("WORKER: Background summary worker thread started.")
+    last_cache_prune = None
 
     while not stop_worker_event.is_set():
         try:
             with flask_app.app_context():
                 pending_jobs = (
                     SummaryJobQueue.query.filter_by(status="pending")
+                    .filter(
+                        db.or_(
+                            SummaryJobQueue.run_after.is_(None),
+                            SummaryJobQueue.run_after <= datetime.utcnow(),
+                        )
+                    )
                     .order_by(SummaryJobQueue.created_at)
                     .all()
                 )
 
                 if is_last_day_of_month(date.today()):
                     month_key = month_key_for_date(date.today())
-                    if not db.session.get(MonthlyDigest, month_key):
+                    current_digest = db.session.get(MonthlyDigest, month_key)
+                    if not is_digest_complete(current_digest) and not is_digest_retry_waiting(
+                        current_digest
+                    ):
                         try:
-                            run_monthly_digest(date.today())
-                            print(f"WORKER: Monthly digest generated for {month_key}.")
+                            digest = run_monthly_digest(date.today())
+                            if is_digest_complete(digest):
+                                print(f"WORKER: Monthly digest generated for {month_key}.")
                         except Exception as exc:
                             db.session.rollback()
                             print(f"WORKER: Monthly digest generation failed: {exc}")
 
+                try:
+                    provider = get_provider()
+                    if uses_llm_summaries(provider):
+                        advance_daily_rollups(provider)
+                except Exception as exc:
+                    db.session.rollback()
+                    print(f"WORKER: Daily digest rollup failed: {exc}")
+
+                if last_cache_prune != date.today():
+                    try:
+                        prune_summary_chunk_cache()
+                        last_cache_prune = date.today()
+                    except Exception as exc:
+                        db.session.rollback()
+                        print(f"WORKER: Summary chunk cache pruning failed: {exc}")
+
+                try:
+                    advance_rescreen_run()
+                except Exception as exc:
+                    db.session.rollback()
+                    print(f"WORKER: Bulk re-screen batch failed: {exc}")
+
                 if not pending_jobs:
                     stop_worker_event.wait(flask_app.config.get("WORKER_SLEEP_INTERVAL", 10))
                     continue
@@ -49,6 +92,16 @@ def summary_worker_thread(flask_app):
                 for job in pending_jobs:
                     jobs_to_run[(job.job_type, job.target_id)].append(job)
 
+                category_batches = {
+                    target_id: job_list
+                    for (job_type, target_id), job_list in jobs_to_run.items()
+                    if job_type == "category"
+                }
+                if len(category_batches) > 1:
+                    run_category_batches(category_batches)
+                    for target_id in category_batches:
+                        del jobs_to_run[("category", target_id)]
+
                 for (job_type, target_id), job_list in jobs_to_run.items():
                     print(
                         f"WORKER: Processing batch for {job_type} ID {target_id} ({len(job_list)} jobs)..."
@@ -63,10 +116,14 @@ def summary_worker_thread(flask_app):
                             run_teacher_summary(target_id)
                         elif job_type == "category":
                             run_category_summary(target_id)
+                        elif job_type == "rescreen":
+                            rescreen_feedback(target_id)
 
                         for job in job_list:
                             job.status = "complete"
                         db.session.commit()
+                        increment_metric("job_batches_completed")
+                        increment_metric("jobs_completed", len(job_list))
                         print(f"WORKER: Batch for {job_type} ID {target_id} complete.")
 
                     except Exception as exc:
@@ -77,6 +134,8 @@ def summary_worker_thread(flask_app):
                         for job in job_list:
                             job.status = "failed"
                         db.session.commit()
+                        increment_metric("job_batches_failed")
+                        increment_metric("jobs_failed", len(job_list))
 
             stop_worker_event.wait(flask_app.config.get("WORKER_SLEEP_INTERVAL", 10))
 
@@ -87,10 +146,42 @@ def summary_worker_thread(flask_app):
     print("WORKER: Background worker thread shutting down.")
 
 
+def run_category_batches(category_batches):
+    print(f"WORKER: Processing {len(category_batches)} category batches together...")
+    for job_list in category_batches.values():
+        for job in job_list:
+            job.status = "processing"
+    db.session.commit()
+
+    try:
+        failures = run_category_summaries(list(category_batches))
+    except Exception as exc:
+        print(f"WORKER: CRITICAL ERROR processing category batches. Error: {exc}")
+        db.session.rollback()
+        failures = {target_id: exc for target_id in category_batches}
+
+    for target_id, job_list in category_batches.items():
+        failed = target_id in failures
+        if failed:
+            print(
+                f"WORKER: CRITICAL ERROR processing batch for category ID {target_id}. "
+                f"Error: {failures[target_id]}"
+            )
+        for job in job_list:
+            job.status = "failed" if failed else "complete"
+        increment_metric("job_batches_failed" if failed else "job_batches_completed")
+        increment_metric("jobs_failed" if failed else "jobs_completed", len(job_list))
+    db.session.commit()
+
+
 def is_thread_alive(thread):
     return thread is not None and thread.is_alive()
 
 
+def is_worker_running():
+    return is_thread_alive(worker_thread)
+
+
 def start_worker_thread(app):
     global worker_thread
     global worker_started
@@ -0,0 +1,82 @@
+import pytest
+
+from stuco_portal import create_app
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback
+from stuco_portal.services.ai.providers import BaseProvider
+from stuco_portal.services.db_utils import ensure_schema_updates
+from stuco_portal.services.dedup import reset_duplicate_index
+from stuco_portal.services.seed import seed_data
+
+ADMIN_ID = 3
+
+
+class FakeProvider(BaseProvider):
+    # Records every chat call; ``responder(messages)`` returns the content or raises.
+    name = "fake"
+
+    def __init__(self, responder):
+        super().__init__("test-key", "fake-model", "http://provider.invalid", 5, 800)
+        self.responder = responder
+        self.calls = []
+
+    def chat(self, messages, temperature=0.0, max_tokens=None, response_format=None):
+        self.calls.append(messages)
+        return self.responder(messages)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("ENABLE_WORKER", "0")
+    monkeypatch.setenv("ALLOW_MOCK_AUTH", "1")
+    monkeypatch.setenv("DEEPTHINK_OR_NOT", "0")
+    for key in ("DEEPSEEK_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+
+    reset_duplicate_index()
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        ensure_schema_updates()
+        seed_data()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    reset_duplicate_index()
+
+
+@pytest.fixture
+def make_feedback(app):
+    # Adds and commits an approved feedback row from the seeded student.
+    def make(**fields):
+        values = {
+            "submitted_by_user_id": 1,
+            "year_level_submitted": "N/A",
+            "category": "facilities",
+            "status": "Approved",
+            "is_summary_approved": True,
+            **fields,
+        }
+        item = Feedback(**values)
+        db.session.add(item)
+        db.session.commit()
+        return item
+
+    return make
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_api(client):
+    # Calls the API as the seeded STUCO admin through mock auth.
+    def request(method, url, user_id=ADMIN_ID, **kwargs):
+        separator = "&" if "?" in url else "?"
+        return client.open(f"{url}{separator}mock_user_id={user_id}", method=method, **kwargs)
+
+    return request
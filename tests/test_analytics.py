@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback, FeedbackStat
+from stuco_portal.services.analytics import feedback_analytics, rebuild_feedback_stats
+
+
+def _stats_snapshot():
+    # Trigger-maintained rows, minus buckets that were emptied out again.
+    return {
+        (stat.dimension, stat.bucket, stat.status): (
+            stat.feedback_count,
+            stat.flagged_count,
+            stat.rating_clarity_sum,
+            stat.rating_clarity_count,
+            stat.rating_pacing_sum,
+        )
+        for stat in FeedbackStat.query.all()
+        if stat.feedback_count
+    }
+
+
+def _assert_matches_recount():
+    maintained = _stats_snapshot()
+    rebuild_feedback_stats()
+    db.session.expire_all()
+    assert maintained == _stats_snapshot()
+
+
+def test_rollup_matches_seed(app):
+    overall = feedback_analytics()["overall"]
+    assert overall["feedback_count"] == 5
+    assert overall["pending_escalations"] == 1
+    _assert_matches_recount()
+
+
+def test_rollup_follows_orm_writes(make_feedback):
+    item = make_feedback(
+        feedback_text="Rated entry",
+        category="teacher",
+        teacher_id=2,
+        rating_clarity=2,
+        created_at=datetime(2024, 3, 6, 12, 0),
+    )
+    item.rating_clarity = 4
+    item.status = "Retracted by Admin"
+    db.session.commit()
+    _assert_matches_recount()
+
+    db.session.delete(item)
+    db.session.commit()
+    _assert_matches_recount()
+
+
+def test_rollup_follows_bulk_update_and_delete(make_feedback):
+    for index in range(6):
+        make_feedback(feedback_text=f"Bulk entry {index}", rating_clarity=index % 5 + 1)
+
+    Feedback.query.filter(Feedback.feedback_text.like("Bulk entry%")).update(
+        {
+            Feedback.status: "Screened - Escalation",
+            Feedback.is_inappropriate: True,
+            Feedback.category: "food",
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+    _assert_matches_recount()
+    assert feedback_analytics()["overall"]["pending_escalations"] == 7
+
+    Feedback.query.filter(Feedback.feedback_text.in_(["Bulk entry 0", "Bulk entry 3"])).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    _assert_matches_recount()
+    overall = feedback_analytics()["overall"]
+    assert overall["feedback_count"] == 9
+    assert overall["pending_escalations"] == 5
+
+
+def test_analytics_route(admin_api):
+    response = admin_api("GET", "/api/admin/analytics?weeks=4")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["weeks"] == 4
+    assert {row["category"] for row in body["by_category"]} >= {"teacher", "food"}
+    assert admin_api("GET", "/api/admin/analytics?weeks=x").status_code == 400
+    assert admin_api("GET", "/api/admin/analytics", user_id=1).status_code == 403
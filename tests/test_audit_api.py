@@ -0,0 +1,45 @@
+from stuco_portal.extensions import db
+from stuco_portal.services.audit import log_audit
+
+
+def _log_entries(count, action="test_action"):
+    for index in range(count):
+        log_audit(action, "feedback", index, details={"index": index})
+    db.session.commit()
+
+
+def test_audit_log_keyset_paging(admin_api):
+    _log_entries(7)
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/admin/audit_logs?action=test_action&limit=3"
+        if cursor:
+            url += f"&cursor={cursor}"
+        body = admin_api("GET", url).get_json()
+        assert len(body["items"]) <= 3
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 7
+    assert seen == sorted(set(seen), reverse=True)
+
+
+def test_audit_log_filters_and_actor_names(admin_api):
+    _log_entries(2, action="other_action")
+    admin_api("POST", "/api/admin/feedback/bulk", json={"action": "retract", "feedback_ids": [1]})
+
+    body = admin_api("GET", "/api/admin/audit_logs?action=feedback_retracted").get_json()
+    assert [item["target_id"] for item in body["items"]] == ["1"]
+    assert body["items"][0]["actor_name"] == "Ms. Chen"
+
+    body = admin_api("GET", "/api/admin/audit_logs?actor_user_id=3&target_type=feedback").get_json()
+    assert {item["action"] for item in body["items"]} == {"feedback_retracted"}
+
+
+def test_audit_log_rejects_bad_arguments(admin_api):
+    assert admin_api("GET", "/api/admin/audit_logs?cursor=abc").status_code == 400
+    assert admin_api("GET", "/api/admin/audit_logs?from=yesterday").status_code == 400
+    assert admin_api("GET", "/api/admin/audit_logs", user_id=2).status_code == 403
@@ -0,0 +1,77 @@
+from stuco_portal.extensions import db
+from stuco_portal.models import AuditLog, Feedback, FeedbackStatusHistory, SummaryJobQueue
+from stuco_portal.services.bulk_moderation import BULK_MODERATION_MAX_IDS
+
+
+def _pending_targets():
+    return sorted(
+        (job.job_type, job.target_id)
+        for job in SummaryJobQueue.query.filter_by(status="pending", feedback_id=None)
+    )
+
+
+def test_bulk_retract_updates_rows_history_audit_and_jobs(admin_api):
+    SummaryJobQueue.query.delete()
+    db.session.commit()
+
+    response = admin_api(
+        "POST", "/api/admin/feedback/bulk", json={"action": "retract", "feedback_ids": [1, 2, 999]}
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["changed"] == [1, 2]
+    assert body["missing"] == [999]
+    assert body["jobs"] == 2
+
+    db.session.expire_all()
+    for feedback_id in (1, 2):
+        item = db.session.get(Feedback, feedback_id)
+        assert item.status == "Retracted by Admin"
+        assert item.is_summary_approved is False
+    history = FeedbackStatusHistory.query.filter_by(new_status="Retracted by Admin").all()
+    assert sorted(row.feedback_id for row in history) == [1, 2]
+    assert all(row.changed_by_user_id == 3 for row in history)
+    audits = AuditLog.query.filter_by(action="feedback_retracted").all()
+    assert sorted(row.target_id for row in audits) == ["1", "2"]
+    assert all(row.details["bulk"] for row in audits)
+    assert _pending_targets() == [("category", "food"), ("teacher", "1")]
+
+    repeat = admin_api(
+        "POST", "/api/admin/feedback/bulk", json={"action": "retract", "feedback_ids": [1]}
+    ).get_json()
+    assert repeat["changed"] == []
+    assert repeat["unchanged"] == [1]
+
+
+def test_bulk_delete_removes_rows_and_their_jobs(admin_api):
+    db.session.add(SummaryJobQueue(job_type="rescreen", target_id="4", feedback_id=4))
+    db.session.commit()
+
+    response = admin_api(
+        "POST", "/api/admin/feedback/bulk", json={"action": "delete", "feedback_ids": [4, 5]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["changed"] == [4, 5]
+
+    db.session.expire_all()
+    assert Feedback.query.filter(Feedback.id.in_([4, 5])).count() == 0
+    assert SummaryJobQueue.query.filter_by(feedback_id=4).count() == 0
+    assert AuditLog.query.filter_by(action="feedback_deleted").count() == 2
+    assert ("category", "policy") in _pending_targets()
+
+
+def test_bulk_rejects_bad_input(admin_api):
+    bad_bodies = [
+        {"action": "approve", "feedback_ids": []},
+        {"action": "approve", "feedback_ids": "1,2"},
+        {"action": "approve", "feedback_ids": [1, "two"]},
+        {"action": "approve", "feedback_ids": list(range(BULK_MODERATION_MAX_IDS + 1))},
+        {"action": "publish", "feedback_ids": [1]},
+    ]
+    for body in bad_bodies:
+        response = admin_api("POST", "/api/admin/feedback/bulk", json=body)
+        assert response.status_code == 400, body
+    assert FeedbackStatusHistory.query.filter_by(note="Admin bulk approve").count() == 0
+    assert admin_api(
+        "POST", "/api/admin/feedback/bulk", user_id=1, json={"action": "approve", "feedback_ids": [1]}
+    ).status_code == 403
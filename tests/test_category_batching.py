@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import CategorySummary
+from stuco_portal.services.ai.summaries import CATEGORY_BATCH_PROMPT, run_category_summaries
+
+SINGLE_JSON = '{"positive_highlights": ["Single"], "actionable_growth": ["Single growth"]}'
+
+
+def _summaries(*names):
+    return json.dumps(
+        {
+            "summaries": {
+                name: {"positive_highlights": [f"{name} ok"], "actionable_growth": [f"{name} fix"]}
+                for name in names
+            }
+        }
+    )
+
+
+@pytest.fixture
+def categories(app, make_feedback):
+    app.config["DEEPTHINK_OR_NOT"] = True
+    make_feedback(category="equipment", feedback_text="The projectors flicker.")
+    make_feedback(category="school-buses", feedback_text="The morning bus is late.")
+    return ["equipment", "school-buses"]
+
+
+def _provider(batch_response):
+    return FakeProvider(
+        lambda messages: batch_response
+        if messages[0]["content"] == CATEGORY_BATCH_PROMPT
+        else SINGLE_JSON
+    )
+
+
+def test_low_volume_categories_share_one_call(categories):
+    provider = _provider(_summaries(*categories))
+    assert run_category_summaries(categories, provider=provider) == {}
+
+    assert len(provider.calls) == 1
+    prompt = provider.calls[0][1]["content"]
+    assert "### Category: equipment (FULL)" in prompt
+    assert "### Category: school-buses (FULL)" in prompt
+    bus = db.session.get(CategorySummary, "school-buses")
+    assert bus.raw_positive_bullets == ["school-buses ok"]
+
+
+def test_category_missing_from_batch_falls_back_to_single_call(categories):
+    provider = _provider(_summaries("equipment"))
+    assert run_category_summaries(categories, provider=provider) == {}
+
+    assert len(provider.calls) == 2
+    assert provider.calls[1][0]["content"] != CATEGORY_BATCH_PROMPT
+    assert db.session.get(CategorySummary, "equipment").raw_positive_bullets == ["equipment ok"]
+    assert db.session.get(CategorySummary, "school-buses").raw_positive_bullets == ["Single"]
+
+
+def test_larger_categories_are_summarized_individually(app, categories, make_feedback):
+    app.config["SUMMARY_BATCH_MAX_ENTRIES"] = 1
+    make_feedback(category="equipment", feedback_text="We need more laptops.")
+    provider = _provider(_summaries(*categories))
+    assert run_category_summaries(categories, provider=provider) == {}
+    # Only one category is left to batch, so both run as single calls.
+    assert [messages[0]["content"] == CATEGORY_BATCH_PROMPT for messages in provider.calls] == [
+        False,
+        False,
+    ]
@@ -0,0 +1,47 @@
+import pytest
+
+from stuco_portal.services.ai import clustering
+from stuco_portal.services.ai.clustering import (
+    FeedbackCluster,
+    cluster_feedback,
+    clustered_prompt_text,
+    similarity_matrix,
+    tfidf_vectors,
+)
+
+TEXTS = [
+    "The cafeteria pasta is always cold at lunch.",
+    "Lunch pasta in the cafeteria is always cold.",
+    "We need more water fountains in the gym.",
+    "The cafeteria pasta is always cold at lunch!",
+]
+
+
+def test_near_identical_entries_share_a_cluster():
+    clusters = cluster_feedback(TEXTS, threshold=0.7)
+    assert [cluster.count for cluster in clusters] == [3, 1]
+    assert clusters[0].representative in TEXTS[:2] + TEXTS[3:]
+    assert clusters[1] == FeedbackCluster(TEXTS[2], 1)
+
+
+def test_zero_threshold_disables_clustering():
+    assert cluster_feedback(TEXTS, threshold=0) == [FeedbackCluster(text, 1) for text in TEXTS]
+
+
+def test_pure_python_similarity_matches_numpy(monkeypatch):
+    if clustering.np is None:
+        pytest.skip("NumPy is not installed")
+    vectors, vocabulary = tfidf_vectors(TEXTS)
+    expected = similarity_matrix(vectors, vocabulary)
+    monkeypatch.setattr(clustering, "np", None)
+    actual = similarity_matrix(vectors, vocabulary)
+    for expected_row, actual_row in zip(expected, actual):
+        assert actual_row == pytest.approx(expected_row)
+
+
+def test_prompt_text_marks_cluster_sizes(app):
+    app.config["SUMMARY_CLUSTER_THRESHOLD"] = 0.7
+    lines = clustered_prompt_text(TEXTS).split("\n---\n")
+    assert len(lines) == 2
+    assert lines[0].endswith("(x3 similar entries)")
+    assert lines[1] == TEXTS[2]
@@ -0,0 +1,123 @@
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback, SummaryJobQueue, User
+from stuco_portal.routes import student_api
+from stuco_portal.services.bulk_moderation import bulk_moderate_feedback
+from stuco_portal.services.dedup import find_near_duplicate, remember_fingerprint, simhash
+
+TARGET_KEY = "category:facilities"
+TEXT = "The water fountains on the second floor are broken again."
+
+
+def _cluster(make_feedback):
+    fingerprint = simhash(TEXT)
+    root = make_feedback(feedback_text=TEXT, text_fingerprint=fingerprint)
+    first = make_feedback(feedback_text=TEXT, text_fingerprint=fingerprint, duplicate_of_id=root.id)
+    second = make_feedback(
+        feedback_text=TEXT, text_fingerprint=fingerprint, duplicate_of_id=root.id
+    )
+    return root.id, first.id, second.id
+
+
+def _duplicate_of(feedback_id):
+    return db.session.get(Feedback, feedback_id).duplicate_of_id
+
+
+def test_bulk_retract_reroots_cluster(make_feedback):
+    root_id, first_id, second_id = _cluster(make_feedback)
+
+    bulk_moderate_feedback("retract", [root_id], actor_id=3)
+    db.session.commit()
+    db.session.expire_all()
+
+    assert _duplicate_of(first_id) is None
+    assert _duplicate_of(second_id) == first_id
+    assert _duplicate_of(root_id) == first_id
+    assert find_near_duplicate(TARGET_KEY, simhash(TEXT), user_id=99).root_id == first_id
+
+
+def test_bulk_delete_skips_ineligible_duplicates(make_feedback):
+    root_id, first_id, second_id = _cluster(make_feedback)
+    item = db.session.get(Feedback, first_id)
+    item.status = "Screened - Escalation"
+    item.is_summary_approved = False
+    db.session.commit()
+
+    bulk_moderate_feedback("delete", [root_id], actor_id=3)
+    db.session.commit()
+    db.session.expire_all()
+
+    assert _duplicate_of(second_id) is None
+    assert _duplicate_of(first_id) == second_id
+
+
+def test_index_changes_wait_for_commit(app, make_feedback):
+    fingerprint = simhash(TEXT)
+    assert find_near_duplicate(TARGET_KEY, fingerprint, user_id=2) is None
+    # No stored fingerprint, so only remember_fingerprint can put these rows in the index.
+    dropped = make_feedback(feedback_text=TEXT)
+    kept = make_feedback(feedback_text=TEXT)
+
+    remember_fingerprint(TARGET_KEY, dropped.id, 1, fingerprint)
+    db.session.rollback()
+    assert find_near_duplicate(TARGET_KEY, fingerprint, user_id=2) is None
+
+    remember_fingerprint(TARGET_KEY, kept.id, 1, fingerprint)
+    db.session.commit()
+    assert find_near_duplicate(TARGET_KEY, fingerprint, user_id=2).feedback_id == kept.id
+
+
+def _submit(client, user_id):
+    return client.post(
+        f"/api/submit_feedback?mock_user_id={user_id}",
+        json={"feedback_text": TEXT, "category": "equipment", "year_level": "Year 7"},
+    )
+
+
+def test_escalated_submission_is_not_a_duplicate_root(client, monkeypatch):
+    db.session.add(
+        User(id=4, azure_oid="student_2", email="student2@test.com", name="Student B", role="student")
+    )
+    db.session.commit()
+    verdicts = iter([True, False])
+    monkeypatch.setattr(
+        student_api,
+        "run_toxicity_check",
+        lambda text, deadline=None: {
+            "is_inappropriate": next(verdicts),
+            "toxicity_score": 0.5,
+            "screened_by": "fake",
+        },
+    )
+
+    escalated = _submit(client, 1).get_json()
+    assert escalated["status"] == "Screened - Escalation"
+    clean = _submit(client, 4).get_json()
+    assert clean["status"] == "Approved"
+    assert clean["duplicate_of"] is None
+    assert SummaryJobQueue.query.filter_by(feedback_id=clean["id"], job_type="category").count() == 1
+
+
+def test_stale_index_root_is_confirmed_in_database(make_feedback):
+    root_id, first_id, _ = _cluster(make_feedback)
+    assert find_near_duplicate(TARGET_KEY, simhash(TEXT), user_id=99).root_id == root_id
+
+    # Another process retracts the root and re-roots its cluster without touching this index.
+    Feedback.query.filter(Feedback.id == root_id).update(
+        {Feedback.status: "Retracted", Feedback.is_summary_approved: False, Feedback.duplicate_of_id: first_id},
+        synchronize_session=False,
+    )
+    Feedback.query.filter(Feedback.duplicate_of_id == root_id).update(
+        {Feedback.duplicate_of_id: first_id}, synchronize_session=False
+    )
+    Feedback.query.filter(Feedback.id == first_id).update(
+        {Feedback.duplicate_of_id: None}, synchronize_session=False
+    )
+    db.session.commit()
+
+    assert find_near_duplicate(TARGET_KEY, simhash(TEXT), user_id=99).root_id == first_id
+
+    Feedback.query.filter(Feedback.id != 0).update(
+        {Feedback.is_summary_approved: False}, synchronize_session=False
+    )
+    db.session.commit()
+    assert find_near_duplicate(TARGET_KEY, simhash(TEXT), user_id=99) is None
@@ -0,0 +1,117 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from stuco_portal.extensions import db
+from stuco_portal.models import MonthlyDigest
+from stuco_portal.routes import digest_api
+from stuco_portal.services import digests
+from stuco_portal.services.ai import summaries
+from stuco_portal.services.ai.summaries import (
+    DIGEST_CLAIM_TIMEOUT_MINUTES,
+    DIGEST_RETRY_BACKOFF_MINUTES,
+    DIGEST_STATUS_FAILED,
+    claim_monthly_digest,
+    month_key_for_date,
+    run_monthly_digest,
+)
+from stuco_portal.services.digests import (
+    backfill_monthly_digests,
+    parse_month_key,
+    plan_digest_backfill,
+)
+
+
+def test_digest_list_validates_month_filters(admin_api):
+    assert admin_api("GET", "/api/monthly_digests?from=2025-13").status_code == 400
+    assert admin_api("GET", "/api/monthly_digests?to=june").status_code == 400
+    response = admin_api("GET", "/api/monthly_digests?from=2025-1&to=2025-06")
+    assert response.status_code == 200
+    assert response.get_json()["total"] == 0
+
+
+def test_backfill_generates_missing_months_and_lists_them(app, admin_api):
+    plan = plan_digest_backfill(parse_month_key("2024-01"), parse_month_key("2024-03"))
+    assert plan == {"missing": ["2024-01", "2024-02", "2024-03"], "present": []}
+
+    result = backfill_monthly_digests(app, plan["missing"], workers=2)
+    assert result["generated"] == ["2024-01", "2024-02", "2024-03"]
+    assert result["failed"] == {}
+    assert plan_digest_backfill(parse_month_key("2024-01"), parse_month_key("2024-03"))["missing"] == []
+
+    page = admin_api("GET", "/api/monthly_digests?per_page=2&from=2024-01").get_json()
+    assert [item["month_key"] for item in page["items"]] == ["2024-03", "2024-02"]
+    assert page["has_more"] is True
+
+
+def test_backfill_reports_lost_claim_as_skipped(app, monkeypatch):
+    # run_monthly_digest returns None when another process claimed and then released the month.
+    monkeypatch.setattr(digests, "run_monthly_digest", lambda target_date: None)
+    result = backfill_monthly_digests(app, ["2024-01"], workers=1)
+    assert result == {"generated": [], "skipped": ["2024-01"], "failed": {}}
+
+
+def _age_digest(month_key, minutes):
+    MonthlyDigest.query.filter_by(month_key=month_key).update(
+        {MonthlyDigest.generated_at: datetime.utcnow() - timedelta(minutes=minutes)}
+    )
+    db.session.commit()
+
+
+def test_digest_claim_is_single_flight(app):
+    month = (date(2024, 5, 1), date(2024, 5, 31))
+    assert claim_monthly_digest("2024-05", *month) is True
+    assert claim_monthly_digest("2024-05", *month) is False
+
+    _age_digest("2024-05", DIGEST_CLAIM_TIMEOUT_MINUTES + 1)
+    assert claim_monthly_digest("2024-05", *month) is True
+    assert claim_monthly_digest("2024-05", *month) is False
+
+
+def test_failed_digest_waits_before_retrying(app, monkeypatch):
+    attempts = []
+
+    def failing_generation(*args):
+        attempts.append(args[0])
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(summaries, "_generate_monthly_digest", failing_generation)
+    with pytest.raises(RuntimeError):
+        run_monthly_digest(date(2024, 5, 31))
+    assert db.session.get(MonthlyDigest, "2024-05").status == DIGEST_STATUS_FAILED
+
+    # Within the backoff the failed row is returned without another attempt.
+    assert run_monthly_digest(date(2024, 5, 31)).status == DIGEST_STATUS_FAILED
+    assert attempts == ["2024-05"]
+    assert digests.plan_digest_backfill(date(2024, 5, 1), date(2024, 5, 1))["missing"] == ["2024-05"]
+
+    _age_digest("2024-05", DIGEST_RETRY_BACKOFF_MINUTES + 1)
+    with pytest.raises(RuntimeError):
+        run_monthly_digest(date(2024, 5, 31))
+    assert attempts == ["2024-05", "2024-05"]
+
+
+def test_digest_page_does_not_restart_failed_generation(app, admin_api, monkeypatch):
+    started = []
+    monkeypatch.setattr(digest_api, "is_last_day_of_month", lambda today: True)
+    monkeypatch.setattr(digest_api, "start_digest_thread", lambda app, today: started.append(today))
+    today = date.today()
+    db.session.add(
+        MonthlyDigest(
+            month_key=month_key_for_date(today),
+            start_date=today,
+            end_date=today,
+            generated_at=datetime.utcnow(),
+            feedback_count=0,
+            status=DIGEST_STATUS_FAILED,
+        )
+    )
+    db.session.commit()
+
+    body = admin_api("GET", "/api/monthly_digest").get_json()
+    assert body["pending"] is True
+    assert started == []
+
+    _age_digest(month_key_for_date(today), DIGEST_RETRY_BACKOFF_MINUTES + 1)
+    admin_api("GET", "/api/monthly_digest")
+    assert started == [today]
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from stuco_portal.models import AuditLog
+from stuco_portal.services import export
+
+EXPORT_URL = "/api/admin/feedback/export"
+
+
+def _csv_rows(response):
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_default_csv_export(admin_api):
+    response = admin_api("GET", EXPORT_URL)
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert "attachment" in response.headers["Content-Disposition"]
+    rows = _csv_rows(response)
+    assert rows[0] == export.DEFAULT_EXPORT_FIELDS
+    assert len(rows) == 6
+    assert AuditLog.query.filter_by(action="feedback_exported").count() == 1
+
+
+def test_export_of_only_joined_columns(admin_api):
+    response = admin_api("GET", f"{EXPORT_URL}?fields=teacher_name&teacher_id=1")
+    assert response.status_code == 200
+    assert _csv_rows(response) == [["teacher_name"], ["Mr. Harper"], ["Mr. Harper"]]
+
+    response = admin_api("GET", f"{EXPORT_URL}?format=ndjson&fields=id,teacher_name&category=food")
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": 2, "teacher_name": None}]
+
+
+def test_csv_cells_cannot_start_formulas(admin_api, make_feedback):
+    item = make_feedback(feedback_text='=HYPERLINK("http://evil.invalid")')
+    response = admin_api("GET", f"{EXPORT_URL}?fields=id,feedback_text")
+    cells = {int(row[0]): row[1] for row in _csv_rows(response)[1:]}
+    assert cells[item.id] == "'" + item.feedback_text
+
+
+def test_export_rejects_bad_arguments(admin_api):
+    for query in ("format=xlsx", "fields=submitted_by_user_id", "teacher_id=abc", "from=yesterday"):
+        response = admin_api("GET", f"{EXPORT_URL}?{query}")
+        assert response.status_code == 400, query
+        assert "error" in response.get_json()
+    assert admin_api("GET", EXPORT_URL, user_id=2).status_code == 403
+
+
+def test_query_failure_is_reported_before_streaming(admin_api, monkeypatch):
+    def broken_rows(fields, criteria, batch_size):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(export, "_export_rows", broken_rows)
+    response = admin_api("GET", EXPORT_URL)
+    assert response.status_code == 500
+    assert response.mimetype == "application/json"
+    assert "database is locked" in response.get_json()["error"]
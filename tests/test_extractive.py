@@ -0,0 +1,47 @@
+from stuco_portal.services.ai.extractive import (
+    MAX_SENTENCES,
+    build_name_regex,
+    extractive_summary,
+    redact_personal_references,
+    split_sentences,
+)
+
+
+def test_personal_references_are_redacted():
+    name_regex = build_name_regex(["Mr. Harper", "Student A", "Admin User"])
+    sentence = "Mr. Harper said Harper would email jo@school.org about the Admin meeting."
+    assert redact_personal_references(sentence, name_regex) == (
+        "the teacher said [name] would email [email] about the Admin meeting."
+    )
+    # Redaction runs before splitting, so "Mr." never ends a sentence.
+    assert split_sentences(["Ms. Williams explains things clearly. Too much homework."]) == [
+        "the teacher explains things clearly.",
+        "Too much homework.",
+    ]
+
+
+def test_long_history_is_sampled_evenly():
+    texts = [f"Feedback sentence number {index} here." for index in range(5 * MAX_SENTENCES + 7)]
+    sentences = split_sentences(texts)
+    assert len(sentences) == MAX_SENTENCES
+    numbers = [int(sentence.split()[3]) for sentence in sentences]
+    assert numbers == sorted(numbers)
+    assert numbers[0] < 10
+    assert numbers[-1] > 4 * MAX_SENTENCES
+    assert numbers[MAX_SENTENCES // 2] in range(2 * MAX_SENTENCES, 3 * MAX_SENTENCES)
+
+
+def test_extractive_summary_sides_and_support():
+    texts = [
+        "The lessons are really helpful and clear.",
+        "Lessons are helpful and clear every week.",
+        "The homework is too long and stressful.",
+        "We need more time for projects please.",
+        "The bus was on time.",
+    ]
+    positive, actionable = extractive_summary(texts, max_bullets=3)
+    assert len(positive) == 1
+    assert positive[0].endswith("(2 mentions)")
+    assert "The homework is too long and stressful." in actionable
+    assert "We need more time for projects please." in actionable
+    assert not any("bus" in bullet for bullet in positive + actionable)
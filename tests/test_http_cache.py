@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+import pytest
+
+from stuco_portal.extensions import db
+from stuco_portal.models import CategorySummary, MonthlyDigest, TeacherSummary
+from stuco_portal.routes import digest_api
+from stuco_portal.services.ai.summaries import build_summary_payload, summary_content_fields
+
+
+def _summary_fields(label):
+    return summary_content_fields([f"{label} good"], [f"{label} better"])
+
+
+def _revalidate(get, url):
+    first = get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    repeat = get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b""
+    assert repeat.headers["ETag"] == etag
+    return first
+
+
+def test_teacher_summary_revalidates(client):
+    db.session.add(TeacherSummary(teacher_id=1, input_fingerprint="v1", **_summary_fields("A")))
+    db.session.commit()
+    url = "/api/teacher/holistic_summary?mock_user_id=2"
+    first = _revalidate(client.get, url)
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    modified = client.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert modified.status_code == 304
+
+    summary = db.session.get(TeacherSummary, 1)
+    summary.input_fingerprint = "v2"
+    summary.response_payload = build_summary_payload(["B good"], ["B better"])
+    db.session.commit()
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.get_json()["positive_bullets"] == ["B good"]
+
+
+def test_category_summaries_revalidate(admin_api):
+    db.session.add(CategorySummary(category_name="food", input_fingerprint="v1", **_summary_fields("F")))
+    db.session.commit()
+    def get(url, headers=None):
+        return admin_api("GET", url, headers=headers)
+
+    first = _revalidate(get, "/api/admin/category_summaries")
+    assert [item["category_name"] for item in first.get_json()] == ["food"]
+
+    db.session.add(CategorySummary(category_name="policy", input_fingerprint="v1", **_summary_fields("P")))
+    db.session.commit()
+    changed = admin_api(
+        "GET", "/api/admin/category_summaries", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert changed.status_code == 200
+
+
+@pytest.fixture
+def finished_digest(app, monkeypatch):
+    monkeypatch.setattr(digest_api, "is_last_day_of_month", lambda today: False)
+    db.session.add(
+        MonthlyDigest(
+            month_key="2024-04",
+            start_date=date(2024, 4, 1),
+            end_date=date(2024, 4, 30),
+            generated_at=datetime(2024, 4, 30, 23, 0),
+            positive_bullets=["Good month"],
+            actionable_bullets=["Fix buses"],
+            feedback_count=4,
+            status="complete",
+        )
+    )
+    db.session.commit()
+
+
+def test_monthly_digest_revalidates(client, finished_digest):
+    first = _revalidate(client.get, "/api/monthly_digest?mock_user_id=2")
+    assert first.get_json()["positive_bullets"] == ["Good month"]
+    assert first.headers["Cache-Control"] == f"private, max-age={digest_api.DIGEST_MAX_AGE_SECONDS}"
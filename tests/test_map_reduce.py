@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import SummaryChunkCache
+from stuco_portal.services.ai.map_reduce import (
+    MAP_SYSTEM_PROMPT,
+    map_reduce_summary,
+    prune_summary_chunk_cache,
+)
+
+SUMMARY_JSON = '{"positive_highlights": ["Clear"], "actionable_growth": ["Slower"]}'
+
+
+def _texts(count):
+    return [f"Entry {index} about homework load" for index in range(count)]
+
+
+def _map_calls(provider):
+    prefix = MAP_SYSTEM_PROMPT.split("{context}")[0]
+    return sum(1 for messages in provider.calls if messages[0]["content"].startswith(prefix))
+
+
+def test_repeat_run_reuses_cached_chunks(app):
+    app.config["SUMMARY_CHUNK_SIZE"] = 2
+    provider = FakeProvider(lambda messages: SUMMARY_JSON)
+    map_reduce_summary(_texts(6), provider, "Summarize.", "test")
+    first_calls = len(provider.calls)
+    assert SummaryChunkCache.query.count() == _map_calls(provider) > 1
+
+    map_reduce_summary(_texts(6), provider, "Summarize.", "test")
+    # Only the final reduce runs again.
+    assert len(provider.calls) == first_calls + 1
+
+
+def test_early_deletion_keeps_later_chunks_cached(app):
+    app.config["SUMMARY_CHUNK_SIZE"] = 4
+    provider = FakeProvider(lambda messages: SUMMARY_JSON)
+    texts = _texts(60)
+    map_reduce_summary(texts, provider, "Summarize.", "test")
+    first_map_calls = _map_calls(provider)
+    assert first_map_calls > 8
+
+    del texts[5]
+    map_reduce_summary(texts, provider, "Summarize.", "test")
+    # Fixed-size chunks would shift every boundary after the deletion.
+    assert _map_calls(provider) - first_map_calls <= 3
+
+
+def test_unused_chunk_cache_entries_are_pruned(app):
+    app.config["SUMMARY_CHUNK_SIZE"] = 2
+    provider = FakeProvider(lambda messages: SUMMARY_JSON)
+    texts = _texts(6)
+    map_reduce_summary(texts, provider, "Summarize.", "test")
+    chunk_count = SummaryChunkCache.query.count()
+
+    SummaryChunkCache.query.update(
+        {SummaryChunkCache.last_used_at: datetime.utcnow() - timedelta(days=60)}
+    )
+    db.session.commit()
+    # Earlier chunks are read again; only the chunk holding the changed last entry goes stale.
+    changed = texts[:-1] + ["A different entry"]
+    map_reduce_summary(changed, provider, "Summarize.", "test")
+    assert prune_summary_chunk_cache(30) == 1
+    assert SummaryChunkCache.query.count() == chunk_count
+    assert prune_summary_chunk_cache(0) == 0
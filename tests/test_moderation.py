@@ -0,0 +1,79 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback, SummaryJobQueue
+from stuco_portal.services.ai import moderation
+from stuco_portal.services.ai.moderation import RESCREEN_STATUS, rescreen_feedback, run_toxicity_check
+
+
+def test_moderation_deadline_is_wall_clock(app):
+    def slow(messages):
+        time.sleep(1.0)
+        return '{"is_inappropriate": false, "toxicity_score": 0.0}'
+
+    started = time.monotonic()
+    verdict = run_toxicity_check("Lovely lesson today.", provider=FakeProvider(slow), deadline=0.2)
+    assert time.monotonic() - started < 0.9
+    assert verdict["needs_rescreen"] is True
+    assert verdict["screened_by"] is None
+
+
+def test_fast_verdict_within_deadline(app):
+    provider = FakeProvider(lambda messages: '{"is_inappropriate": true, "toxicity_score": 0.4}')
+    verdict = run_toxicity_check("Some text.", provider=provider, deadline=2)
+    assert verdict == {"toxicity_score": 0.95, "is_inappropriate": True, "screened_by": "fake"}
+
+
+def test_submission_without_provider_uses_mock_screening(client):
+    response = client.post(
+        "/api/submit_feedback?mock_user_id=1",
+        json={"feedback_text": "You are a stupid teacher.", "category": "food"},
+    )
+    assert response.status_code == 201
+    assert response.get_json()["status"] == "Screened - Escalation"
+
+
+def test_saturated_pool_defers_without_queueing(app, monkeypatch):
+    monkeypatch.setattr(moderation, "_deadline_slots", threading.BoundedSemaphore(1))
+
+    def respond(messages):
+        if "slow" in messages[1]["content"]:
+            time.sleep(0.5)
+        return '{"is_inappropriate": false, "toxicity_score": 0.0}'
+
+    provider = FakeProvider(respond)
+    assert run_toxicity_check("slow", provider=provider, deadline=0.1)["needs_rescreen"] is True
+    # The overrunning call still holds the only worker, so this one is never submitted.
+    assert run_toxicity_check("fast", provider=provider, deadline=1)["needs_rescreen"] is True
+    assert len(provider.calls) == 1
+
+    time.sleep(0.6)
+    assert run_toxicity_check("fast", provider=provider, deadline=1)["screened_by"] == "fake"
+
+
+def test_rescreen_transport_error_requeues_with_backoff(make_feedback):
+    item = make_feedback(feedback_text="Fine text.", status=RESCREEN_STATUS, is_summary_approved=False)
+    db.session.add(SummaryJobQueue(job_type="rescreen", target_id=str(item.id), feedback_id=item.id))
+    db.session.commit()
+
+    def unreachable(messages):
+        raise requests.ConnectionError("provider unreachable")
+
+    delays = []
+    for _ in range(2):
+        started = datetime.utcnow()
+        rescreen_feedback(item.id, provider=FakeProvider(unreachable))
+        job = SummaryJobQueue.query.order_by(SummaryJobQueue.job_id.desc()).first()
+        delays.append(job.run_after - started)
+    assert delays[0] >= timedelta(seconds=moderation.RESCREEN_BACKOFF_SECONDS)
+    assert delays[1] >= 2 * delays[0] - timedelta(seconds=1)
+
+    item = db.session.get(Feedback, item.id)
+    assert item.status == RESCREEN_STATUS
+    assert item.is_inappropriate is False
+    assert item.screened_by is None
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from stuco_portal.extensions import db
+from stuco_portal.models import CategorySummary, TeacherSummary
+from stuco_portal.services.ai.summaries import build_summary_payload
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def _add_summaries():
+    db.session.add(
+        TeacherSummary(
+            teacher_id=1,
+            response_payload=build_summary_payload(["Clear explanations."], ["Slow down."]),
+        )
+    )
+    db.session.add(
+        CategorySummary(
+            category_name="food",
+            response_payload=build_summary_payload(["Great pasta."], ["Longer lunch lines."]),
+        )
+    )
+    db.session.commit()
+
+
+def test_queue_references_summaries_by_key(admin_api):
+    _add_summaries()
+    body = admin_api("GET", "/api/admin/moderation/queue?status=Approved").get_json()
+
+    keys = {item["id"]: item["summary_key"] for item in body["items"]}
+    assert keys == {1: "teacher:1", 2: "category:food", 4: "category:policy", 5: "teacher:1"}
+    summaries = body["summaries"]
+    assert set(summaries) == {"teacher:1", "category:food", "category:policy"}
+    assert summaries["teacher:1"]["positive_bullets"] == ["Clear explanations."]
+    assert summaries["category:food"]["actionable_bullets"] == ["Longer lunch lines."]
+    assert summaries["category:policy"]["note"] == "Summary not yet generated."
+
+
+def test_queue_query_count_does_not_grow_with_items(admin_api, make_feedback):
+    _add_summaries()
+    with count_statements() as small:
+        admin_api("GET", "/api/admin/moderation/queue?status=Approved")
+
+    for index in range(20):
+        make_feedback(
+            feedback_text=f"Teacher entry {index}",
+            category="teacher" if index % 2 else f"category-{index}",
+            teacher_id=(index % 3) + 1 if index % 2 else None,
+        )
+    with count_statements() as large:
+        body = admin_api("GET", "/api/admin/moderation/queue?status=Approved").get_json()
+    assert len(body["items"]) == 24
+    assert len(large) == len(small)
+
+
+def test_category_summaries_is_a_bare_list(admin_api):
+    # The dashboard reads this response as an array, not {"items": [...]}.
+    _add_summaries()
+    response = admin_api("GET", "/api/admin/category_summaries")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert isinstance(body, list)
+    assert [entry["category_name"] for entry in body] == ["food"]
+    assert body[0]["category_title"]
+    assert body[0]["last_updated"]
@@ -0,0 +1,62 @@
+import pytest
+
+from stuco_portal.extensions import db
+from stuco_portal.mcp.server import create_mcp_app
+from stuco_portal.models import Feedback
+
+
+@pytest.fixture
+def mcp_client(app, monkeypatch):
+    # Same database file as the app fixture.
+    monkeypatch.setenv("MCP_REQUIRE_AUTH", "0")
+    return create_mcp_app().test_client()
+
+
+def _walk(get, url, limit, between_pages=None):
+    ids, cursor = [], None
+    while True:
+        page_url = f"{url}&limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        body = get(page_url).get_json()
+        assert len(body["items"]) <= limit
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, body["total"]
+        if between_pages:
+            between_pages()
+
+
+def _student_ids():
+    return sorted(
+        (row[0] for row in db.session.query(Feedback.id).filter(Feedback.submitted_by_user_id == 1)),
+        reverse=True,
+    )
+
+
+def test_student_pages_neither_overlap_nor_skip(client, make_feedback):
+    for index in range(8):
+        make_feedback(feedback_text=f"Entry {index}")
+    expected = _student_ids()
+    # A submission landing mid-walk must not shift later pages.
+    ids, total = _walk(
+        client.get,
+        "/api/student/feedback?mock_user_id=1",
+        limit=4,
+        between_pages=lambda: make_feedback(feedback_text="Arrived mid-walk"),
+    )
+    assert ids == expected
+    assert total == len(_student_ids())
+
+    assert client.get("/api/student/feedback?mock_user_id=1&cursor=abc").status_code == 400
+
+
+def test_mcp_feedback_pages_neither_overlap_nor_skip(mcp_client, make_feedback):
+    for index in range(6):
+        make_feedback(feedback_text=f"Entry {index}", category="food")
+    expected = sorted(
+        (row[0] for row in db.session.query(Feedback.id).filter(Feedback.category == "food")),
+        reverse=True,
+    )
+    ids, total = _walk(mcp_client.get, "/mcp/resources/feedback?category=food", limit=3)
+    assert ids == expected
+    assert total == len(expected)
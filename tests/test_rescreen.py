@@ -0,0 +1,150 @@
+import json
+
+import pytest
+import requests
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback, MaintenanceRun
+from stuco_portal.services import rescreen
+from stuco_portal.services.ai.moderation import FAILSAFE_SCREENER, MODERATION_SYSTEM_PROMPT
+from stuco_portal.services.rescreen import advance_rescreen_run, start_rescreen_run
+
+POISON_ID = 2
+
+
+def _moderator(unusable_ids=(), failures=None, flagged_ids=()):
+    # Batched calls answer every id except unusable_ids; single checks of those return junk.
+    # failures counts down batched calls that raise a transport error first.
+    failures = failures if failures is not None else [0]
+
+    def respond(messages):
+        if messages[0]["content"] == MODERATION_SYSTEM_PROMPT:
+            return "not json"
+        if failures[0]:
+            failures[0] -= 1
+            raise requests.ConnectionError("provider unreachable")
+        items = json.loads(messages[1]["content"])
+        return json.dumps(
+            {
+                "results": [
+                    {
+                        "id": item["id"],
+                        "is_inappropriate": item["id"] in flagged_ids,
+                        "toxicity_score": 0.9 if item["id"] in flagged_ids else 0.1,
+                    }
+                    for item in items
+                    if item["id"] not in unusable_ids
+                ]
+            }
+        )
+
+    return FakeProvider(respond)
+
+
+@pytest.fixture
+def rescreen_config(app):
+    app.config["RESCREEN_BATCH_SIZE"] = 2
+    app.config["RESCREEN_MAX_ATTEMPTS"] = 2
+    return app.config
+
+
+def _advance(provider):
+    # Skips the rate-limit wait between windows.
+    MaintenanceRun.query.update({MaintenanceRun.last_batch_at: None})
+    db.session.commit()
+    return advance_rescreen_run(provider)
+
+
+def test_poison_item_fails_after_max_attempts(rescreen_config):
+    provider = _moderator(unusable_ids={POISON_ID})
+    run = start_rescreen_run()
+    assert run.total == 5
+
+    for _ in range(10):
+        run = _advance(provider)
+        if run.status == "complete":
+            break
+    assert run.status == "complete"
+    assert run.details["failed_count"] == 1
+    assert run.details["failed_sample"] == [POISON_ID]
+    assert run.details["retry"] == {}
+    assert run.processed == 5
+    assert db.session.get(Feedback, POISON_ID).screened_by == "mock"
+    assert {item.screened_by for item in Feedback.query.filter(Feedback.id != POISON_ID)} == {"fake"}
+    # One batched call per window plus one single check per attempt at the poison item.
+    single_checks = [call for call in provider.calls if call[0]["content"] == MODERATION_SYSTEM_PROMPT]
+    assert len(single_checks) == 2
+
+
+def test_transport_failure_retries_same_batch(rescreen_config):
+    failures = [2]
+    provider = _moderator(failures=failures)
+    start_rescreen_run()
+
+    for _ in range(2):
+        run = _advance(provider)
+        assert run.status == "running"
+        assert run.processed == 0
+        assert run.cursor == "0"
+        assert "Provider unavailable" in run.last_error
+
+    run = _advance(provider)
+    assert run.processed == 2
+    assert run.cursor == "2"
+    assert run.last_error is None
+    assert run.details["retry"] == {}
+
+
+def test_clean_verdict_clears_only_failsafe_escalations(rescreen_config, admin_api):
+    item = db.session.get(Feedback, 4)
+    item.status = "Screened - Escalation"
+    item.is_summary_approved = False
+    item.screened_by = FAILSAFE_SCREENER
+    db.session.commit()
+
+    provider = _moderator()
+    start_rescreen_run()
+    for _ in range(5):
+        _advance(provider)
+
+    db.session.expire_all()
+    assert db.session.get(Feedback, 4).status == "Approved"
+    # The seeded safeguarding item was escalated by keyword screening and stays with admins.
+    assert db.session.get(Feedback, 3).status == "Screened - Escalation"
+
+    progress = admin_api("GET", "/api/admin/moderation/rescreen").get_json()["run"]
+    assert progress["status"] == "complete"
+    assert progress["percent"] == 100.0
+
+
+def test_failed_ids_are_counted_with_a_capped_sample(rescreen_config, monkeypatch):
+    monkeypatch.setattr(rescreen, "FAILED_SAMPLE_SIZE", 2)
+    rescreen_config["RESCREEN_MAX_ATTEMPTS"] = 1
+    provider = _moderator(unusable_ids={1, 2, 3, 4})
+    start_rescreen_run()
+    for _ in range(5):
+        run = _advance(provider)
+        if run.status == "complete":
+            break
+    assert run.status == "complete"
+    assert run.details["failed_count"] == 4
+    assert run.details["failed_sample"] == [1, 2]
+
+
+def test_moderator_approval_is_not_re_escalated(rescreen_config, admin_api):
+    # Seeded item 3 was escalated by mock screening; an admin reviewed and approved it.
+    assert admin_api("PUT", "/api/admin/feedback/3/approve").status_code == 200
+
+    provider = _moderator(flagged_ids={3, 4})
+    start_rescreen_run()
+    for _ in range(5):
+        _advance(provider)
+
+    db.session.expire_all()
+    approved = db.session.get(Feedback, 3)
+    assert approved.status == "Approved"
+    assert approved.is_summary_approved is True
+    assert approved.toxicity_score == 0.9
+    # Item 4 was only ever approved by screening, so a flag still escalates it.
+    assert db.session.get(Feedback, 4).status == "Screened - Escalation"
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+import pytest
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import DailyDigestRollup
+from stuco_portal.services.ai.rollups import advance_daily_rollups, refresh_daily_rollups
+
+SUMMARY_JSON = '{"positive_highlights": ["Good"], "actionable_growth": ["Better"]}'
+MAY = (date(2024, 5, 1), date(2024, 5, 31))
+
+
+@pytest.fixture
+def provider(app):
+    return FakeProvider(lambda messages: SUMMARY_JSON)
+
+
+def _on(make_feedback, day, text):
+    return make_feedback(feedback_text=text, created_at=datetime(2024, 5, day, 12, 0))
+
+
+def test_only_changed_days_are_rolled_up_again(provider, make_feedback):
+    _on(make_feedback, 2, "The library is quiet.")
+    _on(make_feedback, 3, "The gym is cold.")
+    rollups = refresh_daily_rollups(*MAY, provider)
+    assert [(rollup.day, rollup.feedback_count) for rollup in rollups] == [
+        (date(2024, 5, 2), 1),
+        (date(2024, 5, 3), 1),
+    ]
+    assert len(provider.calls) == 2
+
+    refresh_daily_rollups(*MAY, provider)
+    assert len(provider.calls) == 2
+
+    _on(make_feedback, 3, "The gym needs new mats.")
+    rollups = refresh_daily_rollups(*MAY, provider)
+    assert len(provider.calls) == 3
+    assert "rollup for 2024-05-03" in provider.calls[-1][1]["content"]
+    assert [rollup.feedback_count for rollup in rollups] == [1, 2]
+
+
+def test_day_without_eligible_feedback_loses_its_rollup(provider, make_feedback):
+    item = _on(make_feedback, 2, "The library is quiet.")
+    refresh_daily_rollups(*MAY, provider)
+
+    item.is_summary_approved = False
+    db.session.commit()
+    assert refresh_daily_rollups(*MAY, provider) == []
+    assert DailyDigestRollup.query.count() == 0
+
+
+def test_advance_covers_completed_days_of_the_month(provider, make_feedback):
+    _on(make_feedback, 2, "The library is quiet.")
+    _on(make_feedback, 3, "The gym is cold.")
+    assert advance_daily_rollups(provider, today=date(2024, 5, 1)) == []
+    rollups = advance_daily_rollups(provider, today=date(2024, 5, 3))
+    assert [rollup.day for rollup in rollups] == [date(2024, 5, 2)]
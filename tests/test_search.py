@@ -0,0 +1,60 @@
+from stuco_portal.extensions import db
+from stuco_portal.models import Feedback
+from stuco_portal.services.search import build_match_query, search_feedback
+
+
+def _search_ids(raw_query):
+    rows, total = search_feedback(build_match_query(raw_query))
+    assert total == len(rows)
+    return sorted(row[0] for row in rows)
+
+
+def test_build_match_query_quotes_terms():
+    assert build_match_query('pasta OR "x') == '"pasta" "OR" "x"*'
+    assert build_match_query("  ...  ") is None
+
+
+def test_seeded_feedback_is_indexed(app):
+    assert _search_ids("pasta") == [2]
+    assert _search_ids("unif") == [4]
+
+
+def test_triggers_follow_insert_update_and_delete(make_feedback):
+    item = make_feedback(feedback_text="The library needs quieter study rooms.")
+    assert _search_ids("library") == [item.id]
+
+    item.feedback_text = "The gym needs more basketballs."
+    db.session.commit()
+    assert _search_ids("library") == []
+    assert _search_ids("basketballs") == [item.id]
+
+    db.session.delete(item)
+    db.session.commit()
+    assert _search_ids("basketballs") == []
+
+
+def test_triggers_follow_set_based_statements(app):
+    Feedback.query.filter(Feedback.id.in_([2, 4])).update(
+        {Feedback.feedback_text: "Replaced by a bulk statement."}, synchronize_session=False
+    )
+    db.session.commit()
+    assert _search_ids("pasta") == []
+    assert _search_ids("bulk statement") == [2, 4]
+
+    Feedback.query.filter(Feedback.id == 2).delete(synchronize_session=False)
+    db.session.commit()
+    assert _search_ids("bulk statement") == [4]
+
+
+def test_search_route_escapes_snippets(admin_api, make_feedback):
+    make_feedback(feedback_text="<b>Loud</b> hallway noise")
+
+    response = admin_api("GET", "/api/admin/feedback/search?q=hallway")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["total"] == 1
+    snippet = body["items"][0]["feedback_snippet"]
+    assert "&lt;b&gt;" in snippet
+    assert "<mark>hallway</mark>" in snippet
+
+    assert admin_api("GET", "/api/admin/feedback/search?q=").status_code == 400
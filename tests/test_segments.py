@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from stuco_portal.extensions import db
+from stuco_portal.services.ai.segments import segment_breakdown, summarize_segments
+from stuco_portal.services.feedback_queries import created_between_filters, summary_eligible_filters
+
+MAY_FILTERS = (
+    *created_between_filters(datetime(2024, 5, 1), datetime(2024, 5, 31, 23, 59)),
+    *summary_eligible_filters(),
+)
+
+
+def _add(make_feedback, category, year_level, day, clarity=None, text="Some feedback"):
+    return make_feedback(
+        category=category,
+        year_level_submitted=year_level,
+        rating_clarity=clarity,
+        feedback_text=text,
+        created_at=datetime(2024, 5, day, 12, 0),
+    )
+
+
+def _by_key(segments, dimension):
+    return {segment["key"]: segment for segment in segments[dimension]}
+
+
+def test_breakdown_rolls_up_both_dimensions(make_feedback):
+    _add(make_feedback, "food", "Year 7", 2, clarity=4)
+    _add(make_feedback, "food", "Year 8", 3, clarity=2)
+    _add(make_feedback, "food", "Year 7", 4)
+    _add(make_feedback, "policy", None, 5, clarity=5)
+    _add(make_feedback, "policy", "Year 7", 6, clarity=3).is_summary_approved = False
+    db.session.commit()
+
+    total, segments = segment_breakdown(MAY_FILTERS)
+    assert total == 4
+    categories = _by_key(segments, "category")
+    assert [segment["key"] for segment in segments["category"]] == ["food", "policy"]
+    assert categories["food"]["feedback_count"] == 3
+    # Unrated entries count towards the segment but not towards the average.
+    assert categories["food"]["average_ratings"]["clarity"] == 3.0
+    assert categories["food"]["average_ratings"]["pacing"] is None
+
+    year_levels = _by_key(segments, "year_level")
+    assert {key: segment["feedback_count"] for key, segment in year_levels.items()} == {
+        "Year 7": 2,
+        "Year 8": 1,
+        "unknown": 1,
+    }
+    assert year_levels["unknown"]["average_ratings"]["clarity"] == 5.0
+
+
+def test_only_large_segments_are_summarized_from_an_even_sample(make_feedback):
+    for day in range(1, 21):
+        _add(make_feedback, "food", "Year 7", day, text=f"Food note {day}")
+    _add(make_feedback, "policy", "Year 7", 21)
+
+    _, segments = segment_breakdown(MAY_FILTERS)
+    seen = {}
+
+    def summarize(texts, label):
+        seen[label] = texts
+        return [f"{label} good"], [f"{label} better"]
+
+    summarize_segments(segments, MAY_FILTERS, summarize, min_feedback=5, sample_size=5)
+    assert sorted(seen) == ["category food", "year level Year 7"]
+    assert seen["category food"] == [f"Food note {day}" for day in (1, 5, 9, 13, 17)]
+
+    categories = _by_key(segments, "category")
+    assert categories["food"]["summarized"] is True
+    assert categories["food"]["sampled_count"] == 5
+    assert categories["food"]["positive_bullets"] == ["category food good"]
+    assert categories["policy"]["summarized"] is False
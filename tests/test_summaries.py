@@ -0,0 +1,69 @@
+import pytest
+
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import CategorySummary
+from stuco_portal.services.ai.summaries import run_category_summary
+from stuco_portal.services.metrics import metrics_snapshot
+
+SUMMARY_JSON = '{"positive_highlights": ["Helpful staff"], "actionable_growth": ["Fix projectors"]}'
+INCREMENTAL_MARKER = "New feedback since the last update"
+
+
+@pytest.fixture
+def provider(app):
+    app.config["DEEPTHINK_OR_NOT"] = True
+    return FakeProvider(lambda messages: SUMMARY_JSON)
+
+
+def _summarize(provider):
+    run_category_summary("equipment", provider=provider)
+    return provider.calls[-1][1]["content"]
+
+
+def test_new_entries_are_folded_in_incrementally(provider, make_feedback):
+    first = make_feedback(category="equipment", feedback_text="The projectors flicker.")
+    assert INCREMENTAL_MARKER not in _summarize(provider)
+
+    second = make_feedback(category="equipment", feedback_text="We need more laptops.")
+    prompt = _summarize(provider)
+    assert INCREMENTAL_MARKER in prompt
+    assert "laptops" in prompt
+    assert "projectors flicker" not in prompt
+    assert "Fix projectors" in prompt
+    summary = db.session.get(CategorySummary, "equipment")
+    assert summary.summarized_feedback_ids == [first.id, second.id]
+
+
+def test_changed_folded_entry_forces_full_rebuild(provider, make_feedback):
+    first = make_feedback(category="equipment", feedback_text="The projectors flicker.")
+    _summarize(provider)
+
+    first.feedback_text = "The projectors were fixed, thanks."
+    db.session.commit()
+    make_feedback(category="equipment", feedback_text="We need more laptops.")
+    prompt = _summarize(provider)
+    assert INCREMENTAL_MARKER not in prompt
+    assert "projectors were fixed" in prompt
+    assert "laptops" in prompt
+
+
+def _skipped_count():
+    return metrics_snapshot()["counters"].get("summary_skipped_unchanged", 0)
+
+
+def test_unchanged_input_skips_regeneration(provider, make_feedback):
+    item = make_feedback(category="equipment", feedback_text="The projectors flicker.")
+    _summarize(provider)
+    calls, skipped = len(provider.calls), _skipped_count()
+
+    run_category_summary("equipment", provider=provider)
+    assert len(provider.calls) == calls
+    assert _skipped_count() == skipped + 1
+
+    # An edit changes the fingerprint even though the approved ids are the same.
+    item.feedback_text = "The projectors were fixed, thanks."
+    db.session.commit()
+    run_category_summary("equipment", provider=provider)
+    assert len(provider.calls) == calls + 1
+    assert _skipped_count() == skipped + 1
@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import FakeProvider
+from stuco_portal.services.ai.providers import AIProviderError
+from stuco_portal.services.ai.summary_output import (
+    FIX_JSON_PROMPT,
+    coerce_bullet_summary,
+    extract_json_object,
+    parse_bullet_summary,
+    summary_output_stats,
+)
+
+VALID = '{"positive_highlights": ["Clear"], "actionable_growth": ["Slower"]}'
+
+
+def test_fenced_json_with_prose_is_repaired_locally():
+    content = "Sure! Here it is:\n```json\n" + VALID + "\n```\nLet me know if {you need more}."
+    assert extract_json_object(content) == {"positive_highlights": ["Clear"], "actionable_growth": ["Slower"]}
+    assert parse_bullet_summary(content) == (["Clear"], ["Slower"])
+    assert extract_json_object("no object {here") is None
+
+
+def test_scalars_are_coerced_and_nested_values_rejected():
+    assert coerce_bullet_summary(
+        {"positive_highlights": "Clear", "actionable_growth": None}
+    ) == ((["Clear"], []), True)
+    assert coerce_bullet_summary(
+        {"positive_highlights": ["Clear", 3], "actionable_growth": []}
+    ) == ((["Clear", "3"], []), True)
+    assert coerce_bullet_summary({"positive_highlights": [{"x": 1}], "actionable_growth": []}) is None
+    assert coerce_bullet_summary({"positive_highlights": []}) is None
+
+
+def test_followup_runs_only_when_local_repair_fails():
+    provider = FakeProvider(lambda messages: VALID)
+    assert parse_bullet_summary(VALID, provider) == (["Clear"], ["Slower"])
+    assert provider.calls == []
+
+    assert parse_bullet_summary("positives: clear; growth: slower", provider) == (["Clear"], ["Slower"])
+    assert [messages[0]["content"] for messages in provider.calls] == [FIX_JSON_PROMPT]
+
+    broken = FakeProvider(lambda messages: "still not json")
+    with pytest.raises(AIProviderError):
+        parse_bullet_summary("not json", broken)
+
+
+def test_output_stats_rates():
+    stats = summary_output_stats(
+        {
+            "summary_output_valid": 6,
+            "summary_output_repaired_locally": 2,
+            "summary_output_repaired_by_followup": 1,
+            "summary_output_invalid": 1,
+        }
+    )
+    assert stats == {
+        "responses": 10,
+        "local_repair_rate": 0.2,
+        "followup_repair_rate": 0.1,
+        "repair_rate": 0.3,
+        "failure_rate": 0.1,
+    }
+    assert summary_output_stats({})["repair_rate"] is None
@@ -0,0 +1,67 @@
+from conftest import FakeProvider
+from stuco_portal.extensions import db
+from stuco_portal.models import CategorySummary, TeacherSummary
+from stuco_portal.services.ai.summaries import (
+    NO_FEEDBACK_PAYLOAD,
+    backfill_summary_payloads,
+    build_summary_payload,
+    run_category_summary,
+)
+
+SUMMARY_JSON = '{"positive_highlights": ["Kind <staff>"], "actionable_growth": ["Fix projectors"]}'
+
+
+def test_summary_write_stores_rendered_payload(app, make_feedback):
+    app.config["DEEPTHINK_OR_NOT"] = True
+    make_feedback(category="equipment", feedback_text="The projectors flicker.")
+    run_category_summary("equipment", provider=FakeProvider(lambda messages: SUMMARY_JSON))
+
+    summary = db.session.get(CategorySummary, "equipment")
+    assert summary.response_payload == build_summary_payload(["Kind <staff>"], ["Fix projectors"])
+    assert summary.response_payload["positive_summary"] == "<ul><li>Kind &lt;staff&gt;</li></ul>"
+    assert summary.latest_positive_summary == summary.response_payload["positive_summary"]
+
+
+def test_backfill_fills_legacy_rows_once(app):
+    db.session.add_all(
+        [
+            CategorySummary(
+                category_name="food",
+                latest_positive_summary="<ul><li>Tasty pasta</li></ul>",
+                latest_actionable_summary="<ul><li>Longer lunch</li></ul>",
+            ),
+            CategorySummary(
+                category_name="policy",
+                latest_positive_summary=NO_FEEDBACK_PAYLOAD["positive_summary"],
+                latest_actionable_summary=NO_FEEDBACK_PAYLOAD["actionable_summary"],
+            ),
+        ]
+    )
+    db.session.commit()
+
+    assert backfill_summary_payloads() == 2
+    assert backfill_summary_payloads() == 0
+    food = db.session.get(CategorySummary, "food")
+    assert food.response_payload == build_summary_payload(["Tasty pasta"], ["Longer lunch"])
+    assert food.raw_positive_bullets == ["Tasty pasta"]
+    # The placeholder is served, but never fed back into an incremental prompt.
+    policy = db.session.get(CategorySummary, "policy")
+    assert policy.response_payload == NO_FEEDBACK_PAYLOAD
+    assert not policy.raw_positive_bullets
+
+
+def test_teacher_summary_is_served_from_stored_payload(client):
+    stored = build_summary_payload(["Stored highlight"], ["Stored growth"])
+    db.session.add(
+        TeacherSummary(
+            teacher_id=1,
+            latest_positive_summary="<ul><li>Stale column</li></ul>",
+            raw_positive_bullets=["Stale column"],
+            response_payload=stored,
+        )
+    )
+    db.session.commit()
+
+    body = client.get("/api/teacher/holistic_summary?mock_user_id=2").get_json()
+    assert body["positive_bullets"] == ["Stored highlight"]
+    assert body["actionable_summary"] == stored["actionable_summary"]
@@ -0,0 +1,54 @@
+from conftest import FakeProvider
+from stuco_portal.services.summary_rebuild import (
+    claim_rebuild_run,
+    estimate_summary_rebuild,
+    execute_summary_rebuild,
+    start_summary_rebuild,
+)
+
+SUMMARY_JSON = '{"positive_highlights": ["Clear"], "actionable_growth": ["Slower"]}'
+
+
+def _summary_provider():
+    return FakeProvider(lambda messages: SUMMARY_JSON)
+
+
+def _enable_llm(app):
+    app.config["DEEPTHINK_OR_NOT"] = True
+    app.config["SUMMARY_REBUILD_CALLS_PER_MINUTE"] = 0
+
+
+def test_rebuild_refuses_mock_mode(app, admin_api):
+    response = admin_api("POST", "/api/admin/summaries/rebuild", json={})
+    assert response.status_code == 400
+    assert response.get_json()["estimate"]["engine"] == "mock"
+
+    run = start_summary_rebuild()
+    run = execute_summary_rebuild(app, run.id, provider=_summary_provider())
+    assert run.status == "failed"
+    assert "mock" in run.last_error
+
+
+def test_rebuild_completes_every_target(app):
+    _enable_llm(app)
+    provider = _summary_provider()
+    estimate = estimate_summary_rebuild(provider)
+    assert estimate["engine"] == "llm"
+
+    run = start_summary_rebuild()
+    run = execute_summary_rebuild(app, run.id, provider=provider)
+    assert run.status == "complete"
+    assert run.processed == run.total == estimate["targets"]
+    assert run.owner is None
+    assert run.details["stats"]["provider_calls"] == len(provider.calls)
+
+
+def test_rebuild_run_is_claimed_once(app):
+    _enable_llm(app)
+    run = start_summary_rebuild()
+    assert claim_rebuild_run(run.id, "other-process")
+
+    provider = _summary_provider()
+    run = execute_summary_rebuild(app, run.id, provider=provider)
+    assert run.status == "running"
+    assert provider.calls == []